@@ -0,0 +1,20 @@
+# Copyright (2016-2018) Hewlett Packard Enterprise Development LP.
+# Copyright (2016-2018) Universidade Federal de Campina Grande
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+# The services are monkey patched before anything else is imported, so the
+# locks created when the driver modules are imported are green.
+import eventlet
+
+eventlet.monkey_patch()
@@ -0,0 +1,100 @@
+# Copyright (2016-2018) Hewlett Packard Enterprise Development LP.
+# Copyright (2016-2018) Universidade Federal de Campina Grande
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Run the OneView synchronization out of the Neutron server.
+
+The service reads the configuration files of the Neutron server, such as
+--config-file /etc/neutron/neutron.conf --config-file
+/etc/neutron/plugins/ml2/ml2_conf_oneview.ini, which should then set
+sync_in_neutron_server to false.
+"""
+
+import sys
+
+from oslo_config import cfg
+from oslo_db import options as db_options
+from oslo_log import log
+
+from networking_oneview.conf import CONF
+from networking_oneview.ml2.drivers.oneview import common
+from networking_oneview.ml2.drivers.oneview import mech_oneview
+from networking_oneview.ml2.drivers.oneview import scmb
+from networking_oneview.ml2.drivers.oneview import synchronization
+
+LOG = log.getLogger(__name__)
+
+cli_opts = [
+    cfg.BoolOpt('once',
+                default=False,
+                help='Run the synchronization a single time and exit, '
+                     'such as from cron.'),
+    cfg.IntOpt('workers',
+               min=1,
+               help='Maximum number of concurrent OneView requests of the '
+                    'service, instead of sync_workers.'),
+]
+
+
+def run_once(sync):
+    """Run the synchronization a single time.
+
+    A single run is not a member of a partitioned synchronization, so it
+    synchronizes every resource. With sync_leader_election, it is
+    skipped while another process holds the sync lease.
+
+    :param sync: a Synchronization;
+    :returns: the exit status of the service;
+    """
+    sync.membership = None
+    if sync.lease is not None:
+        if not sync.lease.acquire():
+            LOG.info("The synchronization is run by another process.")
+            return 0
+        sync.lease.start()
+    try:
+        sync.synchronize()
+    except Exception as err:
+        LOG.error("Synchronization failed: %s", err)
+        return 1
+    finally:
+        if sync.lease is not None:
+            sync.lease.release()
+    return 0
+
+
+def main():
+    log.register_options(CONF)
+    db_options.set_defaults(CONF)
+    CONF.register_cli_opts(cli_opts)
+    CONF(sys.argv[1:], project='neutron', prog='networking-oneview-sync')
+    log.setup(CONF, 'networking-oneview-sync')
+    if CONF.workers:
+        CONF.set_override('sync_workers', CONF.workers, group='DEFAULT')
+
+    driver = mech_oneview.OneViewDriver()
+    common.delete_outdated_flat_mapped_networks(driver.flat_net_mappings)
+    sync = synchronization.Synchronization(
+        oneview_client=driver.oneview_client,
+        neutron_oneview_client=driver.neutron_oneview_client,
+        flat_net_mappings=driver.flat_net_mappings
+    )
+    if CONF.once:
+        return run_once(sync)
+
+    sync.start()
+    if CONF.oneview.scmb_enabled:
+        scmb.SCMBListener(sync).start()
+    sync.wait()
+    return 0
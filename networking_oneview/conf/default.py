@@ -23,13 +23,105 @@ opts = [
                help='UplinkSets to be used.'),
     cfg.StrOpt('flat_net_mappings',
                help='Flat Networks on Oneview that are managed by Neutron.'),
+    cfg.StrOpt('vlan_pool_ranges',
+               help='VLANs whose OneView networks are created ahead of time '
+                    'and added to the mapped LIGs by the synchronization, '
+                    'so creating a Neutron network on one of them only '
+                    'maps it in the database. Comma-separated list of '
+                    '<physical_network>:<vlan_min>:<vlan_max> of physical '
+                    'networks in uplinkset_mappings.'),
+    cfg.BoolOpt('sync_in_neutron_server',
+                default=True,
+                help='If set to false, the Neutron server does not run the '
+                     'synchronization nor listen to the OneView message '
+                     'bus, and the networking-oneview-sync service is '
+                     'expected to do it.'),
     cfg.IntOpt('sync_interval',
                default=3600,
-               help='Interval between synchronization executions in seconds.'),
+               help='Interval between synchronization executions in seconds. '
+                    'Later intervals adapt to the drift found, within '
+                    'sync_interval_min and sync_interval_max when they are '
+                    'set.'),
+    cfg.IntOpt('sync_interval_min',
+               min=1,
+               help='Shortest interval between synchronization executions '
+                    'in seconds. The interval is halved, down to this one, '
+                    'after an execution that changed OneView. Defaults to '
+                    'sync_interval.'),
+    cfg.IntOpt('sync_interval_max',
+               min=1,
+               help='Longest interval between synchronization executions '
+                    'in seconds. The interval is doubled, up to this one, '
+                    'after an execution that found nothing to change. '
+                    'Defaults to sync_interval.'),
+    cfg.IntOpt('sync_start_jitter',
+               default=60,
+               min=0,
+               help='Maximum random delay in seconds before the first '
+                    'synchronization execution, so the Neutron server '
+                    'workers do not all start it at once.'),
+    cfg.BoolOpt('sync_leader_election',
+                default=True,
+                help='If set to true, a lease stored in the database lets '
+                     'a single process of all the Neutron servers run the '
+                     'synchronization and listen to the OneView message '
+                     'bus at a time.'),
+    cfg.IntOpt('sync_lease_duration',
+               default=30,
+               min=3,
+               help='Time in seconds the synchronization lease lasts unless '
+                    'renewed by its holder. Another process takes over the '
+                    'synchronization at most this long after the holder '
+                    'dies.'),
+    cfg.BoolOpt('sync_partitioned',
+                default=False,
+                help='If set to true, every Neutron server process runs '
+                     'the synchronization, each one for its own share of '
+                     'the networks, LIGs and server profiles. The shares '
+                     'are balanced again when processes start or stop.'),
+    cfg.IntOpt('sync_member_timeout',
+               default=30,
+               min=3,
+               help='Time in seconds a process of the partitioned '
+                    'synchronization is considered alive after its last '
+                    'heartbeat. Its share is taken over by the other '
+                    'processes once it has elapsed.'),
+    cfg.IntOpt('sync_page_size',
+               default=500,
+               min=1,
+               help='Number of OneView resources requested per page when '
+                    'the synchronization lists them.'),
+    cfg.IntOpt('sync_workers',
+               default=4,
+               min=1,
+               help='Maximum number of OneView resources the '
+                    'synchronization updates concurrently. Updates of a '
+                    'single server profile or LIG are never concurrent.'),
+    cfg.IntOpt('sync_full_sweep_interval',
+               default=86400,
+               min=0,
+               help='Interval in seconds between full synchronizations. In '
+                    'between, server profiles whose ETag and bound ports '
+                    'are unchanged since they were last found in sync are '
+                    'skipped. Set to 0 to examine every server profile on '
+                    'every run.'),
+    cfg.BoolOpt('sync_dry_run',
+                default=False,
+                help='If set to true, the synchronization only logs the '
+                     'changes it plans to make in OneView, with their '
+                     'estimated number of REST calls, and applies none of '
+                     'them.'),
     cfg.BoolOpt('force_sync_delete_ops',
                 default=False,
                 help='If set to true, Networking OneView Synchronization is '
                      'allowed to delete outdated network and connections.'),
+    cfg.BoolOpt('batch_lig_updates',
+                default=True,
+                help='If set to true, the uplinkset synchronization computes '
+                     'the networks of every Logical Interconnect Group first '
+                     'and updates each of them at most once. Otherwise, '
+                     'every mapped network updates its Logical Interconnect '
+                     'Groups separately.'),
     cfg.IntOpt('retries_to_lock_sh',
                default=10,
                help='Maximum number of attempts when trying to lock Server '
@@ -45,7 +137,89 @@ opts = [
     cfg.IntOpt('retries_to_lock_sp_interval',
                default=30,
                help='Time interval in seconds between attempts when trying '
-                    'to lock Server Profile for connection creation.')
+                    'to lock Server Profile for connection creation.'),
+    cfg.IntOpt('lig_update_retries',
+               default=5,
+               min=0,
+               help='Number of times a Logical Interconnect Group update is '
+                    'merged with the changes of another client and sent '
+                    'again, when the LIG changed since it was read.'),
+    cfg.IntOpt('profile_update_window',
+               default=0,
+               min=0,
+               help='Time in seconds to wait for other connection changes '
+                    'of the same Server Hardware before updating its Server '
+                    'Profile, so they are applied with a single update and '
+                    'power cycle. Every port binding and deletion waits for '
+                    'the window, so it only pays off when ports of a server '
+                    'are bound concurrently, such as with several '
+                    'journal_workers. The changes submitted while a Server '
+                    'Profile is being updated are always applied together '
+                    'once the update finishes; with 0, the default, no '
+                    'other change is waited for.'),
+    cfg.BoolOpt('online_connection_update',
+                default=True,
+                help='If set to true, connection updates that only change '
+                     'the network of existing connections are applied '
+                     'without powering the server off. The server is power '
+                     'cycled if OneView rejects the online update.'),
+    cfg.BoolOpt('server_profile_patch',
+                default=True,
+                help='If set to true, connection changes are sent to OneView '
+                     'as a PATCH of the Server Profile instead of a PUT of '
+                     'the whole Server Profile. PUT is used if OneView '
+                     'rejects the PATCH.'),
+    cfg.BoolOpt('journal_enabled',
+                default=False,
+                help='If set to true, network creation and deletion, port '
+                     'binding and port deletion are recorded in a journal '
+                     'table and reflected on OneView by background workers, '
+                     'so Neutron API requests do not wait for OneView. '
+                     'Pending operations superseded by newer ones on the '
+                     'same network or port are dropped.'),
+    cfg.IntOpt('journal_workers',
+               default=1,
+               min=1,
+               help='Number of workers processing the journal in each '
+                    'Neutron server process.'),
+    cfg.IntOpt('journal_interval',
+               default=5,
+               min=1,
+               help='Interval in seconds between journal processing runs.'),
+    cfg.IntOpt('journal_batch_size',
+               default=20,
+               min=1,
+               help='Maximum number of journal entries claimed at once by '
+                    'a worker.'),
+    cfg.IntOpt('journal_max_retries',
+               default=5,
+               min=0,
+               help='Number of times a failed journal entry is retried '
+                    'before it is marked as failed.'),
+    cfg.IntOpt('journal_processing_timeout',
+               default=600,
+               min=1,
+               help='Time in seconds after which a journal entry left '
+                    'processing by a stopped worker is processed again.'),
+    cfg.IntOpt('db_pool_size',
+               default=5,
+               min=1,
+               help='Number of database connections kept open by the '
+                    'Networking OneView synchronization.'),
+    cfg.IntOpt('db_max_overflow',
+               default=10,
+               min=0,
+               help='Number of database connections that can be opened '
+                    'beyond db_pool_size when the pool is in use.'),
+    cfg.IntOpt('db_pool_timeout',
+               default=30,
+               min=1,
+               help='Time in seconds to wait for a database connection to be '
+                    'returned to the pool.'),
+    cfg.IntOpt('db_pool_recycle',
+               default=3600,
+               help='Time in seconds after which a pooled database '
+                    'connection is reopened. -1 disables recycling.')
 ]
 
 
@@ -30,7 +30,41 @@ opts = [
                 default=False,
                 help="Option to allow insecure connection with OneView."),
     cfg.StrOpt('tls_cacert_file',
-               help="OneView CA cert file Path.")
+               help="OneView CA cert file Path."),
+    cfg.IntOpt('session_timeout',
+               default=3600,
+               min=1,
+               help='Time in seconds a OneView session token is assumed to '
+                    'remain valid after login.'),
+    cfg.IntOpt('session_refresh_margin',
+               default=300,
+               min=0,
+               help='Time in seconds before the session token expires in '
+                    'which a new login is made.'),
+    cfg.BoolOpt('scmb_enabled',
+                default=False,
+                help='If set to true, the changes OneView publishes on its '
+                     'State Change Message Bus (SCMB) trigger the '
+                     'reconciliation of the changed network, LIG or server '
+                     'profile, in between synchronization runs. Requires '
+                     'the kombu library.'),
+    cfg.PortOpt('scmb_port',
+                default=5671,
+                help='Port of the AMQP broker of OneView.'),
+    cfg.StrOpt('scmb_client_cert_file',
+               help='Client certificate used to authenticate to the AMQP '
+                    'broker of OneView.'),
+    cfg.StrOpt('scmb_client_key_file',
+               secret=True,
+               help='Private key of the SCMB client certificate.'),
+    cfg.StrOpt('scmb_cacert_file',
+               help='CA certificate of the AMQP broker of OneView. Defaults '
+                    'to tls_cacert_file.'),
+    cfg.IntOpt('scmb_reconnect_interval',
+               default=10,
+               min=1,
+               help='Interval in seconds between attempts to connect to '
+                    'the AMQP broker of OneView.')
 ]
 
 
@@ -0,0 +1,50 @@
+# Copyright (2016-2017) Hewlett Packard Enterprise Development LP.
+# Copyright (2016-2017) Universidade Federal de Campina Grande
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+"""add oneview journal.
+
+Revision ID: 2c1f7e5d9a3b
+Revises: 56529a79cf3b
+Create Date: 2018-03-05 10:12:41.208331
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2c1f7e5d9a3b'
+down_revision = '56529a79cf3b'
+
+
+def upgrade():
+    op.create_table(
+        'oneview_journal',
+        sa.Column('id', sa.Integer, autoincrement=True),
+        sa.Column('object_type', sa.String(length=36), nullable=False),
+        sa.Column('object_uuid', sa.String(length=36), nullable=False),
+        sa.Column('operation', sa.String(length=36), nullable=False),
+        sa.Column('data', sa.Text, nullable=True),
+        sa.Column('state', sa.String(length=36), nullable=False),
+        sa.Column('retry_count', sa.Integer, nullable=False),
+        sa.Column('last_error', sa.Text, nullable=True),
+        sa.Column('created_at', sa.DateTime, nullable=False),
+        sa.Column('updated_at', sa.DateTime, nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_oneview_journal_state', 'oneview_journal', ['state'])
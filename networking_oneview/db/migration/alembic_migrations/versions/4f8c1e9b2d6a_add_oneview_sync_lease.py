@@ -0,0 +1,41 @@
+# Copyright (2016-2017) Hewlett Packard Enterprise Development LP.
+# Copyright (2016-2017) Universidade Federal de Campina Grande
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+"""add oneview sync lease.
+
+Revision ID: 4f8c1e9b2d6a
+Revises: 7b4e2d0c8f1a
+Create Date: 2018-03-26 09:41:52.370118
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f8c1e9b2d6a'
+down_revision = '7b4e2d0c8f1a'
+
+
+def upgrade():
+    op.create_table(
+        'oneview_sync_lease',
+        sa.Column('name', sa.String(length=36), nullable=False),
+        sa.Column('holder', sa.String(length=255), nullable=False),
+        sa.Column('expires_at', sa.DateTime, nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
@@ -0,0 +1,42 @@
+# Copyright (2016-2017) Hewlett Packard Enterprise Development LP.
+# Copyright (2016-2017) Universidade Federal de Campina Grande
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+"""add oneview sync checkpoint.
+
+Revision ID: 7b4e2d0c8f1a
+Revises: 2c1f7e5d9a3b
+Create Date: 2018-03-19 14:27:05.613092
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7b4e2d0c8f1a'
+down_revision = '2c1f7e5d9a3b'
+
+
+def upgrade():
+    op.create_table(
+        'oneview_sync_checkpoint',
+        sa.Column('resource_uri', sa.String(length=255), nullable=False),
+        sa.Column('neutron_state', sa.String(length=64), nullable=False),
+        sa.Column('oneview_etag', sa.String(length=255), nullable=False),
+        sa.Column('updated_at', sa.DateTime, nullable=False),
+        sa.PrimaryKeyConstraint('resource_uri')
+    )
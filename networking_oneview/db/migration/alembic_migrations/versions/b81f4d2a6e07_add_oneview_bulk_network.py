@@ -0,0 +1,41 @@
+# Copyright (2016-2017) Hewlett Packard Enterprise Development LP.
+# Copyright (2016-2017) Universidade Federal de Campina Grande
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+"""add oneview bulk network.
+
+Revision ID: b81f4d2a6e07
+Revises: e3b7a5d41c96
+Create Date: 2018-05-02 14:12:08.517340
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b81f4d2a6e07'
+down_revision = 'e3b7a5d41c96'
+
+
+def upgrade():
+    op.create_table(
+        'oneview_bulk_network',
+        sa.Column('oneview_network_id', sa.String(length=36),
+                  nullable=False),
+        sa.Column('physical_network', sa.String(length=64), nullable=False),
+        sa.PrimaryKeyConstraint('oneview_network_id')
+    )
@@ -0,0 +1,46 @@
+# Copyright (2016-2017) Hewlett Packard Enterprise Development LP.
+# Copyright (2016-2017) Universidade Federal de Campina Grande
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+#
+
+"""add oneview network pool.
+
+Revision ID: e3b7a5d41c96
+Revises: 9d2a6c3e7f15
+Create Date: 2018-04-23 10:37:45.902116
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3b7a5d41c96'
+down_revision = '9d2a6c3e7f15'
+
+
+def upgrade():
+    op.create_table(
+        'oneview_network_pool',
+        sa.Column('physical_network', sa.String(length=64), nullable=False),
+        sa.Column('vlan_id', sa.Integer, nullable=False,
+                  autoincrement=False),
+        sa.Column('oneview_network_id', sa.String(length=36),
+                  nullable=False),
+        sa.Column('neutron_network_id', sa.String(length=36),
+                  nullable=True),
+        sa.PrimaryKeyConstraint('physical_network', 'vlan_id'),
+        sa.UniqueConstraint('oneview_network_id')
+    )
@@ -41,3 +41,90 @@ class OneviewLogicalInterconnectGroup(model_base.BASEV2):
         self.oneview_network_id = oneview_network_id
         self.oneview_lig_id = oneview_lig_id
         self.oneview_uplinkset_name = oneview_uplinkset_name
+
+
+class OneviewJournal(model_base.BASEV2):
+    __tablename__ = 'oneview_journal'
+    id = sa.Column(sa.Integer, primary_key=True, autoincrement=True)
+    object_type = sa.Column(sa.String(36), nullable=False)
+    object_uuid = sa.Column(sa.String(36), nullable=False)
+    operation = sa.Column(sa.String(36), nullable=False)
+    data = sa.Column(sa.Text, nullable=True)
+    state = sa.Column(sa.String(36), nullable=False, index=True)
+    retry_count = sa.Column(sa.Integer, nullable=False, default=0)
+    last_error = sa.Column(sa.Text, nullable=True)
+    created_at = sa.Column(sa.DateTime, nullable=False)
+    updated_at = sa.Column(sa.DateTime, nullable=False)
+
+    def __init__(self, object_type, object_uuid, operation, data, state,
+                 created_at):
+        self.object_type = object_type
+        self.object_uuid = object_uuid
+        self.operation = operation
+        self.data = data
+        self.state = state
+        self.retry_count = 0
+        self.created_at = created_at
+        self.updated_at = created_at
+
+
+class OneviewSyncCheckpoint(model_base.BASEV2):
+    __tablename__ = 'oneview_sync_checkpoint'
+    resource_uri = sa.Column(sa.String(255), primary_key=True)
+    neutron_state = sa.Column(sa.String(64), nullable=False)
+    oneview_etag = sa.Column(sa.String(255), nullable=False)
+    updated_at = sa.Column(sa.DateTime, nullable=False)
+
+    def __init__(self, resource_uri, neutron_state, oneview_etag,
+                 updated_at):
+        self.resource_uri = resource_uri
+        self.neutron_state = neutron_state
+        self.oneview_etag = oneview_etag
+        self.updated_at = updated_at
+
+
+class OneviewSyncLease(model_base.BASEV2):
+    __tablename__ = 'oneview_sync_lease'
+    name = sa.Column(sa.String(36), primary_key=True)
+    holder = sa.Column(sa.String(255), nullable=False)
+    expires_at = sa.Column(sa.DateTime, nullable=False)
+
+    def __init__(self, name, holder, expires_at):
+        self.name = name
+        self.holder = holder
+        self.expires_at = expires_at
+
+
+class OneviewSyncMember(model_base.BASEV2):
+    __tablename__ = 'oneview_sync_member'
+    member_id = sa.Column(sa.String(255), primary_key=True)
+    heartbeat_at = sa.Column(sa.DateTime, nullable=False)
+
+    def __init__(self, member_id, heartbeat_at):
+        self.member_id = member_id
+        self.heartbeat_at = heartbeat_at
+
+
+class OneviewNetworkPool(model_base.BASEV2):
+    __tablename__ = 'oneview_network_pool'
+    physical_network = sa.Column(sa.String(64), primary_key=True)
+    vlan_id = sa.Column(sa.Integer, primary_key=True, autoincrement=False)
+    oneview_network_id = sa.Column(sa.String(36), nullable=False, unique=True)
+    neutron_network_id = sa.Column(sa.String(36), nullable=True)
+
+    def __init__(self, physical_network, vlan_id, oneview_network_id,
+                 neutron_network_id=None):
+        self.physical_network = physical_network
+        self.vlan_id = vlan_id
+        self.oneview_network_id = oneview_network_id
+        self.neutron_network_id = neutron_network_id
+
+
+class OneviewBulkNetwork(model_base.BASEV2):
+    __tablename__ = 'oneview_bulk_network'
+    oneview_network_id = sa.Column(sa.String(36), primary_key=True)
+    physical_network = sa.Column(sa.String(64), nullable=False)
+
+    def __init__(self, oneview_network_id, physical_network):
+        self.oneview_network_id = oneview_network_id
+        self.physical_network = physical_network
@@ -13,17 +13,22 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import functools
+import threading
 import time
+import weakref
 
 from itertools import chain
 import six
 
 from hpOneView.oneview_client import OneViewClient
+from hpOneView.resources.task_monitor import TaskMonitor
 from oslo_log import log
 from oslo_serialization import jsonutils
 from oslo_utils import importutils
 from oslo_utils import strutils
 from sqlalchemy import create_engine
+from sqlalchemy import event
 from sqlalchemy.orm import sessionmaker
 
 from networking_oneview.conf import CONF
@@ -37,11 +42,52 @@ UPLINKSET_MAPPINGS_TYPE = 2
 NETWORK_TYPE_TAGGED = 'tagged'
 NETWORK_TYPE_UNTAGGED = 'untagged'
 ETHERNET_NETWORK_PREFIX = '/rest/ethernet-networks/'
+NEUTRON_NETWORK_NAME = 'Neutron [%s]'
+BULK_NETWORK_NAME_PREFIX = 'Neutron %s'
+BULK_NETWORK_BANDWIDTH = {
+    'maximumBandwidth': 10000,
+    'typicalBandwidth': 2000,
+}
+UNAUTHORIZED_ERROR_CODES = ('AUTHORIZATION', 'SESSION_EXPIRED')
+ETAG_MISMATCH_ERROR_CODES = ('PRECONDITION_FAILED', 'ETAG_MISMATCH')
+UNSUPPORTED_OPERATION_ERROR_CODES = (
+    'UNSUPPORTED_OPERATION', 'METHOD_NOT_ALLOWED', 'NOT_IMPLEMENTED')
+ONLINE_UPDATE_UNSUPPORTED_ERROR_CODES = (
+    'INVALID_POWER_STATE',) + UNSUPPORTED_OPERATION_ERROR_CODES
+TRANSIENT_ERROR_CODES = (
+    'INTERNAL_ERROR', 'SERVICE_UNAVAILABLE', 'REQUEST_TIMEOUT',
+    'GATEWAY_TIMEOUT', 'TASK_TIMEOUT')
+POWER_STATE_OFF = 'Off'
 
 LOG = log.getLogger(__name__)
 
 oneview_exceptions = importutils.try_import('hpOneView.exceptions')
 
+# A single authenticated OneViewClient is shared by the whole process. The
+# lock is green when Neutron monkey patches eventlet, so concurrent green
+# threads never log in twice.
+_oneview_client = None
+_oneview_client_lock = threading.Lock()
+# Serializes the session renewals, so concurrent callers log in only once.
+_oneview_reauth_lock = threading.Lock()
+_oneview_client_stats = {'logins': 0, 'reuses': 0}
+# Time at which the session token of each client was issued.
+_oneview_sessions = weakref.WeakKeyDictionary()
+
+# The database engine, and its connection pool, is shared by every session
+# the driver opens outside of a Neutron context.
+_database_engine = None
+_database_engine_lock = threading.Lock()
+_database_pool_stats = {
+    'connects': 0, 'checkouts': 0, 'checkins': 0, 'waits': 0}
+
+# Server hardware types whose adapters rejected an online connection update,
+# or the server hardware itself when its type is unknown.
+_offline_server_hardware_types = set()
+# Set once OneView rejects a server profile PATCH, so later updates go
+# straight to PUT.
+_server_profile_patch_state = {'supported': True}
+
 
 def get_oneview_conf():
     """Get OneView Access Configuration."""
@@ -76,8 +122,8 @@ def get_oneview_conf():
     return oneview_conf
 
 
-def get_oneview_client():
-    """Get the OneView Client."""
+def _create_oneview_client():
+    """Create a new OneView Client, logging in to OneView."""
     LOG.debug("Creating a new OneViewClient instance.")
     try:
         client = OneViewClient(get_oneview_conf())
@@ -86,18 +132,177 @@ def get_oneview_client():
                  "HPE OneView. Check credentials and/or CA certificate file. "
                  "See details on error below:\n")
         raise ex
+    _oneview_client_stats['logins'] += 1
+    _oneview_sessions[client] = time.time()
     return client
 
 
+def get_oneview_client():
+    """Get the OneView Client shared by the process.
+
+    The client is created and logged in on the first call. Later calls
+    reuse the same authenticated client instead of logging in again.
+
+    :returns: the shared OneView Client;
+    """
+    global _oneview_client
+    with _oneview_client_lock:
+        if _oneview_client is None:
+            _oneview_client = _create_oneview_client()
+        else:
+            _oneview_client_stats['reuses'] += 1
+        return _oneview_client
+
+
+def reset_oneview_client():
+    """Drop the shared OneView Client.
+
+    The next call to get_oneview_client creates and logs in a new client.
+    """
+    global _oneview_client
+    with _oneview_client_lock:
+        _oneview_client = None
+
+
+def get_oneview_client_stats():
+    """Get how many logins and client reuses happened in this process.
+
+    :returns: a dict with the 'logins' and 'reuses' counters;
+    """
+    with _oneview_client_lock:
+        return dict(_oneview_client_stats)
+
+
+def reauthenticate(oneview_client, rejected_since=None):
+    """Log in again, replacing the session token of the client.
+
+    Renewals are serialized. The token is kept if another caller renewed
+    it meanwhile: by default, once it is no longer expiring, or, for a
+    token OneView rejected, once it was issued after the rejected request
+    was sent.
+
+    :param oneview_client: a instance of the OneView Client;
+    :param rejected_since: the time the request rejected by OneView was
+        sent, if any;
+    """
+    with _oneview_reauth_lock:
+        if rejected_since is None:
+            if not is_session_expiring(oneview_client):
+                return
+        elif _oneview_sessions.get(oneview_client, 0) > rejected_since:
+            return
+        LOG.debug("Reauthenticating to OneView.")
+        oneview_conf = get_oneview_conf()
+        oneview_client.connection.login(oneview_conf["credentials"])
+        with _oneview_client_lock:
+            _oneview_client_stats['logins'] += 1
+        _oneview_sessions[oneview_client] = time.time()
+
+
+def is_session_expiring(oneview_client):
+    """Verify if the session token of the client is about to expire.
+
+    A client whose login time is unknown is assumed to have just logged in.
+
+    :param oneview_client: a instance of the OneView Client;
+    :returns: True if the token should be renewed before being used;
+    """
+    issued_at = _oneview_sessions.get(oneview_client)
+    if issued_at is None:
+        _oneview_sessions[oneview_client] = time.time()
+        return False
+
+    lifetime = (CONF.oneview.session_timeout -
+                CONF.oneview.session_refresh_margin)
+    return time.time() - issued_at >= lifetime
+
+
+def is_unauthorized_error(error):
+    """Verify if a OneView error was caused by an invalid session."""
+    oneview_response = getattr(error, 'oneview_response', None)
+    if not isinstance(oneview_response, dict):
+        return False
+    return oneview_response.get('errorCode') in UNAUTHORIZED_ERROR_CODES
+
+
+def is_etag_mismatch_error(error):
+    """Verify if a OneView error was caused by an outdated If-Match."""
+    oneview_response = getattr(error, 'oneview_response', None)
+    if not isinstance(oneview_response, dict):
+        return False
+    return oneview_response.get('errorCode') in ETAG_MISMATCH_ERROR_CODES
+
+
+def is_unsupported_operation_error(error):
+    """Verify if a OneView error was caused by an unsupported request."""
+    oneview_response = getattr(error, 'oneview_response', None)
+    if not isinstance(oneview_response, dict):
+        return False
+    return (oneview_response.get('errorCode') in
+            UNSUPPORTED_OPERATION_ERROR_CODES)
+
+
+def is_online_update_unsupported_error(error):
+    """Verify if OneView refused to update a powered on server."""
+    oneview_response = getattr(error, 'oneview_response', None)
+    if not isinstance(oneview_response, dict):
+        return False
+    return (oneview_response.get('errorCode') in
+            ONLINE_UPDATE_UNSUPPORTED_ERROR_CODES)
+
+
+def is_transient_error(error):
+    """Verify if a OneView error may not happen again on a retry.
+
+    An error without a OneView response, such as a connection failure,
+    is considered transient.
+    """
+    oneview_response = getattr(error, 'oneview_response', None)
+    if not isinstance(oneview_response, dict):
+        return True
+    return oneview_response.get('errorCode') in TRANSIENT_ERROR_CODES
+
+
+def update_if_match(oneview_client, resource):
+    """PUT a OneView resource unless it changed since it was read.
+
+    The ETag of the resource is sent as If-Match, so OneView rejects the
+    update if another client updated the resource in the meantime.
+
+    :param oneview_client: a instance of the OneView Client;
+    :param resource: the resource read from OneView, then modified;
+    :raises HPOneViewException: recognized by is_etag_mismatch_error if
+        the resource changed;
+    """
+    custom_headers = None
+    if resource.get('eTag'):
+        custom_headers = {'If-Match': resource.get('eTag')}
+    task, _ = oneview_client.connection.put(
+        resource.get('uri'), resource, custom_headers=custom_headers)
+    if task:
+        TaskMonitor(oneview_client.connection).wait_for_task(task)
+
+
 def oneview_reauth(f):
+    """Keep the OneView session of the decorated method valid.
+
+    The session token is renewed ahead of its expiry. If OneView still
+    rejects the session, the method is retried once with a new token.
+    """
+    @functools.wraps(f)
     def wrapper(self, *args, **kwargs):
+        if is_session_expiring(self.oneview_client):
+            reauthenticate(self.oneview_client)
+        sent_at = time.time()
         try:
-            self.oneview_client.connection.get('/rest/logindomains')
-        except oneview_exceptions.HPOneViewException:
-            LOG.debug("Reauthenticating to OneView.")
-            oneview_conf = get_oneview_conf()
-            self.oneview_client.connection.login(oneview_conf["credentials"])
-        return f(self, *args, **kwargs)
+            return f(self, *args, **kwargs)
+        except oneview_exceptions.HPOneViewException as err:
+            if not is_unauthorized_error(err):
+                raise
+            LOG.info("OneView session was rejected, retrying with a new "
+                     "session.")
+            reauthenticate(self.oneview_client, rejected_since=sent_at)
+            return f(self, *args, **kwargs)
     return wrapper
 
 
@@ -264,10 +469,52 @@ def load_conf_option_to_dict(key_value_option):
     return key_value_dict
 
 
+def load_vlan_pool_ranges(vlan_pool_ranges):
+    """Convert the vlan_pool_ranges value to a dict.
+
+    :param vlan_pool_ranges: A string with the ranges, in the format
+        physical_network:vlan_min:vlan_max;
+    :returns: a dict of physical network to the set of its VLAN ids;
+    :raise ClientException: If a range is not valid;
+    """
+    vlans_by_physical_network = {}
+    if not vlan_pool_ranges:
+        return vlans_by_physical_network
+
+    for vlan_pool_range in vlan_pool_ranges.split(','):
+        try:
+            physical_network, vlan_min, vlan_max = (
+                vlan_pool_range.strip().split(':'))
+            vlan_min, vlan_max = int(vlan_min), int(vlan_max)
+        except ValueError:
+            vlan_min = vlan_max = None
+        if vlan_min is None or not 1 <= vlan_min <= vlan_max <= 4094:
+            raise exceptions.ClientException(
+                "Invalid VLAN pool range: %s" % vlan_pool_range)
+        vlans_by_physical_network.setdefault(physical_network, set()).update(
+            range(vlan_min, vlan_max + 1))
+
+    return vlans_by_physical_network
+
+
 def network_uri_from_id(network_id):
     return ETHERNET_NETWORK_PREFIX + network_id
 
 
+def bulk_network_name_prefix(physical_network):
+    """Get the prefix of the networks created in bulk for a physnet.
+
+    OneView names the networks of a bulk creation as <prefix>_<vlan_id>.
+    Since Neutron allocates each VLAN once per physical network, the name
+    of such a network is unique.
+    """
+    return BULK_NETWORK_NAME_PREFIX % physical_network
+
+
+def bulk_network_name(physical_network, vlan_id):
+    return "%s_%s" % (bulk_network_name_prefix(physical_network), vlan_id)
+
+
 def network_dict_for_network_creation(
         physical_network, network_type, neutron_net_id, segmentation_id=None):
     return {
@@ -366,11 +613,8 @@ def server_hardware_from_local_link_information_list(
     :param local_link_information_list: an list of local link information;
     :return: server_hardware;
     """
-    switch_info = local_link_information_list[0].get('switch_info')
-    if isinstance(switch_info, six.text_type):
-        switch_info = jsonutils.loads(switch_info)
-
-    server_hardware_id = switch_info.get('server_hardware_id')
+    server_hardware_id = server_hardware_id_from_local_link_information_list(
+        local_link_information_list)
     server_hardware = oneview_client.server_hardware.get(
         server_hardware_id
     )
@@ -378,6 +622,18 @@ def server_hardware_from_local_link_information_list(
     return server_hardware
 
 
+def server_hardware_id_from_local_link_information_list(
+        local_link_information_list):
+    """Get the Server Hardware id from Local Link Information.
+
+    :param local_link_information_list: an list of local link information;
+    :return: the server hardware id;
+    """
+    switch_info = switch_info_from_local_link_information_list(
+        local_link_information_list)
+    return switch_info.get('server_hardware_id')
+
+
 def switch_info_from_local_link_information_list(local_link_information_list):
     """Get the switch_info from Local Link Information.
 
@@ -450,6 +706,127 @@ def get_server_hardware_power_state(server_hardware):
     return server_hardware.get('powerState')
 
 
+def is_server_hardware_powered_off(server_hardware):
+    return get_server_hardware_power_state(server_hardware) == POWER_STATE_OFF
+
+
+def _connection_key(connection):
+    return (connection.get('id'), connection.get('portId'),
+            connection.get('mac'))
+
+
+def _connection_without_network(connection):
+    return dict((key, value) for key, value in connection.items()
+                if key != 'networkUri')
+
+
+def is_online_connection_update(
+        server_hardware, previous_connections, connections):
+    """Verify if a connection update can be applied to a powered on server.
+
+    OneView changes the network of existing connections without powering
+    the server off when its adapters support it. Adding or removing
+    connections, or changing anything but the network, requires it off.
+
+    :param server_hardware: the server hardware of the profile;
+    :param previous_connections: the connections before the update;
+    :param connections: the connections after the update;
+    :returns: True if the update can be tried with the server on;
+    """
+    if not CONF.DEFAULT.online_connection_update:
+        return False
+    if (_online_update_key(server_hardware) in
+            _offline_server_hardware_types):
+        return False
+    if len(previous_connections) != len(connections):
+        return False
+
+    previous_by_key = dict(
+        (_connection_key(connection), connection)
+        for connection in previous_connections)
+    for connection in connections:
+        previous_connection = previous_by_key.get(_connection_key(connection))
+        if previous_connection is None:
+            return False
+        if (_connection_without_network(previous_connection) !=
+                _connection_without_network(connection)):
+            return False
+    return True
+
+
+def disable_online_connection_update(server_hardware):
+    """Stop trying online connection updates on a server hardware type."""
+    _offline_server_hardware_types.add(_online_update_key(server_hardware))
+
+
+def _online_update_key(server_hardware):
+    return (server_hardware.get('serverHardwareTypeUri') or
+            server_hardware.get('uri'))
+
+
+def connections_patch(previous_connections, connections):
+    """Compute the JSON Patch operations between two connection lists.
+
+    Removed connections are removed by index, from the last one, so the
+    indexes of the remaining ones stay valid. Changed fields of the kept
+    connections are replaced, and new connections are appended. If the
+    kept connections were reordered, the whole list is replaced.
+
+    :param previous_connections: the connections of the server profile;
+    :param connections: the new connections;
+    :returns: a list of JSON Patch operations, empty if nothing changed;
+    """
+    keys = set(_connection_key(connection) for connection in connections)
+    operations = []
+    kept_connections = []
+    for index in reversed(range(len(previous_connections))):
+        connection = previous_connections[index]
+        if _connection_key(connection) in keys:
+            kept_connections.insert(0, connection)
+        else:
+            operations.append(
+                {'op': 'remove', 'path': '/connections/%d' % index})
+
+    kept_keys = [_connection_key(connection)
+                 for connection in kept_connections]
+    new_kept_keys = [_connection_key(connection)
+                     for connection in connections
+                     if _connection_key(connection) in set(kept_keys)]
+    if kept_keys != new_kept_keys:
+        return [{'op': 'replace', 'path': '/connections',
+                 'value': connections}]
+
+    kept_indexes = dict((key, index) for index, key in enumerate(kept_keys))
+    for connection in connections:
+        index = kept_indexes.get(_connection_key(connection))
+        if index is None:
+            operations.append(
+                {'op': 'add', 'path': '/connections/-', 'value': connection})
+            continue
+        previous_connection = kept_connections[index]
+        for field in sorted(set(previous_connection) | set(connection)):
+            if field not in connection:
+                operations.append({
+                    'op': 'remove',
+                    'path': '/connections/%d/%s' % (index, field)})
+            elif previous_connection.get(field) != connection.get(field):
+                operations.append({
+                    'op': 'replace',
+                    'path': '/connections/%d/%s' % (index, field),
+                    'value': connection.get(field)})
+    return operations
+
+
+def is_server_profile_patch_supported():
+    return (CONF.DEFAULT.server_profile_patch and
+            _server_profile_patch_state['supported'])
+
+
+def disable_server_profile_patch():
+    """Stop trying to PATCH server profiles."""
+    _server_profile_patch_state['supported'] = False
+
+
 def is_lig_id_uplink_name_mapped(lig_bd_entry, mappings):
     mapped_lig_id = lig_bd_entry.get('oneview_lig_id')
     mapped_uplink_name = lig_bd_entry.get('oneview_uplinkset_name')
@@ -820,8 +1197,73 @@ def delete_outdated_flat_mapped_networks(flat_net_mappings):
             session, oneview_network_id=uuid)
 
 
-def get_database_session():
+def _create_database_engine():
     connection = CONF.database.connection
-    Session = sessionmaker(bind=create_engine(connection),
-                           autocommit=True)
+    engine_args = {'pool_recycle': CONF.DEFAULT.db_pool_recycle}
+    if not connection.startswith('sqlite'):
+        engine_args.update({
+            'pool_size': CONF.DEFAULT.db_pool_size,
+            'max_overflow': CONF.DEFAULT.db_max_overflow,
+            'pool_timeout': CONF.DEFAULT.db_pool_timeout,
+        })
+    LOG.debug("Creating the Networking OneView database engine.")
+    engine = create_engine(connection, **engine_args)
+
+    def on_connect(dbapi_connection, connection_record):
+        _database_pool_stats['connects'] += 1
+
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        _database_pool_stats['checkouts'] += 1
+        pool_size = getattr(engine.pool, 'size', None)
+        checked_out = getattr(engine.pool, 'checkedout', None)
+        if pool_size and checked_out and checked_out() > pool_size():
+            _database_pool_stats['waits'] += 1
+
+    def on_checkin(dbapi_connection, connection_record):
+        _database_pool_stats['checkins'] += 1
+
+    event.listen(engine, 'connect', on_connect)
+    event.listen(engine, 'checkout', on_checkout)
+    event.listen(engine, 'checkin', on_checkin)
+    return engine
+
+
+def get_database_engine():
+    """Get the database engine shared by the process.
+
+    The engine is created on the first call, so every session shares the
+    same connection pool.
+
+    :returns: the shared SQLAlchemy engine;
+    """
+    global _database_engine
+    with _database_engine_lock:
+        if _database_engine is None:
+            _database_engine = _create_database_engine()
+        return _database_engine
+
+
+def reset_database_engine():
+    """Dispose the shared database engine and its connection pool."""
+    global _database_engine
+    with _database_engine_lock:
+        if _database_engine is not None:
+            _database_engine.dispose()
+        _database_engine = None
+
+
+def get_database_pool_stats():
+    """Get the connection pool counters of the shared database engine.
+
+    'waits' counts the checkouts made while every pooled connection was
+    already in use, which had to overflow the pool or wait for a checkin.
+
+    :returns: a dict with the 'connects', 'checkouts', 'checkins' and
+        'waits' counters;
+    """
+    return dict(_database_pool_stats)
+
+
+def get_database_session():
+    Session = sessionmaker(bind=get_database_engine(), autocommit=True)
     return Session()
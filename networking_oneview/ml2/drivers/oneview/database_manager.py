@@ -13,6 +13,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import datetime
+
 from neutron.db.models_v2 import Network
 from neutron.db.models_v2 import Port
 try:
@@ -20,10 +22,28 @@ try:
 except ImportError:
     from neutron.db.segments_db import NetworkSegment
 from neutron.plugins.ml2.models import PortBinding
+from oslo_serialization import jsonutils
+import sqlalchemy as sa
+from sqlalchemy import exc as sa_exc
 
+from networking_oneview.db.oneview_network_db import OneviewBulkNetwork
 from networking_oneview.db.oneview_network_db import (
     OneviewLogicalInterconnectGroup)
 from networking_oneview.db.oneview_network_db import NeutronOneviewNetwork
+from networking_oneview.db.oneview_network_db import OneviewJournal
+from networking_oneview.db.oneview_network_db import OneviewNetworkPool
+from networking_oneview.db.oneview_network_db import OneviewSyncCheckpoint
+from networking_oneview.db.oneview_network_db import OneviewSyncLease
+from networking_oneview.db.oneview_network_db import OneviewSyncMember
+
+JOURNAL_PENDING = 'pending'
+JOURNAL_PROCESSING = 'processing'
+JOURNAL_FAILED = 'failed'
+
+JOURNAL_NETWORK = 'network'
+JOURNAL_PORT = 'port'
+JOURNAL_CREATE = 'create'
+JOURNAL_DELETE = 'delete'
 
 
 # Neutron Network
@@ -57,6 +77,21 @@ def list_networks_and_segments_with_physnet(session):
             NetworkSegment.physical_network.isnot(None)).all()
 
 
+def list_networks_and_segments_with_oneview_network(session):
+    """List the networks with a physnet, their segment and OneView mapping.
+
+    The mapping to a OneView network is None for networks not mapped yet.
+    """
+    with session.begin(subtransactions=True):
+        return session.query(
+            Network, NetworkSegment, NeutronOneviewNetwork).outerjoin(
+                NeutronOneviewNetwork,
+                NeutronOneviewNetwork.neutron_network_id == Network.id
+        ).filter(
+            Network.id == NetworkSegment.network_id,
+            NetworkSegment.physical_network.isnot(None)).all()
+
+
 def get_neutron_network_with_segment(session, network_id):
     with session.begin(subtransactions=True):
         return session.query(Network, NetworkSegment).filter(
@@ -152,3 +187,348 @@ def delete_oneview_network_lig(session, **kwargs):
     with session.begin(subtransactions=True):
         session.query(OneviewLogicalInterconnectGroup).filter_by(
             **kwargs).delete()
+
+
+# OneView Network Pool
+def list_network_pool(session, **kwargs):
+    with session.begin(subtransactions=True):
+        return session.query(OneviewNetworkPool).filter_by(**kwargs).all()
+
+
+def insert_network_pool_entries(session, physical_network, oneview_networks):
+    """Add networks created ahead of time to the pool.
+
+    The VLANs already in the pool, such as the ones added concurrently by
+    another process, are skipped.
+
+    :param session: a database session;
+    :param physical_network: the physical network of the networks;
+    :param oneview_networks: a dict of VLAN id to OneView network id;
+    :returns: the number of networks added;
+    """
+    pooled_vlans = set(
+        entry.vlan_id for entry
+        in list_network_pool(session, physical_network=physical_network))
+    added = 0
+    for vlan_id, oneview_network_id in sorted(oneview_networks.items()):
+        if vlan_id in pooled_vlans:
+            continue
+        try:
+            with session.begin(subtransactions=True):
+                session.add(OneviewNetworkPool(
+                    physical_network, vlan_id, oneview_network_id))
+        except sa_exc.IntegrityError:
+            # Another process added the VLAN first.
+            continue
+        added += 1
+    return added
+
+
+def claim_network_pool_entry(session, physical_network, vlan_id,
+                             neutron_network_id, mappings):
+    """Map a Neutron network to the free pool network of its VLAN.
+
+    :param session: a database session;
+    :param physical_network: the physical network of the Neutron network;
+    :param vlan_id: the VLAN of the Neutron network;
+    :param neutron_network_id: the id of the Neutron network;
+    :param mappings: the LIG ids and uplinkset names of the network;
+    :returns: the id of the claimed OneView network, or None if the pool
+        has no free network for the VLAN;
+    """
+    with session.begin(subtransactions=True):
+        entry = session.query(OneviewNetworkPool).filter_by(
+            physical_network=physical_network, vlan_id=vlan_id,
+            neutron_network_id=None).first()
+        if entry is None:
+            return None
+        claimed = session.query(OneviewNetworkPool).filter_by(
+            physical_network=physical_network, vlan_id=vlan_id,
+            neutron_network_id=None).update(
+                {'neutron_network_id': neutron_network_id},
+                synchronize_session=False)
+        if not claimed:
+            return None
+        map_neutron_network_to_oneview(
+            session, neutron_network_id, entry.oneview_network_id, True,
+            mappings)
+        return entry.oneview_network_id
+
+
+def release_network_pool_entry(session, oneview_network_id):
+    """Return a network to the pool.
+
+    :returns: True if the network belongs to the pool;
+    """
+    with session.begin(subtransactions=True):
+        return bool(session.query(OneviewNetworkPool).filter_by(
+            oneview_network_id=oneview_network_id).update(
+                {'neutron_network_id': None}, synchronize_session=False))
+
+
+def delete_network_pool_entry(session, oneview_network_id,
+                              unclaimed_only=True):
+    """Remove a network from the pool.
+
+    :param session: a database session;
+    :param oneview_network_id: the id of the OneView network;
+    :param unclaimed_only: if set, a network mapped to a Neutron network
+        is kept;
+    :returns: True if the network was removed;
+    """
+    query = session.query(OneviewNetworkPool).filter_by(
+        oneview_network_id=oneview_network_id)
+    if unclaimed_only:
+        query = query.filter_by(neutron_network_id=None)
+    with session.begin(subtransactions=True):
+        return bool(query.delete(synchronize_session=False))
+
+
+# OneView Bulk Network
+def list_oneview_bulk_networks(session, **kwargs):
+    with session.begin(subtransactions=True):
+        return session.query(OneviewBulkNetwork).filter_by(**kwargs).all()
+
+
+def insert_oneview_bulk_networks(session, physical_network,
+                                 oneview_network_ids):
+    """Record the networks created in bulk by the driver.
+
+    Only the recorded networks are deleted by the synchronization once
+    they are no longer mapped to a Neutron network.
+    """
+    with session.begin(subtransactions=True):
+        for oneview_network_id in oneview_network_ids:
+            session.add(OneviewBulkNetwork(
+                oneview_network_id, physical_network))
+
+
+def delete_oneview_bulk_network(session, oneview_network_id):
+    with session.begin(subtransactions=True):
+        session.query(OneviewBulkNetwork).filter_by(
+            oneview_network_id=oneview_network_id).delete()
+
+
+# OneView Journal
+def insert_journal_entry(session, object_type, object_uuid, operation, data):
+    with session.begin(subtransactions=True):
+        entry = OneviewJournal(
+            object_type, object_uuid, operation, data, JOURNAL_PENDING,
+            datetime.datetime.utcnow())
+        session.add(entry)
+        return entry
+
+
+def list_journal_entries(session, **kwargs):
+    with session.begin(subtransactions=True):
+        return session.query(OneviewJournal).filter_by(
+            **kwargs).order_by(OneviewJournal.id).all()
+
+
+def claim_journal_entries(session, limit):
+    """Mark the oldest pending journal entries as being processed.
+
+    An entry is skipped while an older entry of the same object is still
+    pending or processing, so the operations of an object run in order.
+    A port entry also waits behind the older entries of its network, and
+    a network deletion behind the older entries of its ports, so a port
+    is never reflected before its network is created or after it is
+    deleted. Entries claimed concurrently by another worker are skipped
+    as well.
+
+    :param session: a database session;
+    :param limit: maximum number of entries to claim;
+    :returns: the claimed entries, oldest first;
+    """
+    claimed = []
+    with session.begin(subtransactions=True):
+        entries = session.query(OneviewJournal).filter(
+            OneviewJournal.state.in_(
+                [JOURNAL_PENDING, JOURNAL_PROCESSING])).order_by(
+            OneviewJournal.id).all()
+        blocked_objects = set()
+        networks_with_ports = set()
+        for entry in entries:
+            if len(claimed) >= limit:
+                break
+            network_id = _journal_entry_network_id(entry)
+            blocked = (
+                entry.state == JOURNAL_PROCESSING or
+                entry.object_uuid in blocked_objects or
+                network_id in blocked_objects or
+                (entry.object_type == JOURNAL_NETWORK and
+                 entry.operation == JOURNAL_DELETE and
+                 network_id in networks_with_ports))
+            blocked_objects.add(entry.object_uuid)
+            if entry.object_type == JOURNAL_PORT:
+                networks_with_ports.add(network_id)
+            if blocked:
+                continue
+            updated = session.query(OneviewJournal).filter_by(
+                id=entry.id, state=JOURNAL_PENDING).update({
+                    'state': JOURNAL_PROCESSING,
+                    'updated_at': datetime.datetime.utcnow()
+                }, synchronize_session=False)
+            if updated:
+                claimed.append(entry)
+    return claimed
+
+
+def _journal_entry_network_id(entry):
+    """Get the id of the Neutron network of a network or port entry."""
+    if entry.object_type == JOURNAL_PORT:
+        return jsonutils.loads(entry.data).get('network_id')
+    return entry.object_uuid
+
+
+def update_journal_entry(session, entry_id, state, last_error=None,
+                         retry_count=None):
+    values = {'state': state, 'updated_at': datetime.datetime.utcnow()}
+    if last_error is not None:
+        values['last_error'] = last_error
+    if retry_count is not None:
+        values['retry_count'] = retry_count
+    with session.begin(subtransactions=True):
+        session.query(OneviewJournal).filter_by(id=entry_id).update(
+            values, synchronize_session=False)
+
+
+def delete_journal_entry(session, entry_id):
+    with session.begin(subtransactions=True):
+        session.query(OneviewJournal).filter_by(id=entry_id).delete()
+
+
+def delete_pending_journal_entry(session, entry_id):
+    """Delete a journal entry unless a worker has already claimed it.
+
+    :returns: True if the entry was deleted;
+    """
+    with session.begin(subtransactions=True):
+        return bool(session.query(OneviewJournal).filter_by(
+            id=entry_id, state=JOURNAL_PENDING).delete(
+                synchronize_session=False))
+
+
+def reset_stale_journal_entries(session, timeout):
+    """Make entries left processing by a dead worker pending again."""
+    stale_time = datetime.datetime.utcnow() - datetime.timedelta(
+        seconds=timeout)
+    with session.begin(subtransactions=True):
+        return session.query(OneviewJournal).filter(
+            OneviewJournal.state == JOURNAL_PROCESSING,
+            OneviewJournal.updated_at < stale_time).update({
+                'state': JOURNAL_PENDING,
+                'updated_at': datetime.datetime.utcnow()
+            }, synchronize_session=False)
+
+
+# OneView Sync Checkpoint
+def list_sync_checkpoints(session):
+    with session.begin(subtransactions=True):
+        return session.query(OneviewSyncCheckpoint).all()
+
+
+def set_sync_checkpoints(session, checkpoints, outdated_resource_uris=()):
+    """Store the checkpoints of the resources found in sync.
+
+    :param session: a database session;
+    :param checkpoints: a dict of resource URI to a (neutron_state,
+        oneview_etag) tuple;
+    :param outdated_resource_uris: the URIs whose checkpoint is dropped;
+    """
+    updated_at = datetime.datetime.utcnow()
+    with session.begin(subtransactions=True):
+        if outdated_resource_uris:
+            session.query(OneviewSyncCheckpoint).filter(
+                OneviewSyncCheckpoint.resource_uri.in_(
+                    list(outdated_resource_uris))).delete(
+                        synchronize_session=False)
+        for resource_uri, (neutron_state, oneview_etag) in (
+                checkpoints.items()):
+            updated = session.query(OneviewSyncCheckpoint).filter_by(
+                resource_uri=resource_uri).update({
+                    'neutron_state': neutron_state,
+                    'oneview_etag': oneview_etag,
+                    'updated_at': updated_at
+                }, synchronize_session=False)
+            if not updated:
+                session.add(OneviewSyncCheckpoint(
+                    resource_uri, neutron_state, oneview_etag, updated_at))
+
+
+# OneView Sync Lease
+def acquire_sync_lease(session, name, holder, duration):
+    """Take a lease, or renew it, unless another holder has it.
+
+    :param session: a database session;
+    :param name: the name of the lease;
+    :param holder: an id unique to the process taking the lease;
+    :param duration: the seconds the lease lasts unless renewed;
+    :returns: True if the holder has the lease;
+    """
+    now = datetime.datetime.utcnow()
+    expires_at = now + datetime.timedelta(seconds=duration)
+    try:
+        with session.begin(subtransactions=True):
+            updated = session.query(OneviewSyncLease).filter(
+                OneviewSyncLease.name == name,
+                sa.or_(OneviewSyncLease.holder == holder,
+                       OneviewSyncLease.expires_at < now)).update({
+                           'holder': holder,
+                           'expires_at': expires_at
+                       }, synchronize_session=False)
+            if updated:
+                return True
+            if session.query(OneviewSyncLease).filter_by(name=name).first():
+                return False
+            session.add(OneviewSyncLease(name, holder, expires_at))
+    except sa_exc.IntegrityError:
+        # Another process created the lease first.
+        return False
+    return True
+
+
+def release_sync_lease(session, name, holder):
+    with session.begin(subtransactions=True):
+        session.query(OneviewSyncLease).filter_by(
+            name=name, holder=holder).delete(synchronize_session=False)
+
+
+# OneView Sync Member
+def heartbeat_sync_member(session, member_id, timeout):
+    """Record that a member of the synchronization is alive.
+
+    The members whose last heartbeat is older than the timeout are
+    removed.
+
+    :param session: a database session;
+    :param member_id: an id unique to the process of the member;
+    :param timeout: the seconds a member is alive after its heartbeat;
+    """
+    now = datetime.datetime.utcnow()
+    with session.begin(subtransactions=True):
+        session.query(OneviewSyncMember).filter(
+            OneviewSyncMember.heartbeat_at <
+            now - datetime.timedelta(seconds=timeout)).delete(
+                synchronize_session=False)
+        updated = session.query(OneviewSyncMember).filter_by(
+            member_id=member_id).update(
+                {'heartbeat_at': now}, synchronize_session=False)
+        if not updated:
+            session.add(OneviewSyncMember(member_id, now))
+
+
+def list_sync_members(session, timeout):
+    """List the ids of the members alive within the timeout."""
+    alive_since = datetime.datetime.utcnow() - datetime.timedelta(
+        seconds=timeout)
+    with session.begin(subtransactions=True):
+        return [member.member_id for member in session.query(
+            OneviewSyncMember).filter(
+                OneviewSyncMember.heartbeat_at >= alive_since)]
+
+
+def delete_sync_member(session, member_id):
+    with session.begin(subtransactions=True):
+        session.query(OneviewSyncMember).filter_by(
+            member_id=member_id).delete(synchronize_session=False)
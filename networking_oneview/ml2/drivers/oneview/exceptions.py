@@ -28,3 +28,7 @@ class OneViewResourceNotFoundException(ClientException):
 
 class NetworkCreationException(ClientException):
     """The Network was unable to be created."""
+
+
+class NetworkNotReflectedException(ClientException):
+    """The Network is not reflected on OneView yet."""
@@ -0,0 +1,101 @@
+# Copyright (2016-2018) Hewlett Packard Enterprise Development LP.
+# Copyright (2016-2018) Universidade Federal de Campina Grande
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import eventlet
+from eventlet import event
+from oslo_log import log
+
+LOG = log.getLogger(__name__)
+
+
+class Task(object):
+    """A callable submitted to a SyncExecutor.
+
+    The task runs once every task it depends on is over. It is not run
+    if any of them failed, and it fails with the same error instead. The
+    previous task of the same key is only waited for, since a failed
+    update of a resource does not prevent the next one.
+    """
+    def __init__(self, func, dependencies, previous_task=None):
+        self.func = func
+        self.dependencies = dependencies
+        self.previous_task = previous_task
+        self.error = None
+        self._done = event.Event()
+
+    def wait(self):
+        self._done.wait()
+
+    def run(self):
+        try:
+            if self.previous_task is not None:
+                self.previous_task.wait()
+            for dependency in self.dependencies:
+                dependency.wait()
+                if dependency.error is not None:
+                    self.error = dependency.error
+                    return
+            try:
+                self.func()
+            except Exception as err:
+                LOG.error("Synchronization task %(task)s failed: %(err)s", {
+                    'task': self.func, 'err': err})
+                self.error = err
+        finally:
+            self._done.send()
+
+
+class SyncExecutor(object):
+    """Run the synchronization tasks in a bounded pool of green threads.
+
+    Tasks sharing a key run one at a time, in the order they were
+    submitted, so two updates of the same OneView resource never race.
+    Tasks may also depend on tasks submitted before them. Since a task
+    only waits for earlier tasks, and tasks are started in the order
+    they are submitted, a full pool always has a task able to progress.
+    """
+    def __init__(self, max_workers):
+        self._pool = eventlet.GreenPool(max_workers)
+        self._last_task_by_key = {}
+        self._tasks = []
+
+    def submit(self, func, key=None, depends_on=()):
+        """Submit a callable to the pool.
+
+        :param func: the callable to run, without arguments;
+        :param key: the resource the callable updates, if any;
+        :param depends_on: the tasks that must be over before it runs;
+        :returns: the submitted Task;
+        """
+        task = Task(func, list(depends_on),
+                    self._last_task_by_key.get(key))
+        if key is not None:
+            self._last_task_by_key[key] = task
+        self._tasks.append(task)
+        self._pool.spawn_n(task.run)
+        return task
+
+    def wait(self):
+        """Wait for every submitted task.
+
+        :raises: the error of the first submitted task that failed, so
+            callers such as common.oneview_reauth still see it;
+        """
+        self._pool.waitall()
+        tasks, self._tasks = self._tasks, []
+        self._last_task_by_key = {}
+        for task in tasks:
+            if task.error is not None:
+                raise task.error
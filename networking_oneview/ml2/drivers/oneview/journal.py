@@ -0,0 +1,203 @@
+# Copyright (2016-2018) Hewlett Packard Enterprise Development LP.
+# Copyright (2016-2018) Universidade Federal de Campina Grande
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from oslo_log import log
+from oslo_serialization import jsonutils
+from oslo_service import loopingcall
+
+from networking_oneview.conf import CONF
+from networking_oneview.ml2.drivers.oneview import common
+from networking_oneview.ml2.drivers.oneview import database_manager
+from networking_oneview.ml2.drivers.oneview import exceptions
+
+LOG = log.getLogger(__name__)
+
+NETWORK = database_manager.JOURNAL_NETWORK
+PORT = database_manager.JOURNAL_PORT
+CREATE = database_manager.JOURNAL_CREATE
+DELETE = database_manager.JOURNAL_DELETE
+
+
+def record(session, object_type, operation, resource_dict):
+    """Record an operation to be reflected on OneView by the workers.
+
+    The operation is coalesced with the pending operations of the same
+    object, see _coalesce.
+
+    :param session: a database session;
+    :param object_type: the type of the Neutron resource, NETWORK or PORT;
+    :param operation: the operation on the resource, CREATE or DELETE;
+    :param resource_dict: the Neutron resource dict;
+    """
+    object_uuid = resource_dict.get('id')
+    with session.begin(subtransactions=True):
+        if _coalesce(session, object_type, object_uuid, operation):
+            LOG.debug("%(operation)s of %(type)s %(id)s cancelled a "
+                      "pending operation.", {
+                          'operation': operation, 'type': object_type,
+                          'id': object_uuid})
+            return
+        database_manager.insert_journal_entry(
+            session, object_type, object_uuid, operation,
+            jsonutils.dumps(resource_dict))
+    LOG.debug("Journaled %(operation)s of %(type)s %(id)s.", {
+        'operation': operation, 'type': object_type, 'id': object_uuid})
+
+
+def _coalesce(session, object_type, object_uuid, operation):
+    """Drop the pending creations superseded by a new operation.
+
+    Any new operation on an object replaces its pending creations, so
+    repeated port bindings only reflect the last one on OneView. Entries
+    already claimed by a worker are left untouched.
+
+    :returns: True if the new operation has nothing left to do, which is
+        the case of a network deleted before its creation was processed;
+    """
+    pending_entries = database_manager.list_journal_entries(
+        session, object_uuid=object_uuid,
+        state=database_manager.JOURNAL_PENDING)
+    cancelled = [
+        entry for entry in pending_entries
+        if entry.operation == CREATE and
+        database_manager.delete_pending_journal_entry(session, entry.id)]
+    return bool(
+        cancelled and object_type == NETWORK and operation == DELETE)
+
+
+class Journal(object):
+    def __init__(self, oneview_client, neutron_oneview_client):
+        self.oneview_client = oneview_client
+        self.neutron_client = neutron_oneview_client
+
+    def start(self):
+        for _ in range(CONF.DEFAULT.journal_workers):
+            worker = loopingcall.FixedIntervalLoopingCall(self.process)
+            worker.start(
+                interval=CONF.DEFAULT.journal_interval,
+                initial_delay=0,
+                stop_on_exception=False)
+
+    def process(self):
+        """Process the pending journal entries.
+
+        Entries are claimed until the journal is empty. A batch holds a
+        single entry per object, so a failure does not keep the other
+        entries of the batch from being processed. The run stops after a
+        batch with a failure, leaving the failed entries for the next run.
+        """
+        session = common.get_database_session()
+        database_manager.reset_stale_journal_entries(
+            session, CONF.DEFAULT.journal_processing_timeout)
+        while True:
+            entries = database_manager.claim_journal_entries(
+                session, CONF.DEFAULT.journal_batch_size)
+            if not entries:
+                return
+            succeeded = [
+                self._process_entries(session, entry_group)
+                for entry_group in self._group_entries(entries)]
+            if not all(succeeded):
+                return
+
+    def _group_entries(self, entries):
+        """Group consecutive network creations to be done in bulk."""
+        groups = []
+        for entry in entries:
+            if (groups and self._is_network_creation(entry) and
+                    self._is_network_creation(groups[-1][-1])):
+                groups[-1].append(entry)
+            else:
+                groups.append([entry])
+        return groups
+
+    def _is_network_creation(self, entry):
+        return entry.object_type == NETWORK and entry.operation == CREATE
+
+    def _process_entries(self, session, entries):
+        try:
+            self._dispatch(session, entries)
+        except Exception as err:
+            LOG.exception("Failed to process journal entries %s.",
+                          [entry.id for entry in entries])
+            for entry in entries:
+                retry_count = entry.retry_count + 1
+                state = database_manager.JOURNAL_PENDING
+                if retry_count > CONF.DEFAULT.journal_max_retries:
+                    state = database_manager.JOURNAL_FAILED
+                    LOG.error("Giving up on journal entry %(id)s: "
+                              "%(operation)s of %(type)s %(uuid)s.", {
+                                  'id': entry.id,
+                                  'operation': entry.operation,
+                                  'type': entry.object_type,
+                                  'uuid': entry.object_uuid})
+                database_manager.update_journal_entry(
+                    session, entry.id, state, last_error=str(err),
+                    retry_count=retry_count)
+            return False
+
+        for entry in entries:
+            database_manager.delete_journal_entry(session, entry.id)
+        return True
+
+    @common.oneview_reauth
+    def _dispatch(self, session, entries):
+        resource_dicts = [jsonutils.loads(entry.data) for entry in entries]
+        if len(entries) > 1:
+            self.neutron_client.network.create_bulk(session, resource_dicts)
+            return
+
+        entry = entries[0]
+        if entry.object_type == NETWORK and entry.operation == CREATE:
+            self.neutron_client.network.create(session, resource_dicts[0])
+        elif entry.object_type == NETWORK and entry.operation == DELETE:
+            self.neutron_client.network.delete(session, resource_dicts[0])
+        elif entry.object_type == PORT and entry.operation == CREATE:
+            self._check_port_network(session, resource_dicts[0])
+            self.neutron_client.port.create(session, resource_dicts[0])
+        elif entry.object_type == PORT and entry.operation == DELETE:
+            self._check_port_network(session, resource_dicts[0])
+            self.neutron_client.port.delete(session, resource_dicts[0])
+        else:
+            LOG.warning("Unknown journal operation %(operation)s of "
+                        "%(type)s.", {'operation': entry.operation,
+                                      'type': entry.object_type})
+
+    def _check_port_network(self, session, port_dict):
+        """Check that the managed network of a port is on OneView.
+
+        The port manager skips a port whose network has no OneView
+        network, which would drop a journaled port whose network has not
+        been reflected yet; the entry is retried instead.
+
+        :raises: NetworkNotReflectedException if the network of the port
+            is managed by the driver but has no OneView network;
+        """
+        if port_dict.get('binding:vnic_type') != 'baremetal':
+            return
+        network_id = port_dict.get('network_id')
+        network_segment = database_manager.get_network_segment(
+            session, network_id)
+        if not network_segment:
+            return
+        if not self.neutron_client.port.is_uplinkset_mapping(
+                network_segment.get('physical_network'),
+                network_segment.get('network_type')):
+            return
+        if not database_manager.get_neutron_oneview_network(
+                session, network_id):
+            raise exceptions.NetworkNotReflectedException(
+                "The network %s of the port %s has no OneView network." % (
+                    network_id, port_dict.get('id')))
@@ -0,0 +1,86 @@
+# Copyright (2016-2018) Hewlett Packard Enterprise Development LP.
+# Copyright (2016-2018) Universidade Federal de Campina Grande
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+import socket
+import time
+
+from oslo_log import log
+from oslo_service import loopingcall
+from oslo_utils import uuidutils
+
+from networking_oneview.ml2.drivers.oneview import common
+from networking_oneview.ml2.drivers.oneview import database_manager
+
+LOG = log.getLogger(__name__)
+
+
+class Lease(object):
+    """A lease held by a single process of all the Neutron servers.
+
+    The lease is stored in the database and renewed every third of its
+    duration while the process lives, so another process takes it over
+    at most a duration after its holder dies. The clocks of the Neutron
+    servers are assumed to be synchronized.
+    """
+
+    def __init__(self, name, duration):
+        self.name = name
+        self.duration = duration
+        self.holder = '%s:%s:%s' % (
+            socket.gethostname(), os.getpid(), uuidutils.generate_uuid())
+        self._held_until = 0
+        self._heartbeat = None
+
+    def start(self):
+        self._heartbeat = loopingcall.FixedIntervalLoopingCall(self.acquire)
+        self._heartbeat.start(
+            interval=max(1, self.duration // 3),
+            initial_delay=0,
+            stop_on_exception=False)
+
+    def acquire(self):
+        """Take the lease or renew it.
+
+        :returns: True if this process holds the lease;
+        """
+        requested_at = time.time()
+        try:
+            held = database_manager.acquire_sync_lease(
+                common.get_database_session(), self.name, self.holder,
+                self.duration)
+        except Exception as err:
+            LOG.warning("Failed to renew the %(name)s lease: %(err)s", {
+                'name': self.name, 'err': err})
+            held = False
+
+        if held and not self.is_held():
+            LOG.info("This process now holds the %s lease.", self.name)
+        elif not held and self.is_held():
+            LOG.info("This process no longer holds the %s lease.",
+                     self.name)
+        self._held_until = requested_at + self.duration if held else 0
+        return held
+
+    def is_held(self):
+        return time.time() < self._held_until
+
+    def release(self):
+        if self._heartbeat is not None:
+            self._heartbeat.stop()
+            self._heartbeat = None
+        self._held_until = 0
+        database_manager.release_sync_lease(
+            common.get_database_session(), self.name, self.holder)
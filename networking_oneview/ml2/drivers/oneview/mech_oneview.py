@@ -25,11 +25,16 @@ except ImportError:
 
 from networking_oneview.conf import CONF
 from networking_oneview.ml2.drivers.oneview import common
+from networking_oneview.ml2.drivers.oneview import journal
 from networking_oneview.ml2.drivers.oneview import neutron_oneview_client
+from networking_oneview.ml2.drivers.oneview import scmb
 from networking_oneview.ml2.drivers.oneview import synchronization
 
 LOG = log.getLogger(__name__)
 
+UNBOUND_VIF_TYPES = (portbindings.VIF_TYPE_UNBOUND,
+                     portbindings.VIF_TYPE_BINDING_FAILED)
+
 
 class OneViewDriver(api.MechanismDriver):
     def __init__(self):
@@ -52,20 +57,35 @@ class OneViewDriver(api.MechanismDriver):
         )
 
     def initialize(self):
-        common.delete_outdated_flat_mapped_networks(self.flat_net_mappings)
-        sync = synchronization.Synchronization(
-            oneview_client=self.oneview_client,
-            neutron_oneview_client=self.neutron_oneview_client,
-            flat_net_mappings=self.flat_net_mappings
-        )
-        sync.start()
+        if CONF.DEFAULT.sync_in_neutron_server:
+            common.delete_outdated_flat_mapped_networks(
+                self.flat_net_mappings)
+            sync = synchronization.Synchronization(
+                oneview_client=self.oneview_client,
+                neutron_oneview_client=self.neutron_oneview_client,
+                flat_net_mappings=self.flat_net_mappings
+            )
+            sync.start()
+            if CONF.oneview.scmb_enabled:
+                scmb.SCMBListener(sync).start()
+        if CONF.DEFAULT.journal_enabled:
+            journal.Journal(
+                oneview_client=self.oneview_client,
+                neutron_oneview_client=self.neutron_oneview_client
+            ).start()
 
     @common.oneview_reauth
     def bind_port(self, context):
-        """Bind baremetal port to a network."""
-        session = common.session_from_context(context)
-        port_dict = common.port_from_context(context)
-        self.neutron_oneview_client.port.create(session, port_dict)
+        """Bind baremetal port to a network.
+
+        With the journal, the port is recorded by update_port_postcommit
+        once ML2 commits the binding, since a binding may be attempted
+        several times or dropped.
+        """
+        if not CONF.DEFAULT.journal_enabled:
+            self.neutron_oneview_client.port.create(
+                common.session_from_context(context),
+                common.port_from_context(context))
 
         port = context.current
         vif_type = portbindings.VIF_TYPE_OTHER
@@ -90,6 +110,11 @@ class OneViewDriver(api.MechanismDriver):
         session = common.session_from_context(context)
         network_dict = common.network_from_context(context)
 
+        if CONF.DEFAULT.journal_enabled:
+            journal.record(
+                session, journal.NETWORK, journal.CREATE, network_dict)
+            return
+
         self.neutron_oneview_client.network.create(session, network_dict)
 
     @common.oneview_reauth
@@ -97,15 +122,51 @@ class OneViewDriver(api.MechanismDriver):
         session = common.session_from_context(context)
         network_dict = common.network_from_context(context)
 
+        if CONF.DEFAULT.journal_enabled:
+            journal.record(
+                session, journal.NETWORK, journal.DELETE, network_dict)
+            return
+
         self.neutron_oneview_client.network.delete(session, network_dict)
 
     @common.oneview_reauth
     def create_port_postcommit(self, context):
         pass
 
+    @common.oneview_reauth
+    def update_port_postcommit(self, context):
+        """Journal the creation of a port whose binding was committed.
+
+        Only a new binding, or a binding of a changed profile, is
+        recorded. A pending creation of the port is replaced, see
+        journal.record.
+        """
+        if not CONF.DEFAULT.journal_enabled:
+            return
+        port = context.current
+        original_port = context.original or {}
+        if not _is_bound(port):
+            return
+        if (_is_bound(original_port) and
+                port.get(portbindings.PROFILE) ==
+                original_port.get(portbindings.PROFILE)):
+            return
+        journal.record(
+            common.session_from_context(context), journal.PORT,
+            journal.CREATE, common.port_from_context(context))
+
     @common.oneview_reauth
     def delete_port_postcommit(self, context):
         session = common.session_from_context(context)
         port_dict = common.port_from_context(context)
 
+        if CONF.DEFAULT.journal_enabled:
+            journal.record(session, journal.PORT, journal.DELETE, port_dict)
+            return
+
         self.neutron_oneview_client.port.delete(session, port_dict)
+
+
+def _is_bound(port):
+    vif_type = port.get(portbindings.VIF_TYPE)
+    return bool(vif_type) and vif_type not in UNBOUND_VIF_TYPES
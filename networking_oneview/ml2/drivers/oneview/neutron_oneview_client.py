@@ -14,19 +14,56 @@
 #    under the License.
 
 import abc
+import copy
+import functools
 import six
+import threading
+import time
 
 from oslo_log import log
 from oslo_utils import importutils
 
+from networking_oneview.conf import CONF
 from networking_oneview.ml2.drivers.oneview import common
 from networking_oneview.ml2.drivers.oneview import database_manager
+from networking_oneview.ml2.drivers.oneview import executor
 from networking_oneview.ml2.drivers.oneview import exceptions
 
 LOG = log.getLogger(__name__)
 
 oneview_exceptions = importutils.try_import('hpOneView.exceptions')
 
+_lig_locks = {}
+_lig_locks_lock = threading.Lock()
+
+
+def _lig_lock(lig_id):
+    """Get the lock serializing the updates of a LIG in this process."""
+    with _lig_locks_lock:
+        return _lig_locks.setdefault(lig_id, threading.Lock())
+
+
+def _change_lig_networks(lig, additions, removals):
+    """Add and remove network URIs in the uplinksets of a LIG.
+
+    :returns: True if any network URI was added or removed;
+    """
+    lig_uplinksets = lig.get('uplinkSets')
+    changed = False
+    for uplinkset_name in set(additions) | set(removals):
+        uplinkset = common.get_uplinkset_by_name_from_list(
+            lig_uplinksets, uplinkset_name)
+        network_uris = uplinkset['networkUris']
+        for network_uri in additions.get(uplinkset_name, ()):
+            if network_uri not in network_uris:
+                network_uris.append(network_uri)
+                changed = True
+        for network_uri in removals.get(uplinkset_name, ()):
+            if network_uri in network_uris:
+                network_uris.remove(network_uri)
+                changed = True
+    return changed
+
 
 @six.add_metaclass(abc.ABCMeta)
 class ResourceManager(object):
@@ -67,6 +104,90 @@ class ResourceManager(object):
             configuration, server_hardware_id
         )
 
+    def update_server_profile(
+            self, server_hardware, server_profile, previous_connections):
+        """Update a server profile, power cycling the server only if needed.
+
+        Nothing is done if the connections did not change. The server is
+        not power cycled if it is already off or if the update can be
+        applied online. An online update rejected because the server is
+        on disables online updates for its hardware type; session and
+        transient errors are raised without power cycling the server.
+
+        :param server_hardware: the server hardware of the profile;
+        :param server_profile: the server profile with the new connections;
+        :param previous_connections: the connections before the update;
+        :returns: True if the server profile was updated;
+        """
+        connections = server_profile.get('connections')
+        operations = common.connections_patch(
+            previous_connections, connections)
+        if not operations:
+            LOG.debug("The connections of the server profile %s did not "
+                      "change.", server_profile.get('uri'))
+            return False
+
+        if common.is_server_hardware_powered_off(server_hardware):
+            self._send_server_profile(server_profile, operations)
+            return True
+
+        if common.is_online_connection_update(
+                server_hardware, previous_connections, connections):
+            try:
+                self._send_server_profile(server_profile, operations)
+                return True
+            except oneview_exceptions.HPOneViewException as err:
+                if (common.is_unauthorized_error(err) or
+                        common.is_transient_error(err)):
+                    raise
+                LOG.info("Online connection update of the server profile "
+                         "%(uri)s failed, power cycling the server: %(err)s",
+                         {'uri': server_profile.get('uri'), 'err': err})
+                if common.is_online_update_unsupported_error(err):
+                    common.disable_online_connection_update(server_hardware)
+
+        previous_power_state = common.get_server_hardware_power_state(
+            server_hardware
+        )
+        self.update_server_hardware_power_state(
+            server_hardware, common.POWER_STATE_OFF)
+        self._send_server_profile(server_profile, operations)
+        self.update_server_hardware_power_state(
+            server_hardware, previous_power_state
+        )
+        return True
+
+    def _send_server_profile(self, server_profile, operations):
+        """Send the connection changes of a server profile to OneView.
+
+        OneView applies a single operation per PATCH, so several
+        operations are sent as one replacement of the connections. The
+        whole server profile is PUT from then on if OneView does not
+        support the PATCH; any other error is raised.
+        """
+        if common.is_server_profile_patch_supported():
+            operation = operations[0]
+            if len(operations) > 1:
+                operation = {'op': 'replace', 'path': '/connections',
+                             'value': server_profile.get('connections')}
+            try:
+                self.oneview_client.server_profiles.patch(
+                    server_profile.get('uri'), operation.get('op'),
+                    operation.get('path'), operation.get('value'))
+                return
+            except oneview_exceptions.HPOneViewException as err:
+                if not common.is_unsupported_operation_error(err):
+                    raise
+                LOG.info("OneView rejected the PATCH of the server profile "
+                         "%(uri)s, using PUT from now on: %(err)s",
+                         {'uri': server_profile.get('uri'), 'err': err})
+                common.disable_server_profile_patch()
+
+        self.oneview_client.server_profiles.update(
+            resource=server_profile,
+            id_or_uri=server_profile.get('uri')
+        )
+
 
 class Network(ResourceManager):
     NEUTRON_NET_TYPE_TO_ONEVIEW_NET_TYPE = {
@@ -75,6 +196,12 @@ class Network(ResourceManager):
         'flat': 'untagged',
     }
 
+    def __init__(self, oneview_client, uplinkset_mappings, flat_net_mappings):
+        super(Network, self).__init__(
+            oneview_client, uplinkset_mappings, flat_net_mappings)
+        self.vlan_pool = common.load_vlan_pool_ranges(
+            CONF.DEFAULT.vlan_pool_ranges)
+
     def create(self, session, network_dict):
         network_id = network_dict.get('id')
         network_seg_id = network_dict.get('provider:segmentation_id')
@@ -100,12 +227,16 @@ class Network(ResourceManager):
                 "The network: %s type is not supported.", network_id)
             return
 
+        if (mapping_type == common.UPLINKSET_MAPPINGS_TYPE and
+                self._claim_pool_network(session, network_dict)):
+            return
+
         mappings = []
         oneview_network_id = None
         if mapping_type == common.UPLINKSET_MAPPINGS_TYPE:
             network_type = 'tagged' if network_seg_id else 'untagged'
             oneview_network = self._create_network_on_oneview(
-                name="Neutron [" + network_id + "]",
+                name=common.NEUTRON_NETWORK_NAME % network_id,
                 network_type=network_type.capitalize(), seg_id=network_seg_id)
             oneview_network_id = common.id_from_uri(oneview_network.get('uri'))
             try:
@@ -126,6 +257,181 @@ class Network(ResourceManager):
 
         LOG.info("Network %s created.", network_id)
 
+    def create_bulk(self, session, network_dicts):
+        """Create several networks, in bulk when possible.
+
+        Tagged networks of the same physical network are created with a
+        single OneView bulk request and added to their LIGs and uplinksets
+        with one update per LIG. Any other network is created on its own.
+
+        :param session: a database session;
+        :param network_dicts: a list of Neutron network dicts;
+        """
+        vlan_networks = {}
+        for network_dict in network_dicts:
+            physical_network = network_dict.get('provider:physical_network')
+            network_type = network_dict.get('provider:network_type')
+            mapping_type = self._get_network_mapping_type(
+                physical_network, network_type)
+            if (mapping_type == common.UPLINKSET_MAPPINGS_TYPE and
+                    network_dict.get('provider:segmentation_id') and
+                    not database_manager.get_neutron_oneview_network(
+                        session, network_dict.get('id'))):
+                if not self._claim_pool_network(session, network_dict):
+                    vlan_networks.setdefault(physical_network, []).append(
+                        network_dict)
+            else:
+                self.create(session, network_dict)
+
+        for physical_network, physnet_networks in vlan_networks.items():
+            if len(physnet_networks) == 1:
+                self.create(session, physnet_networks[0])
+            else:
+                self._create_vlan_networks(
+                    session, physical_network, physnet_networks)
+
+    def _create_vlan_networks(self, session, physical_network, network_dicts):
+        networks_by_vlan = dict(
+            (int(network_dict.get('provider:segmentation_id')), network_dict)
+            for network_dict in network_dicts)
+        oneview_networks, lig_list = self._provision_vlan_networks(
+            session, physical_network, networks_by_vlan)
+
+        for vlan_id, network_dict in networks_by_vlan.items():
+            oneview_network = oneview_networks.get(vlan_id)
+            if not oneview_network:
+                LOG.warning("OneView did not create the network for VLAN "
+                            "%s.", vlan_id)
+                continue
+            database_manager.map_neutron_network_to_oneview(
+                session, network_dict.get('id'),
+                common.id_from_uri(oneview_network.get('uri')), True,
+                lig_list)
+            LOG.info("Network %s created.", network_dict.get('id'))
+
+    def _provision_vlan_networks(self, session, physical_network, vlan_ids):
+        """Get or create in bulk the networks of VLANs, in the mapped LIGs.
+
+        The created networks are recorded, so the synchronization tells
+        them apart from the networks of the same name it did not create.
+
+        :param session: a database session;
+        :param physical_network: the physical network of the VLANs;
+        :param vlan_ids: the VLAN ids;
+        :returns: a tuple of a dict of VLAN id to OneView network and the
+            LIG ids and uplinkset names of the physical network;
+        :raise NetworkCreationException: If the networks could not be
+            added to the LIGs, after the created ones are deleted;
+        """
+        name_prefix = common.bulk_network_name_prefix(physical_network)
+        vlan_id_range = ','.join(
+            str(vlan_id) for vlan_id in sorted(vlan_ids))
+
+        oneview_networks = self._index_bulk_networks(
+            physical_network,
+            self.oneview_client.ethernet_networks.get_range(
+                name_prefix, vlan_id_range))
+        missing_vlans = [vlan_id for vlan_id in sorted(vlan_ids)
+                         if vlan_id not in oneview_networks]
+        created_networks = {}
+        if missing_vlans:
+            created_networks = self._index_bulk_networks(
+                physical_network,
+                self.oneview_client.ethernet_networks.create_bulk({
+                    'vlanIdRange': ','.join(
+                        str(vlan_id) for vlan_id in missing_vlans),
+                    'namePrefix': name_prefix,
+                    'purpose': 'General',
+                    'smartLink': False,
+                    'privateNetwork': False,
+                    'bandwidth': common.BULK_NETWORK_BANDWIDTH,
+                }))
+            oneview_networks.update(created_networks)
+            database_manager.insert_oneview_bulk_networks(
+                session, physical_network, [
+                    common.id_from_uri(network.get('uri'))
+                    for network in created_networks.values()])
+
+        network_type = common.NETWORK_TYPE_TAGGED
+        lig_list = self._get_lig_list(physical_network, network_type)
+        try:
+            self._add_networks_to_ligs(
+                network_type, lig_list,
+                [network.get('uri') for network in oneview_networks.values()])
+        except Exception:
+            LOG.warning("Bulk network creation failed, deleting OneView "
+                        "Networks: %s", list(created_networks.values()))
+            for network in created_networks.values():
+                self.oneview_client.ethernet_networks.delete(network)
+                database_manager.delete_oneview_bulk_network(
+                    session, common.id_from_uri(network.get('uri')))
+            raise exceptions.NetworkCreationException()
+        return oneview_networks, lig_list
+
+    def _claim_pool_network(self, session, network_dict):
+        """Map a VLAN network to the network of the pool for its VLAN.
+
+        :returns: True if the network was mapped to a network of the pool;
+        """
+        physical_network = network_dict.get('provider:physical_network')
+        vlan_id = network_dict.get('provider:segmentation_id')
+        if not vlan_id or int(vlan_id) not in self.vlan_pool.get(
+                physical_network, ()):
+            return False
+        oneview_network_id = database_manager.claim_network_pool_entry(
+            session, physical_network, int(vlan_id), network_dict.get('id'),
+            self._get_lig_list(physical_network, common.NETWORK_TYPE_TAGGED))
+        if oneview_network_id is None:
+            return False
+        LOG.info("Network %(network_id)s mapped to the pool network "
+                 "%(oneview_network_id)s.", {
+                     'network_id': network_dict.get('id'),
+                     'oneview_network_id': oneview_network_id})
+        return True
+
+    def fill_pool(self, session, physical_network, vlan_ids):
+        """Create the networks of VLANs in OneView and add them to the pool.
+
+        :param session: a database session;
+        :param physical_network: the physical network of the VLANs;
+        :param vlan_ids: the VLAN ids missing from the pool;
+        """
+        oneview_networks, _ = self._provision_vlan_networks(
+            session, physical_network, vlan_ids)
+        added = database_manager.insert_network_pool_entries(
+            session, physical_network, dict(
+                (vlan_id, common.id_from_uri(oneview_network.get('uri')))
+                for vlan_id, oneview_network in oneview_networks.items()))
+        LOG.info("Added %(count)s networks of %(physical_network)s to the "
+                 "pool.", {'count': added,
+                           'physical_network': physical_network})
+
+    def drain_pool(self, session, oneview_network_ids):
+        """Delete networks of the pool no longer in vlan_pool_ranges.
+
+        :param session: a database session;
+        :param oneview_network_ids: the ids of the unclaimed networks;
+        """
+        for oneview_network_id in oneview_network_ids:
+            if database_manager.delete_network_pool_entry(
+                    session, oneview_network_id):
+                self.oneview_client.ethernet_networks.delete(
+                    oneview_network_id)
+                database_manager.delete_oneview_bulk_network(
+                    session, oneview_network_id)
+
+    def _index_bulk_networks(self, physical_network, oneview_networks):
+        """Index bulk created networks of a physnet by their VLAN id."""
+        networks_by_vlan = {}
+        for network in oneview_networks or []:
+            vlan_id = network.get('vlanId')
+            if vlan_id is None:
+                continue
+            if network.get('name') == common.bulk_network_name(
+                    physical_network, vlan_id):
+                networks_by_vlan[int(vlan_id)] = network
+        return networks_by_vlan
+
     def _get_network_mapping_type(self, physical_network, network_type):
         physnet_in_uplinkset_mapping = self._is_physnet_in_uplinkset_mapping(
             physical_network, network_type
@@ -194,29 +500,39 @@ class Network(ResourceManager):
         self._add_network_to_uplink_sets(uplinksets_list, oneview_net_uri)
         return lig_list
 
+    def _add_networks_to_ligs(self, network_type, lig_list, network_uris):
+        """Add several networks to the mapped LIGs and their uplinksets.
+
+        Every LIG is updated once for the whole list of networks.
+        """
+        lig_list = lig_list or []
+        lig_additions = {}
+        uplinkset_additions = {}
+        for lig_id, uplinkset_name in zip(lig_list[0::2], lig_list[1::2]):
+            lig_additions.setdefault(lig_id, {}).setdefault(
+                uplinkset_name, set()).update(network_uris)
+            uplinkset_additions.setdefault(
+                (network_type, lig_id, uplinkset_name), set()).update(
+                    network_uris)
+
+        for lig_id, additions in lig_additions.items():
+            self._update_lig_networks(lig_id, additions, {})
+        self._update_uplinkset_networks(uplinkset_additions, {})
+
     def _add_network_to_logical_interconnect_group(
             self, uplinkset_mappings, network_uri):
         for lig_id, uplinkset_name in zip(
                 uplinkset_mappings[0::2], uplinkset_mappings[1::2]):
-            logical_interconnect_group = (
-                common.get_logical_interconnect_group_by_id(lig_id)
-            )
-            lig_uplinksets = logical_interconnect_group.get('uplinkSets')
-            lig_uri = logical_interconnect_group.get('uri')
-            uplinkset = common.get_uplinkset_by_name_from_list(
-                lig_uplinksets, uplinkset_name)
-            if network_uri not in uplinkset['networkUris']:
-                try:
-                    uplinkset['networkUris'].append(network_uri)
-                    self.oneview_client.logical_interconnect_groups.update(
-                        logical_interconnect_group)
-                except oneview_exceptions.HPOneViewException as err:
-                    LOG.error("Driver couldn't add network %(network_uri)s to "
-                              "Logical Interconnect Group: %(lig_uri)s. "
-                              "%(error)s" % {'network_uri': network_uri,
-                                             'lig_uri': lig_uri,
-                                             'error': err})
-                    raise err
+            try:
+                self._update_lig_networks(
+                    lig_id, {uplinkset_name: set([network_uri])}, {})
+            except oneview_exceptions.HPOneViewException as err:
+                LOG.error("Driver couldn't add network %(network_uri)s to "
+                          "Logical Interconnect Group: %(lig_id)s. "
+                          "%(error)s" % {'network_uri': network_uri,
+                                         'lig_id': lig_id,
+                                         'error': err})
+                raise err
 
     def _add_network_to_uplink_sets(self, uplinkset_list, network_uri):
         for uplinkset in uplinkset_list:
@@ -243,7 +559,15 @@ class Network(ResourceManager):
 
         oneview_network_id = neutron_oneview_network.oneview_network_id
         if neutron_oneview_network.manageable:
-            self.oneview_client.ethernet_networks.delete(oneview_network_id)
+            if database_manager.release_network_pool_entry(
+                    session, oneview_network_id):
+                LOG.info("Network %s returned to the pool.",
+                         oneview_network_id)
+            else:
+                self.oneview_client.ethernet_networks.delete(
+                    oneview_network_id)
+                database_manager.delete_oneview_bulk_network(
+                    session, oneview_network_id)
 
         database_manager.delete_neutron_oneview_network(
             session, neutron_network_id=network_id
@@ -253,6 +577,14 @@ class Network(ResourceManager):
         )
         LOG.info("Network %s deleted", oneview_network_id)
 
+    def is_lig_mapped(self, lig_id, network_type, physical_network):
+        """Check if the networks of a physical network belong in a LIG."""
+        network_type = self.NEUTRON_NET_TYPE_TO_ONEVIEW_NET_TYPE.get(
+            network_type)
+        mappings = self.uplinkset_mappings.get(network_type, {}).get(
+            physical_network) or []
+        return lig_id in mappings[0::2]
+
     def update_network_lig(
             self, session, oneview_network_id, network_type, physical_network):
         network_type = self.NEUTRON_NET_TYPE_TO_ONEVIEW_NET_TYPE.get(
@@ -277,7 +609,7 @@ class Network(ResourceManager):
                         'oneview_uplinkset_name'))
         self._add_to_ligs(
             network_type, physical_network,
-            self.oneview_client.ethernet_networks.get(oneview_network_id))
+            common.network_uri_from_id(oneview_network_id))
         for lig_id, uplinkset_name in zip(mappings[0::2], mappings[1::2]):
             network_mapped = database_manager.get_oneview_network_lig(
                 session,
@@ -289,19 +621,146 @@ class Network(ResourceManager):
                     session, oneview_network_id, lig_id, uplinkset_name
                 )
 
+    def update_network_ligs(self, session, networks, owns_lig=None):
+        """Reconcile the LIG membership of several networks at once.
+
+        The network URIs to add to and remove from every (LIG, uplinkset)
+        pair are computed first, so each LIG is fetched once and updated
+        at most once, no matter how many networks it carries. Distinct
+        LIGs are updated concurrently, up to sync_workers at a time. The
+        database only records the new membership once OneView was updated,
+        so a failed update is reconciled again by the next synchronization.
+
+        :param session: a database session;
+        :param networks: a list of (oneview_network_id, network_type,
+            physical_network) tuples;
+        :param owns_lig: a callable telling if a LIG id is reconciled by
+            this process, by default every LIG is;
+        """
+        lig_additions = {}
+        lig_removals = {}
+        uplinkset_additions = {}
+        uplinkset_removals = {}
+        db_removals = []
+        db_additions = []
+        mapped_ligs = {}
+        for lig_bd_entry in database_manager.list_oneview_network_lig(
+                session):
+            mapped_ligs.setdefault(
+                lig_bd_entry.oneview_network_id, []).append(lig_bd_entry)
+
+        for oneview_network_id, network_type, physical_network in networks:
+            network_type = self.NEUTRON_NET_TYPE_TO_ONEVIEW_NET_TYPE.get(
+                network_type)
+            network_uri = common.network_uri_from_id(oneview_network_id)
+            mappings = self.uplinkset_mappings.get(network_type).get(
+                physical_network) or []
+            mapped_pairs = set(zip(mappings[0::2], mappings[1::2]))
+
+            for lig_bd_entry in mapped_ligs.get(oneview_network_id, []):
+                pair = (lig_bd_entry.oneview_lig_id,
+                        lig_bd_entry.oneview_uplinkset_name)
+                if pair in mapped_pairs:
+                    mapped_pairs.discard(pair)
+                    continue
+                if owns_lig is not None and not owns_lig(pair[0]):
+                    continue
+                lig_removals.setdefault(pair[0], {}).setdefault(
+                    pair[1], set()).add(network_uri)
+                uplinkset_removals.setdefault(
+                    (network_type,) + pair, set()).add(network_uri)
+                db_removals.append((oneview_network_id,) + pair)
+
+            for lig_id, uplinkset_name in zip(mappings[0::2], mappings[1::2]):
+                if owns_lig is not None and not owns_lig(lig_id):
+                    continue
+                lig_additions.setdefault(lig_id, {}).setdefault(
+                    uplinkset_name, set()).add(network_uri)
+                uplinkset_additions.setdefault(
+                    (network_type, lig_id, uplinkset_name), set()).add(
+                        network_uri)
+                if (lig_id, uplinkset_name) in mapped_pairs:
+                    db_additions.append(
+                        (oneview_network_id, lig_id, uplinkset_name))
+
+        lig_updates = executor.SyncExecutor(CONF.DEFAULT.sync_workers)
+        for lig_id in set(lig_additions) | set(lig_removals):
+            lig_updates.submit(functools.partial(
+                self._update_lig_networks, lig_id,
+                lig_additions.get(lig_id, {}), lig_removals.get(lig_id, {})),
+                key=lig_id)
+        lig_updates.wait()
+        self._update_uplinkset_networks(
+            uplinkset_additions, uplinkset_removals)
+
+        for oneview_network_id, lig_id, uplinkset_name in db_removals:
+            database_manager.delete_oneview_network_lig(
+                session, oneview_network_id=oneview_network_id,
+                oneview_lig_id=lig_id, oneview_uplinkset_name=uplinkset_name)
+        for oneview_network_id, lig_id, uplinkset_name in db_additions:
+            database_manager.insert_oneview_network_lig(
+                session, oneview_network_id, lig_id, uplinkset_name)
+
+    def _update_lig_networks(self, lig_id, additions, removals):
+        """Add and remove network URIs in the uplinksets of a single LIG.
+
+        :param lig_id: the id of the Logical Interconnect Group;
+        :param additions: a dict of uplinkset name to the URIs to add;
+        :param removals: a dict of uplinkset name to the URIs to remove;
+        :returns: True if the LIG had to be updated in OneView;
+        """
+        # The updates of this process are serialized, and the ones of other
+        # processes are detected by the ETag of the LIG. The changes are
+        # then applied to the LIG read again, so neither one is lost.
+        with _lig_lock(lig_id):
+            attempt = 0
+            while True:
+                lig = self.oneview_client.logical_interconnect_groups.get(
+                    lig_id)
+                if not _change_lig_networks(lig, additions, removals):
+                    return False
+                try:
+                    common.update_if_match(self.oneview_client, lig)
+                    return True
+                except oneview_exceptions.HPOneViewException as err:
+                    if (not common.is_etag_mismatch_error(err) or
+                            attempt >= CONF.DEFAULT.lig_update_retries):
+                        raise
+                attempt += 1
+                LOG.info("Logical Interconnect Group %s changed while being "
+                         "updated, merging the changes.", lig_id)
+
+    def _update_uplinkset_networks(self, additions, removals):
+        """Update the uplinksets of the Logical Interconnects of the LIGs.
+
+        :param additions: a dict of (network_type, lig_id, uplinkset_name)
+            to the network URIs to add;
+        :param removals: a dict of (network_type, lig_id, uplinkset_name)
+            to the network URIs to remove;
+        """
+        for key in set(additions) | set(removals):
+            network_type, lig_id, uplinkset_name = key
+            for uplinkset in self._get_uplinksets_from_lig(
+                    network_type, [lig_id, uplinkset_name]):
+                network_uris = uplinkset.get('networkUris')
+                to_add = [
+                    network_uri for network_uri in additions.get(key, ())
+                    if network_uri not in network_uris]
+                to_remove = [
+                    network_uri for network_uri in removals.get(key, ())
+                    if network_uri in network_uris]
+                if to_add:
+                    self.oneview_client.uplink_sets.add_ethernet_networks(
+                        uplinkset.get('uri'), to_add)
+                if to_remove:
+                    self.oneview_client.uplink_sets.remove_ethernet_networks(
+                        uplinkset.get('uri'), to_remove)
+
     def _remove_network_from_lig_and_lis(
             self, network_id, lig_id, uplinkset_name, network_type):
         mapping = [lig_id, uplinkset_name]
-        lig = self.oneview_client.logical_interconnect_groups.get(lig_id)
-        lig_uplinksets = lig.get('uplinkSets')
-        uplinkset = common.get_uplinkset_by_name_from_list(
-            lig_uplinksets, uplinkset_name
-        )
-        uplinkset['networkUris'].remove(
-            '/rest/ethernet-networks/' + network_id)
-        self.oneview_client.logical_interconnect_groups.update(
-            lig
-        )
+        self._update_lig_networks(lig_id, {}, {
+            uplinkset_name: set([common.network_uri_from_id(network_id)])})
         uplinksets_list = self._get_uplinksets_from_lig(network_type, mapping)
         uplinksets_uri_list = (
             uplinkset.get('uri') for uplinkset in uplinksets_list)
@@ -319,6 +778,11 @@ class Network(ResourceManager):
 
 
 class Port(ResourceManager):
+    def __init__(self, oneview_client, uplinkset_mappings, flat_net_mappings):
+        super(Port, self).__init__(
+            oneview_client, uplinkset_mappings, flat_net_mappings)
+        self.batcher = ConnectionBatcher()
+
     def create(self, session, port_dict):
         network_id = port_dict.get('network_id')
         neutron_port_id = port_dict.get('id')
@@ -350,52 +814,53 @@ class Port(ResourceManager):
         server_hardware = (
             common.server_hardware_from_local_link_information_list(
                 self.oneview_client, local_link_information_list))
-        server_profile = common.server_profile_from_server_hardware(
-            self.oneview_client, server_hardware
-        )
-        if server_profile:
-            LOG.info("There is Server Profile %s available.", server_profile)
-
-            mac_address = port_dict.get('mac_address')
-            if common.is_rack_server(server_hardware):
-                LOG.warning("The server hardware %s is a rack server.",
-                            server_hardware.get('uuid'))
-                return
+        if common.is_rack_server(server_hardware):
+            LOG.warning("The server hardware %s is a rack server.",
+                        server_hardware.get('uuid'))
+            return
 
-            port_id = common.port_id_from_mac(server_hardware, mac_address)
-            connections = server_profile.get('connections')
-            existing_connections = [connection for connection in connections
-                                    if connection.get('portId') == port_id]
-            switch_info = common.switch_info_from_local_link_information_list(
-                local_link_information_list)
-            bootable = switch_info.get('bootable')
-            boot_priority = common.get_boot_priority(server_profile, bootable)
-
-            if not boot_priority:
-                LOG.warning("The server profile: %s already has PXE primary "
-                            "and secondary bootable connections." %
-                            server_profile.get('uuid'))
-                return
+        switch_info = common.switch_info_from_local_link_information_list(
+            local_link_information_list)
+        self.batcher.submit(
+            server_hardware, functools.partial(
+                self.add_connection, port_dict.get('mac_address'),
+                network_uri, switch_info.get('bootable')),
+            self._apply_connection_changes)
+
+    def add_connection(self, mac_address, network_uri, bootable,
+                       server_hardware, server_profile):
+        """Add or update the connection of a port in a server profile.
+
+        Only the server profile dict is changed, it is up to the caller to
+        update it on OneView.
+        """
+        port_id = common.port_id_from_mac(server_hardware, mac_address)
+        connections = server_profile.get('connections')
+        existing_connections = [connection for connection in connections
+                                if connection.get('portId') == port_id]
+        boot_priority = common.get_boot_priority(server_profile, bootable)
+
+        if not boot_priority:
+            LOG.warning("The server profile: %s already has PXE primary "
+                        "and secondary bootable connections." %
+                        server_profile.get('uuid'))
+            return
 
-            create_new_connection = True
-            for connection in existing_connections:
-                if connection.get('mac').upper() == mac_address.upper():
-                    connection['networkUri'] = network_uri
-                    create_new_connection = False
-            if create_new_connection:
-                server_profile['connections'].append({
-                    'name': "NeutronPort[%s]" % mac_address,
-                    'portId': port_id,
-                    'networkUri': network_uri,
-                    'boot': {'priority': boot_priority},
-                    'functionType': 'Ethernet'
-                })
-
-            common.check_oneview_entities_availability(
-                self.oneview_client, server_hardware)
-            self._update_oneview_entities(server_hardware, server_profile)
-            LOG.info("The requested connection %s was updated/created.",
-                     port_id)
+        create_new_connection = True
+        for connection in existing_connections:
+            if connection.get('mac').upper() == mac_address.upper():
+                connection['networkUri'] = network_uri
+                create_new_connection = False
+        if create_new_connection:
+            server_profile['connections'].append({
+                'name': "NeutronPort[%s]" % mac_address,
+                'portId': port_id,
+                'networkUri': network_uri,
+                'boot': {'priority': boot_priority},
+                'functionType': 'Ethernet'
+            })
+        LOG.info("The requested connection %s was updated/created.",
+                 port_id)
 
     def delete(self, session, port_dict):
         local_link_information_list = common.local_link_information_from_port(
@@ -417,37 +882,119 @@ class Port(ResourceManager):
                         server_hardware.get('uuid'))
             return
 
+        self.batcher.submit(
+            server_hardware, functools.partial(
+                self._remove_connection, port_dict.get('mac_address')),
+            self._apply_connection_changes)
+
+    def _remove_connection(self, mac_address, server_hardware,
+                           server_profile):
+        connection = common.connection_with_mac_address(
+            server_profile.get('connections'), mac_address
+        )
+        if connection:
+            LOG.debug("There is Connection %s available.", connection)
+            server_profile.get('connections').remove(connection)
+            LOG.info("The requested port was deleted successfully.")
+        else:
+            LOG.debug("There is no Connection available.")
+
+    def _apply_connection_changes(self, server_hardware, changes):
+        """Apply connection changes with one server profile update.
+
+        :param server_hardware: the server hardware of the profile;
+        :param changes: callables changing the connections of the server
+            profile, called with the server hardware and the profile;
+        """
         server_profile = common.server_profile_from_server_hardware(
             self.oneview_client, server_hardware)
-        if server_profile:
-            LOG.info("There is Server Profile %s available.", server_profile)
-            mac_address = port_dict.get('mac_address')
-            connection = common.connection_with_mac_address(
-                server_profile.get('connections'), mac_address
-            )
-            if connection:
-                LOG.debug("There is Connection %s available.", connection)
-                server_profile.get('connections').remove(connection)
-            else:
-                LOG.debug("There is no Connection available.")
+        if not server_profile:
+            return
 
-            common.check_oneview_entities_availability(
-                self.oneview_client, server_hardware)
-            self._update_oneview_entities(server_hardware, server_profile)
-            LOG.info("The requested port was deleted successfully.")
+        previous_connections = copy.deepcopy(
+            server_profile.get('connections'))
+        for change in changes:
+            change(server_hardware, server_profile)
 
-    def _update_oneview_entities(self, server_hardware, server_profile):
-        previous_power_state = common.get_server_hardware_power_state(
-            server_hardware
-        )
-        self.update_server_hardware_power_state(server_hardware, "Off")
-        self.oneview_client.server_profiles.update(
-            resource=server_profile,
-            id_or_uri=server_profile.get('uri')
-        )
-        self.update_server_hardware_power_state(
-            server_hardware, previous_power_state
-        )
+        common.check_oneview_entities_availability(
+            self.oneview_client, server_hardware)
+        self.update_server_profile(
+            server_hardware, server_profile, previous_connections)
+
+
+class _ConnectionBatch(object):
+    def __init__(self, server_hardware):
+        self.server_hardware = server_hardware
+        self.changes = []
+        self.done = threading.Event()
+        self.error = None
+
+
+class ConnectionBatcher(object):
+    """Merge the connection changes of each server hardware.
+
+    The first change submitted for a server hardware opens a batch. The
+    batch waits for the update of the previous batch of that server
+    hardware to finish, then for profile_update_window seconds. Changes
+    for the same server hardware submitted in the meantime join it, and
+    are applied together with a single server profile update and power
+    cycle. Every submitter waits for the update and gets its error, if
+    any.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._batches = {}
+        self._last_batches = {}
+
+    def submit(self, server_hardware, change, apply_changes):
+        """Submit a connection change.
+
+        :param server_hardware: the server hardware of the change;
+        :param change: a callable changing the server profile connections;
+        :param apply_changes: a callable applying the list of changes of a
+            server hardware to OneView;
+        """
+        server_hardware_id = server_hardware.get('uuid')
+        with self._lock:
+            batch = self._batches.get(server_hardware_id)
+            is_first_change = batch is None
+            if is_first_change:
+                batch = _ConnectionBatch(server_hardware)
+                previous_batch = self._last_batches.get(server_hardware_id)
+                self._batches[server_hardware_id] = batch
+                self._last_batches[server_hardware_id] = batch
+            batch.changes.append(change)
+
+        if not is_first_change:
+            batch.done.wait()
+            if batch.error is not None:
+                raise batch.error
+            return
+
+        try:
+            if previous_batch is not None:
+                previous_batch.done.wait()
+            window = CONF.DEFAULT.profile_update_window
+            if window:
+                time.sleep(window)
+            with self._lock:
+                del self._batches[server_hardware_id]
+
+            if len(batch.changes) > 1:
+                LOG.info("Applying %(count)s connection changes to the "
+                         "server hardware %(id)s at once.", {
+                             'count': len(batch.changes),
+                             'id': server_hardware_id})
+            apply_changes(batch.server_hardware, batch.changes)
+        except Exception as err:
+            batch.error = err
+            raise
+        finally:
+            with self._lock:
+                if self._last_batches.get(server_hardware_id) is batch:
+                    del self._last_batches[server_hardware_id]
+            batch.done.set()
 
 
 class Client(object):
@@ -0,0 +1,123 @@
+# Copyright (2016-2018) Hewlett Packard Enterprise Development LP.
+# Copyright (2016-2018) Universidade Federal de Campina Grande
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import bisect
+import hashlib
+import os
+import socket
+
+from oslo_log import log
+from oslo_service import loopingcall
+from oslo_utils import encodeutils
+from oslo_utils import uuidutils
+
+from networking_oneview.ml2.drivers.oneview import common
+from networking_oneview.ml2.drivers.oneview import database_manager
+
+LOG = log.getLogger(__name__)
+
+# Every member is placed this many times on the ring, so the keys are
+# spread evenly and a leaving member's keys go to all the others.
+RING_REPLICAS = 64
+
+
+def _hash(key):
+    return int(hashlib.md5(encodeutils.safe_encode(key)).hexdigest(), 16)
+
+
+class HashRing(object):
+    """A consistent hash ring of the members of the synchronization.
+
+    A key belongs to the first member found clockwise from its hash, so
+    a member joining or leaving only moves the keys of its neighbours.
+    """
+
+    def __init__(self, members, replicas=RING_REPLICAS):
+        self.members = frozenset(members)
+        self._ring = sorted(
+            (_hash('%s-%s' % (member, replica)), member)
+            for member in self.members for replica in range(replicas))
+        self._hashes = [point for point, _ in self._ring]
+
+    def get_member(self, key):
+        """Get the member a key belongs to, or None if there is none."""
+        if not self._ring:
+            return None
+        index = bisect.bisect(self._hashes, _hash(key)) % len(self._ring)
+        return self._ring[index][1]
+
+
+class Shard(object):
+    """The keys of a HashRing owned by one member."""
+
+    def __init__(self, ring, member_id):
+        self.ring = ring
+        self.member_id = member_id
+
+    def owns(self, key):
+        return self.ring.get_member(key) == self.member_id
+
+
+class Membership(object):
+    """The membership of a process in the partitioned synchronization.
+
+    The process records a heartbeat in the database every third of the
+    timeout, and the members whose heartbeat is recent enough share the
+    synchronization work through a HashRing. A member that stops
+    heartbeating loses its share once the timeout elapses.
+    """
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self.member_id = '%s:%s:%s' % (
+            socket.gethostname(), os.getpid(), uuidutils.generate_uuid())
+        self._ring = HashRing(())
+
+    def start(self):
+        heartbeat = loopingcall.FixedIntervalLoopingCall(self.heartbeat)
+        heartbeat.start(
+            interval=max(1, self.timeout // 3),
+            initial_delay=0,
+            stop_on_exception=False)
+
+    def heartbeat(self):
+        """Record the heartbeat of this process and load the members.
+
+        The last known members are kept when the database cannot be
+        reached.
+        """
+        try:
+            session = common.get_database_session()
+            database_manager.heartbeat_sync_member(
+                session, self.member_id, self.timeout)
+            members = database_manager.list_sync_members(
+                session, self.timeout)
+        except Exception as err:
+            LOG.warning("Failed to record the synchronization heartbeat: "
+                        "%s", err)
+            return
+        if self._ring.members != frozenset(members):
+            LOG.info("The synchronization is now shared by %s processes.",
+                     len(members))
+            self._ring = HashRing(members)
+
+    def shard(self):
+        """Get the share of this process for a synchronization run."""
+        return Shard(self._ring, self.member_id)
+
+    def leave(self):
+        self._ring = HashRing(())
+        database_manager.delete_sync_member(
+            common.get_database_session(), self.member_id)
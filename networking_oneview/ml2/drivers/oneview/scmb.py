@@ -0,0 +1,148 @@
+# Copyright (2016-2018) Hewlett Packard Enterprise Development LP.
+# Copyright (2016-2018) Universidade Federal de Campina Grande
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import socket
+import ssl
+
+import eventlet
+from oslo_log import log
+from oslo_serialization import jsonutils
+from oslo_utils import importutils
+import six
+
+from networking_oneview.conf import CONF
+from networking_oneview.ml2.drivers.oneview import exceptions
+
+LOG = log.getLogger(__name__)
+
+kombu = importutils.try_import('kombu')
+
+SCMB_EXCHANGE = 'scmb'
+SCMB_QUEUE = 'networking-oneview-scmb'
+SCMB_CATEGORIES = (
+    'ethernet-networks', 'logical-interconnect-groups', 'server-profiles')
+
+
+class SCMBListener(object):
+    """Listen to the State Change Message Bus (SCMB) of OneView.
+
+    OneView publishes a message on the 'scmb' exchange of its AMQP broker
+    whenever a resource is created, updated or deleted. The changes of the
+    resources reflected by the driver are handed to the synchronization,
+    which reconciles only the changed resource.
+    """
+
+    def __init__(self, synchronization, connection=None):
+        """Create the listener.
+
+        :param synchronization: the Synchronization of the driver;
+        :param connection: a kombu Connection, by default one to the
+            broker of OneView authenticated with the configured client
+            certificate;
+        """
+        if kombu is None:
+            raise exceptions.ClientException(
+                "The kombu library is required to listen to the OneView "
+                "State Change Message Bus.")
+        self.synchronization = synchronization
+        self.connection = connection or _oneview_connection()
+        exchange = kombu.Exchange(SCMB_EXCHANGE, type='topic', durable=True)
+        self.queue = kombu.Queue(
+            SCMB_QUEUE, durable=False, auto_delete=True, bindings=[
+                kombu.binding(exchange, routing_key='scmb.%s.#' % category)
+                for category in SCMB_CATEGORIES])
+        self._running = False
+
+    def start(self):
+        eventlet.spawn_n(self.run)
+
+    def stop(self):
+        self._running = False
+
+    def run(self):
+        """Consume the messages until the listener is stopped.
+
+        The connection is made again, after scmb_reconnect_interval
+        seconds, whenever the broker cannot be reached. Only the process
+        running the synchronization consumes the messages.
+        """
+        self._running = True
+        while self._running:
+            if not self.synchronization.is_leader():
+                eventlet.sleep(CONF.oneview.scmb_reconnect_interval)
+                continue
+            try:
+                self._consume()
+            except Exception as err:
+                LOG.warning("Failed to consume the OneView State Change "
+                            "Message Bus: %s", err)
+                self.connection.release()
+                eventlet.sleep(CONF.oneview.scmb_reconnect_interval)
+
+    def _consume(self):
+        with self.connection.Consumer(
+                self.queue, callbacks=[self.on_message], accept=None):
+            while self._running and self.synchronization.is_leader():
+                try:
+                    self.connection.drain_events(timeout=1)
+                except socket.timeout:
+                    pass
+
+    def on_message(self, body, message):
+        try:
+            change = body
+            if not isinstance(change, dict):
+                change = jsonutils.loads(change)
+            resource_uri = change.get('resourceUri')
+            category = resource_category(resource_uri)
+            if category in SCMB_CATEGORIES:
+                self.synchronization.reconcile_resource(
+                    category, resource_uri, change.get('changeType'))
+        except Exception as err:
+            LOG.error("Failed to reconcile the change %(change)s: %(err)s",
+                      {'change': body, 'err': err})
+        finally:
+            message.ack()
+
+
+def _oneview_connection():
+    cacert_file = (CONF.oneview.scmb_cacert_file or
+                   CONF.oneview.tls_cacert_file)
+    ssl_options = {
+        'certfile': CONF.oneview.scmb_client_cert_file,
+        'keyfile': CONF.oneview.scmb_client_key_file,
+        'cert_reqs': ssl.CERT_REQUIRED,
+    }
+    if cacert_file:
+        ssl_options['ca_certs'] = cacert_file
+    elif CONF.oneview.allow_insecure_connections:
+        ssl_options['cert_reqs'] = ssl.CERT_NONE
+    return kombu.Connection(
+        hostname=CONF.oneview.oneview_host, port=CONF.oneview.scmb_port,
+        transport='pyamqp', ssl=ssl_options, login_method='EXTERNAL')
+
+
+def resource_category(resource_uri):
+    """Get the category of a OneView resource from its URI.
+
+    :param resource_uri: a URI such as /rest/server-profiles/<id>;
+    :returns: the category, such as 'server-profiles', or None;
+    """
+    if not isinstance(resource_uri, six.string_types):
+        return None
+    parts = resource_uri.strip('/').split('/')
+    if len(parts) < 3 or parts[0] != 'rest':
+        return None
+    return parts[1]
@@ -0,0 +1,108 @@
+# Copyright (2016-2018) Hewlett Packard Enterprise Development LP.
+# Copyright (2016-2018) Universidade Federal de Campina Grande
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from oslo_log import log
+from oslo_utils import importutils
+
+from networking_oneview.ml2.drivers.oneview import common
+
+LOG = log.getLogger(__name__)
+
+oneview_exceptions = importutils.try_import('hpOneView.exceptions')
+
+
+class KnownNetworks(object):
+    """Ethernet networks known to exist, or to be gone, during a sync run.
+
+    The set is loaded from a single listing of the ethernet networks. A
+    network missing from it is looked up once, in case it was created
+    after the listing, and remembered as gone if OneView does not have it.
+    """
+
+    def __init__(self, oneview_client, network_uris):
+        self.oneview_client = oneview_client
+        self._existing = set(network_uris)
+        self._missing = set()
+
+    def __contains__(self, network_uri):
+        if network_uri in self._existing:
+            return True
+        if not network_uri or network_uri in self._missing:
+            return False
+
+        try:
+            self.oneview_client.ethernet_networks.get(
+                common.id_from_uri(network_uri))
+        except oneview_exceptions.HPOneViewException as err:
+            if common.is_unauthorized_error(err):
+                raise
+            LOG.debug("The ethernet network %s does not exist.", network_uri)
+            self._missing.add(network_uri)
+            return False
+        self._existing.add(network_uri)
+        return True
+
+
+class TopologySnapshot(object):
+    """In-memory index of the OneView resources used by the connection sync.
+
+    The server hardware, server profiles and ethernet networks are listed
+    once, so the lookups made for every port do not reach OneView.
+    """
+
+    def __init__(self, server_hardware_list, server_profiles,
+                 known_networks):
+        self.server_hardware = {}
+        for server_hardware in server_hardware_list:
+            self.server_hardware[server_hardware.get('uuid')] = (
+                server_hardware)
+            self.server_hardware[server_hardware.get('uri')] = (
+                server_hardware)
+        self.server_profiles = dict(
+            (server_profile.get('uri'), server_profile)
+            for server_profile in server_profiles)
+        self.known_networks = known_networks
+
+    @classmethod
+    def load(cls, oneview_client):
+        """List the resources of the snapshot from OneView.
+
+        :param oneview_client: a instance of the OneView Client;
+        :returns: a TopologySnapshot;
+        """
+        snapshot = cls(
+            oneview_client.server_hardware.get_all(),
+            oneview_client.server_profiles.get_all(),
+            KnownNetworks(oneview_client, [
+                network.get('uri') for network
+                in oneview_client.ethernet_networks.get_all()]))
+        LOG.debug("Loaded a snapshot of %s server profiles.",
+                  len(snapshot.server_profiles))
+        return snapshot
+
+    def get_server_hardware(self, server_hardware_id_or_uri):
+        return self.server_hardware.get(server_hardware_id_or_uri)
+
+    def get_server_profile(self, server_hardware):
+        """Get the server profile applied to a server hardware."""
+        server_profile_uri = server_hardware.get('serverProfileUri')
+        if not server_profile_uri:
+            LOG.warning("There is no Server Profile available on "
+                        "Server Hardware: %s." % server_hardware.get('uuid'))
+            return None
+        return self.server_profiles.get(server_profile_uri)
+
+    def has_ethernet_network(self, network_uri):
+        return network_uri in self.known_networks
@@ -0,0 +1,128 @@
+# Copyright (2016-2018) Hewlett Packard Enterprise Development LP.
+# Copyright (2016-2018) Universidade Federal de Campina Grande
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+
+from networking_oneview.ml2.drivers.oneview import executor
+
+NETWORKS_CREATION = 'networks creation'
+UPLINKSETS = 'uplinksets'
+CONNECTIONS = 'connections'
+NETWORKS_DELETION = 'networks deletion'
+CHECKPOINTS = 'checkpoints'
+
+# Connections are reconciled before the outdated networks are deleted, so
+# OneView is never asked to delete a network a server profile still uses.
+# Checkpoints are only recorded once every change was applied.
+PHASES = (NETWORKS_CREATION, UPLINKSETS, CONNECTIONS, NETWORKS_DELETION,
+          CHECKPOINTS)
+
+Action = collections.namedtuple(
+    'Action', ['phase', 'operation', 'count', 'rest_calls', 'apply', 'key'])
+
+
+class SyncPlan(object):
+    """The changes a synchronization run makes in OneView.
+
+    The plan is built from the state of Neutron and OneView without
+    changing either of them, so it can be reported in a dry run before
+    being applied. Unless it is a full sweep, the resources unchanged
+    since their last checkpoint are left out of the plan. In a
+    partitioned synchronization, so are the resources of the other
+    processes.
+    """
+
+    def __init__(self, full_sweep=True, shard=None):
+        self.full_sweep = full_sweep
+        self.shard = shard
+        self.actions = []
+        self.removed_neutron_network_ids = set()
+        self.removed_network_uris = set()
+
+    def add(self, phase, operation, apply, count=1, rest_calls=1, key=None):
+        """Add an action to the plan.
+
+        :param phase: the phase of the action, one of PHASES;
+        :param operation: a short description of the action;
+        :param apply: the callable making the change, without arguments;
+        :param count: the number of resources changed by the action;
+        :param rest_calls: the estimated number of OneView REST calls;
+        :param key: the OneView resource the action updates, if any;
+        """
+        self.actions.append(
+            Action(phase, operation, count, rest_calls, apply, key))
+
+    def owns(self, key):
+        """Check if a resource is synchronized by this process.
+
+        :param key: the OneView URI or the Neutron id of the resource;
+        """
+        return self.shard is None or self.shard.owns(key)
+
+    def summary(self):
+        """Sum the resources and REST calls of every operation.
+
+        :returns: an OrderedDict of (phase, operation) to a (count,
+            rest_calls) tuple, in the order the phases are applied;
+        """
+        summary = collections.OrderedDict()
+        for phase in PHASES:
+            for action in self.actions:
+                if action.phase != phase:
+                    continue
+                count, rest_calls = summary.get(
+                    (phase, action.operation), (0, 0))
+                summary[(phase, action.operation)] = (
+                    count + action.count, rest_calls + action.rest_calls)
+        return summary
+
+    def report(self):
+        """Describe the plan, one operation per line."""
+        lines = []
+        total_rest_calls = 0
+        for (phase, operation), (count, rest_calls) in (
+                self.summary().items()):
+            lines.append("%s: %s (%s), about %s REST calls" % (
+                phase, operation, count, rest_calls))
+            total_rest_calls += rest_calls
+        if not lines:
+            return "Synchronization plan: nothing to change."
+        lines.insert(0, "Synchronization plan: %s actions, about %s REST "
+                        "calls." % (len(self.actions), total_rest_calls))
+        return "\n".join(lines)
+
+    def apply(self, max_workers):
+        """Apply the actions of the plan, phase after phase.
+
+        The actions of a phase run concurrently and start once every
+        action of the previous phases succeeded.
+
+        :param max_workers: the maximum number of concurrent actions;
+        """
+        sync_executor = executor.SyncExecutor(max_workers)
+        barrier = []
+        for phase in PHASES:
+            tasks = [
+                sync_executor.submit(
+                    action.apply, key=action.key, depends_on=barrier)
+                for action in self.actions if action.phase == phase]
+            if tasks:
+                barrier = [sync_executor.submit(
+                    _phase_done, depends_on=tasks)]
+        sync_executor.wait()
+
+
+def _phase_done():
+    pass
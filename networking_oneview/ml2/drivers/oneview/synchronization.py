@@ -13,7 +13,14 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+import copy
+import functools
+import hashlib
+import random
 import re
+import threading
+import time
 
 from hpOneView import exceptions
 from oslo_log import log
@@ -23,9 +30,23 @@ from oslo_service import loopingcall
 from networking_oneview.conf import CONF
 from networking_oneview.ml2.drivers.oneview import common
 from networking_oneview.ml2.drivers.oneview import database_manager
+from networking_oneview.ml2.drivers.oneview import lease
+from networking_oneview.ml2.drivers.oneview import partition
+from networking_oneview.ml2.drivers.oneview import snapshot
+from networking_oneview.ml2.drivers.oneview import sync_plan
 
 LOG = log.getLogger(__name__)
 
+NEUTRON_NETWORK_NAME_PATTERN = r'Neutron \[(.*)\]'
+MANAGED_NETWORK_FILTER = "\"name matches 'Neutron %'\""
+
+ETHERNET_NETWORKS = 'ethernet-networks'
+LOGICAL_INTERCONNECT_GROUPS = 'logical-interconnect-groups'
+SERVER_PROFILES = 'server-profiles'
+CHANGE_DELETED = 'Deleted'
+SYNC_LEASE = 'synchronization'
+LOGICAL_INTERCONNECT_GROUP_PREFIX = '/rest/logical-interconnect-groups/'
+
 
 class Synchronization(object):
     def __init__(self, oneview_client, neutron_oneview_client,
@@ -33,118 +54,635 @@ class Synchronization(object):
         self.oneview_client = oneview_client
         self.neutron_client = neutron_oneview_client
         self.flat_net_mappings = flat_net_mappings
+        self._last_full_sweep = None
+        self._lock = threading.Lock()
+        self._interval = CONF.DEFAULT.sync_interval
+        self._heartbeat_done = None
+        self.lease = None
+        if CONF.DEFAULT.sync_leader_election:
+            self.lease = lease.Lease(
+                SYNC_LEASE, CONF.DEFAULT.sync_lease_duration)
+        self.membership = None
+        if CONF.DEFAULT.sync_partitioned:
+            self.membership = partition.Membership(
+                CONF.DEFAULT.sync_member_timeout)
 
     def start(self):
-        heartbeat = loopingcall.FixedIntervalLoopingCall(self.synchronize)
-        heartbeat.start(
-            interval=CONF.DEFAULT.sync_interval,
-            initial_delay=0,
+        """Run the synchronization periodically.
+
+        The first run is delayed by up to sync_start_jitter seconds, so
+        the workers of the Neutron servers do not all start it at once.
+        With sync_leader_election, only the process holding the sync
+        lease runs it, unless sync_partitioned shares it between every
+        process.
+        """
+        if self.lease is not None:
+            self.lease.start()
+        if self.membership is not None:
+            self.membership.start()
+        heartbeat = loopingcall.DynamicLoopingCall(
+            self._scheduled_synchronize)
+        self._heartbeat_done = heartbeat.start(
+            initial_delay=random.uniform(0, CONF.DEFAULT.sync_start_jitter),
             stop_on_exception=False)
 
+    def wait(self):
+        """Block until the periodic synchronization is stopped."""
+        self._heartbeat_done.wait()
+
+    def _scheduled_synchronize(self):
+        """Run the synchronization and get the delay until the next run.
+
+        The interval is halved after a run that found drift between
+        Neutron and OneView and doubled after a run that found none,
+        within sync_interval_min and sync_interval_max, which default to
+        sync_interval so the interval is fixed. Up to a tenth of
+        it is added or removed at random, so the workers do not fall in
+        step again. A dry run applies nothing, so it leaves the interval
+        unchanged.
+
+        :returns: the delay in seconds until the next run;
+        """
+        if self.membership is None and not self.is_leader():
+            LOG.debug("The synchronization is run by another process.")
+            return self.lease.duration
+
+        try:
+            plan = self.synchronize()
+        except Exception as err:
+            LOG.error("Synchronization failed: %s", err)
+        else:
+            if CONF.DEFAULT.sync_dry_run:
+                LOG.debug("Dry run, the synchronization interval is kept.")
+            elif _has_drift(plan):
+                self._interval = self._interval / 2.0
+            else:
+                self._interval = self._interval * 2.0
+        interval_min = CONF.DEFAULT.sync_interval_min
+        if interval_min is None:
+            interval_min = CONF.DEFAULT.sync_interval
+        interval_max = CONF.DEFAULT.sync_interval_max
+        if interval_max is None:
+            interval_max = CONF.DEFAULT.sync_interval
+        self._interval = min(
+            max(self._interval, interval_min),
+            max(interval_max, interval_min))
+        delay = self._interval * random.uniform(0.9, 1.1)
+        LOG.debug("Next synchronization in %.0f seconds.", delay)
+        return delay
+
+    def is_leader(self):
+        """Check if this process is the one to synchronize OneView."""
+        return self.lease is None or self.lease.is_held()
+
     @common.oneview_reauth
     def synchronize(self):
+        """Plan the changes to OneView and apply them.
+
+        :returns: the SyncPlan of the run;
+        """
         LOG.info("Starting synchronization mechanism.")
         common.check_valid_resources()
-        self.create_oneview_networks_from_neutron()
+        with self._lock:
+            plan = self.plan()
+            if not self._apply(plan):
+                return plan
+        if plan.full_sweep:
+            self._last_full_sweep = time.time()
+        LOG.info("Synchronization mechanism finished successfully.")
+        return plan
+
+    @common.oneview_reauth
+    def reconcile_resource(self, category, resource_uri, change_type):
+        """Reconcile a single OneView resource changed outside Neutron.
+
+        A deleted network is created again, and the connections of an
+        updated server profile, or the networks of an updated LIG, are
+        reconciled when force_sync_delete_ops allows it.
+
+        :param category: the OneView category of the resource;
+        :param resource_uri: the URI of the resource;
+        :param change_type: the change, such as 'Updated' or 'Deleted';
+        """
+        LOG.debug("Reconciling %(change)s %(uri)s.", {
+            'change': change_type, 'uri': resource_uri})
+        with self._lock:
+            plan = sync_plan.SyncPlan()
+            if category == ETHERNET_NETWORKS:
+                if change_type == CHANGE_DELETED:
+                    self._plan_network_recreation(
+                        plan, common.id_from_uri(resource_uri))
+            elif not common.CONF.DEFAULT.force_sync_delete_ops:
+                return
+            elif change_type == CHANGE_DELETED:
+                return
+            elif category == SERVER_PROFILES:
+                self._plan_server_profile_connections(plan, resource_uri)
+            elif category == LOGICAL_INTERCONNECT_GROUPS:
+                self._plan_uplinksets(
+                    plan, lig_id=common.id_from_uri(resource_uri))
+
+            if plan.actions:
+                self._apply(plan)
+
+    def _apply(self, plan):
+        """Apply a plan, unless the synchronization is a dry run.
+
+        :returns: True if the plan was applied;
+        """
+        LOG.info(plan.report())
+        if CONF.DEFAULT.sync_dry_run:
+            LOG.info("Synchronization dry run finished, nothing was "
+                     "changed.")
+            return False
+        plan.apply(CONF.DEFAULT.sync_workers)
+        return True
+
+    def plan(self):
+        """Compare Neutron and OneView and plan the changes to OneView.
+
+        Neither Neutron nor OneView is changed. The networks planned for
+        deletion are known when the uplinksets and connections are
+        planned, so they are left out of both.
+
+        In a partitioned synchronization, only the share of this process
+        is planned: the networks, keyed by their physical network when
+        they are created in bulk, the LIGs and the server profiles. The
+        processes apply their plans independently, so a network still
+        used by a server profile of another process is only deleted by a
+        run after the one removing its connections.
+
+        :returns: a SyncPlan;
+        """
+        shard = None
+        if self.membership is not None:
+            shard = self.membership.shard()
+        plan = sync_plan.SyncPlan(
+            full_sweep=self._is_full_sweep_due(), shard=shard)
+        self._plan_network_creation(plan)
+        self._plan_network_pool(plan)
 
         force_delete = common.CONF.DEFAULT.force_sync_delete_ops
         LOG.debug("Delete outdated networks and connections operations "
                   "is set to: %s" % force_delete)
         if force_delete:
-            self.delete_unmapped_oneview_networks()
-            self.synchronize_uplinkset_from_mapped_networks()
-            self.recreate_connection()
-        LOG.info("Synchronization mechanism finished successfully.")
+            topology = snapshot.TopologySnapshot.load(self.oneview_client)
+            self._plan_network_deletion(plan, topology)
+            self._plan_uplinksets(plan)
+            self._plan_connections(plan, topology)
+        return plan
+
+    def _is_full_sweep_due(self):
+        """Check if the run must ignore the checkpoints.
+
+        Resources may change in ways the checkpoints do not reflect, so
+        every resource is examined again every sync_full_sweep_interval.
+        """
+        interval = CONF.DEFAULT.sync_full_sweep_interval
+        return (not interval or self._last_full_sweep is None or
+                time.time() - self._last_full_sweep >= interval)
+
+    def _apply_phase(self, plan_phase):
+        plan = sync_plan.SyncPlan()
+        plan_phase(plan)
+        plan.apply(CONF.DEFAULT.sync_workers)
 
     def get_oneview_network(self, oneview_net_id):
         try:
             return self.oneview_client.ethernet_networks.get(oneview_net_id)
         except exceptions.HPOneViewException as err:
+            if common.is_unauthorized_error(err):
+                raise
             LOG.error(err)
 
     def create_oneview_networks_from_neutron(self):
+        self._apply_phase(self._plan_network_creation)
+
+    def _plan_network_creation(self, plan):
         LOG.info("Synchronizing Neutron networks not in OneView.")
         session = common.get_database_session()
-        for network, network_segment in (
-                database_manager.list_networks_and_segments_with_physnet(
-                    session)):
+        networks = (
+            database_manager.list_networks_and_segments_with_oneview_network(
+                session))
+        oneview_network_ids = None
+        if any(mapping is not None and mapping.manageable
+               for _, _, mapping in networks):
+            oneview_network_ids = set(
+                common.id_from_uri(oneview_network.get('uri'))
+                for oneview_network in self._list_managed_oneview_networks())
+
+        stale_mappings = []
+        missing_networks = []
+        for network, network_segment, neutron_oneview_network in networks:
             net_id = network.get('id')
-            neutron_oneview_network = (
-                database_manager.get_neutron_oneview_network(
-                    session, net_id))
+            if not plan.owns(_network_creation_key(net_id, network_segment)):
+                continue
             if neutron_oneview_network:
-                oneview_network = self.get_oneview_network(
-                    neutron_oneview_network.oneview_network_id
-                )
-                if not oneview_network:
-                    common.remove_inconsistence_from_db(
-                        session,
-                        neutron_oneview_network.neutron_network_id,
-                        neutron_oneview_network.oneview_network_id
-                    )
-                else:
+                if self._is_oneview_network_available(
+                        neutron_oneview_network, oneview_network_ids):
                     continue
+                stale_mappings.append((
+                    neutron_oneview_network.neutron_network_id,
+                    neutron_oneview_network.oneview_network_id))
 
             physical_network = network_segment.get('physical_network')
             network_type = network_segment.get('network_type')
             segmentation_id = network_segment.get('segmentation_id')
-            network_dict = common.network_dict_for_network_creation(
+            missing_networks.append(common.network_dict_for_network_creation(
                 physical_network, network_type, net_id, segmentation_id
-            )
+            ))
 
-            self.neutron_client.network.create(session, network_dict)
+        if missing_networks:
+            plan.add(
+                sync_plan.NETWORKS_CREATION, 'create networks',
+                functools.partial(
+                    self._create_networks, stale_mappings, missing_networks),
+                count=len(missing_networks),
+                rest_calls=_network_creation_calls(missing_networks))
+
+    def _plan_network_recreation(self, plan, oneview_network_id):
+        """Plan the creation of a mapped network deleted from OneView."""
+        session = common.get_database_session()
+        neutron_oneview_network = (
+            database_manager.list_neutron_oneview_network(
+                session, oneview_network_id=oneview_network_id))
+        if not neutron_oneview_network:
+            return
+        neutron_network_id = neutron_oneview_network[0].neutron_network_id
+        network_with_segment = (
+            database_manager.get_neutron_network_with_segment(
+                session, neutron_network_id))
+        if not network_with_segment:
+            return
+        network_segment = network_with_segment[1]
+        network_dict = common.network_dict_for_network_creation(
+            network_segment.get('physical_network'),
+            network_segment.get('network_type'), neutron_network_id,
+            network_segment.get('segmentation_id'))
+        plan.add(
+            sync_plan.NETWORKS_CREATION, 'create networks',
+            functools.partial(
+                self._create_networks,
+                [(neutron_network_id, oneview_network_id)], [network_dict]))
+
+    def _create_networks(self, stale_mappings, network_dicts):
+        session = common.get_database_session()
+        for neutron_network_id, oneview_network_id in stale_mappings:
+            common.remove_inconsistence_from_db(
+                session, neutron_network_id, oneview_network_id)
+            database_manager.delete_network_pool_entry(
+                session, oneview_network_id, unclaimed_only=False)
+        self.neutron_client.network.create_bulk(session, network_dicts)
+
+    def _plan_network_pool(self, plan):
+        """Plan the networks of vlan_pool_ranges missing from the pool.
+
+        The VLANs of the Neutron networks are left out, since an
+        uplinkset carries a single network per VLAN, and the free
+        networks of VLANs no longer in vlan_pool_ranges are deleted. The
+        free networks deleted from OneView are removed from the pool
+        before it is filled again, so they are never claimed.
+        """
+        session = common.get_database_session()
+        vlan_pool = self.neutron_client.network.vlan_pool
+        pool_entries = database_manager.list_network_pool(session)
+        if not vlan_pool and not pool_entries:
+            return
+        LOG.info("Synchronizing the OneView network pool.")
+        free_entries = [
+            entry for entry in pool_entries
+            if entry.neutron_network_id is None and
+            plan.owns(_physical_network_key(entry.physical_network))]
+        missing_entries = []
+        if free_entries:
+            oneview_network_ids = set(
+                common.id_from_uri(oneview_network.get('uri'))
+                for oneview_network in self._list_managed_oneview_networks())
+            missing_entries = [
+                entry for entry in free_entries
+                if entry.oneview_network_id not in oneview_network_ids]
+        used_vlans = set(
+            (network_segment.get('physical_network'),
+             network_segment.get('segmentation_id'))
+            for network_segment
+            in database_manager.list_networks_segments(session))
+        used_vlans.update(
+            (entry.physical_network, entry.vlan_id)
+            for entry in pool_entries if entry not in missing_entries)
+
+        missing_network_ids = {}
+        for entry in missing_entries:
+            missing_network_ids.setdefault(
+                entry.physical_network, []).append(entry.oneview_network_id)
+        for physical_network, oneview_network_ids in sorted(
+                missing_network_ids.items()):
+            plan.add(
+                sync_plan.NETWORKS_CREATION, 'remove missing pool networks',
+                functools.partial(
+                    self._remove_missing_pool_networks, oneview_network_ids),
+                count=len(oneview_network_ids), rest_calls=0,
+                key=_physical_network_key(physical_network))
+
+        for physical_network, vlan_ids in sorted(vlan_pool.items()):
+            if not plan.owns(_physical_network_key(physical_network)):
+                continue
+            if not self.neutron_client.network.is_uplinkset_mapping(
+                    physical_network, 'vlan'):
+                LOG.warning("The pool physical network %s is not in "
+                            "uplinkset_mappings.", physical_network)
+                continue
+            missing_vlans = [
+                vlan_id for vlan_id in sorted(vlan_ids)
+                if (physical_network, vlan_id) not in used_vlans]
+            if missing_vlans:
+                plan.add(
+                    sync_plan.NETWORKS_CREATION, 'fill network pool',
+                    functools.partial(
+                        self._fill_network_pool, physical_network,
+                        missing_vlans),
+                    count=len(missing_vlans), rest_calls=2,
+                    key=_physical_network_key(physical_network))
+
+        outdated_network_ids = [
+            entry.oneview_network_id for entry in free_entries
+            if entry not in missing_entries and
+            entry.vlan_id not in vlan_pool.get(entry.physical_network, ())]
+        if outdated_network_ids:
+            plan.add(
+                sync_plan.NETWORKS_DELETION, 'drain network pool',
+                functools.partial(
+                    self._drain_network_pool, outdated_network_ids),
+                count=len(outdated_network_ids),
+                rest_calls=len(outdated_network_ids))
+
+    def _fill_network_pool(self, physical_network, vlan_ids):
+        self.neutron_client.network.fill_pool(
+            common.get_database_session(), physical_network, vlan_ids)
+
+    def _remove_missing_pool_networks(self, oneview_network_ids):
+        session = common.get_database_session()
+        for oneview_network_id in oneview_network_ids:
+            LOG.info("Removing the network %s, deleted from OneView, from "
+                     "the pool.", oneview_network_id)
+            database_manager.delete_network_pool_entry(
+                session, oneview_network_id)
+            database_manager.delete_oneview_bulk_network(
+                session, oneview_network_id)
+
+    def _drain_network_pool(self, oneview_network_ids):
+        self.neutron_client.network.drain_pool(
+            common.get_database_session(), oneview_network_ids)
+
+    def _is_oneview_network_available(
+            self, neutron_oneview_network, oneview_network_ids):
+        """Check that the OneView network of a mapping still exists.
+
+        The networks created by the driver are checked against the ids
+        listed from OneView. The flat networks mapped by the operator
+        may have any name, so those are fetched one by one.
+        """
+        oneview_network_id = neutron_oneview_network.oneview_network_id
+        if neutron_oneview_network.manageable:
+            return oneview_network_id in oneview_network_ids
+        return bool(self.get_oneview_network(oneview_network_id))
 
     def synchronize_uplinkset_from_mapped_networks(self):
+        self._apply_phase(self._plan_uplinksets)
+
+    def _plan_uplinksets(self, plan, lig_id=None):
+        """Plan the LIG and uplinkset membership of the mapped networks.
+
+        :param plan: the SyncPlan of the run;
+        :param lig_id: the id of a single LIG to reconcile, by default
+            every LIG is; only the networks in the LIG or mapped to it
+            are then planned, with a single update of the LIG;
+        """
         LOG.info("Synchronizing OneView uplinksets.")
         session = common.get_database_session()
+        batch_lig_updates = CONF.DEFAULT.batch_lig_updates
+        owns_lig = functools.partial(_owns_lig, plan)
+        lig_network_ids = set()
+        if lig_id is not None:
+            batch_lig_updates = True
+            owns_lig = functools.partial(_owns_single_lig, plan, lig_id)
+            lig_network_ids = set(
+                lig_bd_entry.oneview_network_id for lig_bd_entry
+                in database_manager.list_oneview_network_lig(
+                    session, oneview_lig_id=lig_id))
+        mapped_networks = []
         for neutron_oneview_network in (
                 database_manager.list_neutron_oneview_network(session)):
             oneview_network_id = neutron_oneview_network.oneview_network_id
             neutron_network_id = neutron_oneview_network.neutron_network_id
+            if neutron_network_id in plan.removed_neutron_network_ids:
+                continue
             network_segment = database_manager.get_network_segment(
                 session, neutron_network_id
             )
-            if network_segment:
-                self.neutron_client.network.update_network_lig(
-                    session, oneview_network_id, network_segment.get(
-                        'network_type'), network_segment.get(
-                            'physical_network'))
+            if not network_segment:
+                continue
+            network_type = network_segment.get('network_type')
+            physical_network = network_segment.get('physical_network')
+            if (lig_id is not None and
+                    oneview_network_id not in lig_network_ids and
+                    not self.neutron_client.network.is_lig_mapped(
+                        lig_id, network_type, physical_network)):
+                continue
+            if batch_lig_updates:
+                mapped_networks.append(
+                    (oneview_network_id, network_type, physical_network))
+            else:
+                # Networks may share LIGs, but the updates of a LIG are
+                # serialized and merged by _update_lig_networks, so the
+                # networks are updated concurrently.
+                if not plan.owns(neutron_network_id):
+                    continue
+                plan.add(
+                    sync_plan.UPLINKSETS, 'update network LIGs',
+                    functools.partial(
+                        self._update_network_lig, oneview_network_id,
+                        network_type, physical_network),
+                    rest_calls=2,
+                    key=common.network_uri_from_id(oneview_network_id))
+
+        if mapped_networks:
+            plan.add(
+                sync_plan.UPLINKSETS, 'update network LIGs',
+                functools.partial(
+                    self._update_network_ligs, mapped_networks, owns_lig),
+                count=len(mapped_networks),
+                rest_calls=2 * len(set(
+                    mapped_network[1:] for mapped_network in mapped_networks)))
+
+    def _update_network_lig(self, oneview_network_id, network_type,
+                            physical_network):
+        self.neutron_client.network.update_network_lig(
+            common.get_database_session(), oneview_network_id, network_type,
+            physical_network)
+
+    def _update_network_ligs(self, mapped_networks, owns_lig=None):
+        self.neutron_client.network.update_network_ligs(
+            common.get_database_session(), mapped_networks, owns_lig)
 
     def delete_unmapped_oneview_networks(self):
+        self._apply_phase(self._plan_network_deletion)
+
+    def _plan_network_deletion(self, plan, topology=None):
+        """Plan the deletion of the networks no longer used by Neutron.
+
+        :param plan: the SyncPlan of the run;
+        :param topology: a TopologySnapshot, used in a partitioned
+            synchronization to keep the networks still used by the server
+            profiles of other processes;
+        """
         LOG.info("Synchronizing outdated networks in OneView.")
         session = common.get_database_session()
-        for network in self.oneview_client.ethernet_networks.get_all():
-            mmanaged_network = re.search(r'Neutron \[(.*)\]', network.get(
-                'name'))
-            if mmanaged_network:
-                oneview_network_id = common.id_from_uri(network.get('uri'))
-                neutron_network_id = mmanaged_network.group(1)
-                neutron_network = database_manager.get_neutron_network(
-                    session, neutron_network_id
-                )
-                network_segment = database_manager.get_network_segment(
-                    session, neutron_network_id
-                )
-                if not neutron_network:
-                    self.oneview_client.ethernet_networks.delete(
-                        oneview_network_id
-                    )
-                    common.remove_inconsistence_from_db(
-                        session, neutron_network_id, oneview_network_id
-                    )
-                # NOTE(nicodemos) network_segment will always exists?
-                # NOTE(mrtenio) network_segments are created by Neutron when
-                #  a Network is created. I think we can assume they always
-                #  exist
-                else:
-                    physnet = network_segment.get('physical_network')
-                    network_type = network_segment.get('network_type')
-                    if not self.neutron_client.network.is_uplinkset_mapping(
-                            physnet, network_type):
-                        self._delete_connections(neutron_network_id)
-                        self.neutron_client.network.delete(
-                            session, {'id': neutron_network_id}
-                        )
+        foreign_network_uris = set()
+        if plan.shard is not None and topology is not None:
+            foreign_network_uris = set(
+                connection.get('networkUri')
+                for server_profile_uri, server_profile
+                in topology.server_profiles.items()
+                if not plan.owns(server_profile_uri)
+                for connection in server_profile.get('connections') or [])
+        neutron_network_ids = set(
+            network.get('id') for network
+            in database_manager.list_neutron_networks(session))
+        network_segments = {}
+        for network_segment in database_manager.list_networks_segments(
+                session):
+            network_segments.setdefault(
+                network_segment.get('network_id'), network_segment)
+        mapped_networks = dict(
+            (network.oneview_network_id, network.neutron_network_id)
+            for network
+            in database_manager.list_neutron_oneview_network(session))
+        pool_network_ids = set(
+            entry.oneview_network_id
+            for entry in database_manager.list_network_pool(session))
+        bulk_network_ids = set(
+            network.oneview_network_id for network
+            in database_manager.list_oneview_bulk_networks(session))
+
+        for network in self._list_managed_oneview_networks():
+            neutron_network_id = self._get_managed_network_id(
+                network, mapped_networks, bulk_network_ids)
+            if neutron_network_id is None:
+                continue
+            network_uri = network.get('uri')
+            oneview_network_id = common.id_from_uri(network_uri)
+            if (neutron_network_id is False and
+                    oneview_network_id in pool_network_ids):
+                continue
+            rest_calls = 1
+            key = network_uri
+            if neutron_network_id is False:
+                operation = 'delete bulk networks'
+                apply = functools.partial(
+                    self._delete_bulk_network, oneview_network_id)
+            elif neutron_network_id not in neutron_network_ids:
+                operation = 'delete outdated networks'
+                apply = functools.partial(
+                    self._delete_outdated_network, oneview_network_id,
+                    neutron_network_id)
+            # NOTE(nicodemos) network_segment will always exists?
+            # NOTE(mrtenio) network_segments are created by Neutron when
+            #  a Network is created. I think we can assume they always
+            #  exist
+            else:
+                network_segment = network_segments.get(neutron_network_id)
+                physnet = network_segment.get('physical_network')
+                network_type = network_segment.get('network_type')
+                if self.neutron_client.network.is_uplinkset_mapping(
+                        physnet, network_type):
+                    continue
+                # Removing the connections of a network may update server
+                # profiles only known once fetched, and a profile is not
+                # updated with an ETag, so these deletions are not
+                # concurrent.
+                operation = 'delete unmapped networks'
+                apply = functools.partial(
+                    self._delete_unmapped_network, neutron_network_id)
+                rest_calls = 2
+                key = 'server-profiles'
+            # The connections to a network deleted by another process of a
+            # partitioned synchronization are removed all the same. The
+            # OneView network is kept while they may still be in use.
+            if key == network_uri and network_uri in foreign_network_uris:
+                LOG.debug("Network %s is still used by the server profiles "
+                          "of another process.", network_uri)
+            elif plan.owns(network_uri):
+                plan.add(sync_plan.NETWORKS_DELETION, operation, apply,
+                         rest_calls=rest_calls, key=key)
+            plan.removed_network_uris.add(network_uri)
+            if neutron_network_id:
+                plan.removed_neutron_network_ids.add(neutron_network_id)
+
+    def _delete_bulk_network(self, oneview_network_id):
+        LOG.info("Deleting bulk created network %s that is no "
+                 "longer mapped.", oneview_network_id)
+        self.oneview_client.ethernet_networks.delete(oneview_network_id)
+        database_manager.delete_oneview_bulk_network(
+            common.get_database_session(), oneview_network_id)
+
+    def _delete_outdated_network(self, oneview_network_id, neutron_network_id):
+        session = common.get_database_session()
+        if not database_manager.release_network_pool_entry(
+                session, oneview_network_id):
+            self.oneview_client.ethernet_networks.delete(oneview_network_id)
+            database_manager.delete_oneview_bulk_network(
+                session, oneview_network_id)
+        common.remove_inconsistence_from_db(
+            session, neutron_network_id, oneview_network_id
+        )
+
+    def _delete_unmapped_network(self, neutron_network_id):
+        session = common.get_database_session()
+        self._delete_connections(neutron_network_id)
+        self.neutron_client.network.delete(session, {'id': neutron_network_id})
+
+    def _list_managed_oneview_networks(self):
+        """List the networks named by the driver, a page at a time.
+
+        OneView only returns the networks whose name starts with
+        'Neutron ', so networks not managed by Neutron are not listed.
+        """
+        page_size = CONF.DEFAULT.sync_page_size
+        start = 0
+        while True:
+            networks = self.oneview_client.ethernet_networks.get_all(
+                start=start, count=page_size,
+                filter=MANAGED_NETWORK_FILTER, sort='name:ascending')
+            for network in networks:
+                yield network
+            if len(networks) < page_size:
+                return
+            start += page_size
+
+    def _get_managed_network_id(self, oneview_network, mapped_networks,
+                                bulk_network_ids):
+        """Get the id of the Neutron network a OneView network belongs to.
+
+        :param oneview_network: a OneView ethernet network;
+        :param mapped_networks: a dict of the Neutron network ids by the
+            id of the OneView network they are mapped to;
+        :param bulk_network_ids: the ids of the OneView networks the driver
+            created in bulk;
+        :returns: the Neutron network id, None if the OneView network is not
+            managed by Neutron, or False if it was created in bulk by the
+            driver but is no longer mapped to any Neutron network.
+        """
+        managed_network = re.search(
+            NEUTRON_NETWORK_NAME_PATTERN, oneview_network.get('name'))
+        if managed_network:
+            return managed_network.group(1)
+
+        oneview_network_id = common.id_from_uri(oneview_network.get('uri'))
+        if oneview_network_id in mapped_networks:
+            return mapped_networks[oneview_network_id]
+        if oneview_network_id in bulk_network_ids:
+            return False
+        return None
 
     def _delete_connections(self, neutron_network_id):
         session = common.get_database_session()
@@ -162,32 +700,22 @@ class Synchronization(object):
                 common.server_hardware_from_local_link_information_list(
                     self.oneview_client, local_link_info))
 
-            server_profile = (
-                self.neutron_client.port.server_profile_from_server_hardware(
-                    server_hardware
-                )
-            )
-
-            self.neutron_client.port.check_server_hardware_availability(
-                server_hardware
-            )
-            previous_power_state = (
-                self.neutron_client.port.get_server_hardware_power_state(
-                    server_hardware
-                )
-            )
-
-            self.neutron_client.port.update_server_hardware_power_state(
-                server_hardware, "Off")
+            server_profile = common.server_profile_from_server_hardware(
+                self.oneview_client, server_hardware)
+            if not server_profile:
+                continue
 
-            for connection in server_profile.get('connections'):
+            common.check_oneview_entities_availability(
+                self.oneview_client, server_hardware)
+            previous_connections = copy.deepcopy(
+                server_profile.get('connections'))
+            for connection in previous_connections:
                 if connection.get('mac') == port.get('mac_address'):
                     self._remove_connection(
                         server_profile, connection.get('id')
                     )
-            self.neutron_client.port.update_server_hardware_power_state(
-                server_hardware, previous_power_state
-            )
+            self.neutron_client.port.update_server_profile(
+                server_hardware, server_profile, previous_connections)
 
     def _remove_connection(self, server_profile, connection_id):
         connection_primary = False
@@ -203,12 +731,7 @@ class Synchronization(object):
                     connection_primary):
                 connection['boot']['priority'] = 'Primary'
 
-        server_profile_to_update = server_profile.copy()
-        server_profile_to_update['connections'] = connections
-        self.oneview_client.server_profiles.update(
-            resource=server_profile_to_update,
-            id_or_uri=server_profile_to_update.get('uri')
-        )
+        server_profile['connections'] = connections
 
     def recreate_connection(self):
         """Recreate connection that were deleted on Oneview.
@@ -216,9 +739,55 @@ class Synchronization(object):
         Calls method to fix critical connections in the Server Profile that
         will be used.
         """
+        self._apply_phase(self._plan_connections)
+
+    def _plan_server_profile_connections(self, plan, server_profile_uri):
+        """Plan the connections of a single Server Profile."""
+        server_profile = self.oneview_client.server_profiles.get(
+            server_profile_uri)
+        server_hardware_uri = server_profile.get('serverHardwareUri')
+        if not server_hardware_uri:
+            return
+        server_hardware = self.oneview_client.server_hardware.get(
+            server_hardware_uri)
+        self._plan_connections(plan, snapshot.TopologySnapshot(
+            [server_hardware], [server_profile],
+            snapshot.KnownNetworks(self.oneview_client, ())),
+            partial_topology=True)
+
+    def _plan_connections(self, plan, topology=None, partial_topology=False):
+        """Plan the connections of the Server Profiles.
+
+        The server hardware, server profiles and ethernet networks are
+        listed once, in a snapshot, instead of being fetched for every
+        port. Ports are grouped by server profile, so every profile is
+        updated at most once.
+
+        Unless the plan is a full sweep, a profile is skipped if neither
+        it nor its ports changed since it was last found in sync, which
+        is known from its checkpoint: the ETag of the profile and the
+        revision numbers of its ports.
+
+        :param plan: the SyncPlan of the run;
+        :param topology: a TopologySnapshot of the server profiles to plan,
+            by default all of them;
+        :param partial_topology: if set, the topology only holds some of
+            the server hardware;
+        """
         LOG.info("Synchronizing connections in OneView Server Profiles.")
         session = common.get_database_session()
+        if topology is None:
+            topology = snapshot.TopologySnapshot.load(self.oneview_client)
+        checkpoints = dict(
+            (checkpoint.resource_uri,
+             (checkpoint.neutron_state, checkpoint.oneview_etag))
+            for checkpoint in database_manager.list_sync_checkpoints(session))
+        oneview_network_ids = dict(
+            (mapping.neutron_network_id, mapping.oneview_network_id)
+            for mapping
+            in database_manager.list_neutron_oneview_network(session))
 
+        ports_by_server_profile = collections.OrderedDict()
         for port, port_binding in (
                 database_manager.get_port_with_binding_profile(session)):
             port_dict = common.port_dict_for_port_creation(
@@ -229,92 +798,232 @@ class Synchronization(object):
             )
             local_link_info = common.local_link_information_from_port(
                 port_dict)
-            server_hardware_id = (
-                common.server_hardware_from_local_link_information_list(
-                    self.oneview_client, local_link_info))
-            server_profile = (
-                self.neutron_client.port.server_profile_from_server_hardware(
-                    server_hardware_id
-                )
-            )
+            server_hardware = topology.get_server_hardware(
+                common.server_hardware_id_from_local_link_information_list(
+                    local_link_info))
+            if not server_hardware:
+                if not partial_topology:
+                    LOG.warning("The server hardware of the port %s was "
+                                "not found.", port.get('id'))
+                continue
+            server_profile = topology.get_server_profile(server_hardware)
+            if not server_profile or not plan.owns(server_profile.get('uri')):
+                continue
+            server_profile_ports = ports_by_server_profile.setdefault(
+                server_profile.get('uri'),
+                (server_hardware, server_profile, [], []))
+            server_profile_ports[2].append(port_dict)
+            server_profile_ports[3].append((
+                port.get('id'), port.get('revision_number'),
+                oneview_network_ids.get(port.get('network_id'))))
+
+        in_sync = {}
+        outdated = []
+        for server_hardware, server_profile, port_dicts, port_states in (
+                ports_by_server_profile.values()):
+            server_profile_uri = server_profile.get('uri')
+            checkpoint = _server_profile_checkpoint(
+                server_profile, port_states)
+            previous_checkpoint = checkpoints.get(server_profile_uri)
+            if (not plan.full_sweep and checkpoint is not None and
+                    checkpoint == previous_checkpoint and
+                    self._is_server_profile_unaffected(
+                        server_profile, topology, plan)):
+                LOG.debug("Server profile %s is unchanged since its last "
+                          "synchronization.", server_profile_uri)
+                continue
+
+            planned_actions = len(plan.actions)
+            self._plan_server_profile(
+                session, server_hardware, server_profile, port_dicts,
+                topology, plan)
+            if len(plan.actions) > planned_actions:
+                if previous_checkpoint is not None:
+                    outdated.append(server_profile_uri)
+            elif (checkpoint is not None and
+                    checkpoint != previous_checkpoint):
+                in_sync[server_profile_uri] = checkpoint
+
+        if in_sync or outdated:
+            plan.add(
+                sync_plan.CHECKPOINTS, 'record checkpoints',
+                functools.partial(
+                    self._record_checkpoints, in_sync, outdated),
+                count=len(in_sync), rest_calls=0)
+
+    def _is_server_profile_unaffected(self, server_profile, topology, plan):
+        """Check that no network of a profile is gone or to be deleted."""
+        return all(
+            connection.get('networkUri') not in plan.removed_network_uris and
+            topology.has_ethernet_network(connection.get('networkUri'))
+            for connection in server_profile.get('connections'))
+
+    def _record_checkpoints(self, checkpoints, outdated_resource_uris):
+        database_manager.set_sync_checkpoints(
+            common.get_database_session(), checkpoints,
+            outdated_resource_uris)
+
+    def _plan_server_profile(
+            self, session, server_hardware, server_profile, port_dicts,
+            topology, plan):
+        """Plan the connections of every port of a server profile at once.
+
+        The desired connections are computed in the server profile of the
+        snapshot, and applied with a single update.
+
+        :param session: a database session;
+        :param server_hardware: the server hardware of the profile;
+        :param server_profile: the server profile of the ports;
+        :param port_dicts: the ports bound to the server hardware;
+        :param topology: the TopologySnapshot of the run;
+        :param plan: the SyncPlan of the run;
+        """
+        server_profile_uri = server_profile.get('uri')
+        previous_connections = copy.deepcopy(
+            server_profile.get('connections'))
+        self._fix_connections_with_removed_networks(server_profile, topology)
+        for connection in previous_connections:
+            if connection.get('networkUri') in plan.removed_network_uris:
+                self._remove_connection(server_profile, connection.get('id'))
+
+        created_ports = []
+        for port_dict in port_dicts:
+            network_id = port_dict.get('network_id')
+            if network_id in plan.removed_neutron_network_ids:
+                continue
             neutron_oneview_network = (
                 database_manager.list_neutron_oneview_network(
-                    session, neutron_network_id=port.get('network_id')))
-            connection_updated = False
-            if neutron_oneview_network:
-                oneview_uri = "/rest/ethernet-networks/" + (
-                    neutron_oneview_network[0].oneview_network_id
-                )
-                self._fix_connections_with_removed_networks(
-                    server_profile
-                )
-                for c in server_profile.get('connections'):
-                    if c.get('mac') == port.get('mac_address'):
-                        connection_updated = True
-                        if c.get('networkUri') != oneview_uri:
-                            self._update_connection(
-                                oneview_uri, server_profile, c)
-            if not connection_updated:
-                self.neutron_client.port.create(session, port_dict)
-
-    def _update_connection(
-            self, oneview_uri, server_profile, connection):
-        server_hardware = self.oneview_client.server_hardware.get(
-            server_profile.get('serverHardwareUri')
-        )
-        connection['networkUri'] = oneview_uri
-        self.neutron_client.port.check_server_hardware_availability(
-            server_hardware
-        )
-        previous_power_state = (
-            self.neutron_client.port.get_server_hardware_power_state(
-                server_hardware
-            )
-        )
-        self.neutron_client.port.update_server_hardware_power_state(
-            server_hardware, "Off"
-        )
-        self.oneview_client.server_profiles.update(
-            resource=server_profile,
-            id_or_uri=server_profile.get('uri')
-        )
-        self.neutron_client.port.update_server_hardware_power_state(
-            self.oneview_client.server_hardware.get(
-                server_profile.get('serverHardwareUri')), previous_power_state
-        )
+                    session, neutron_network_id=network_id))
+            if not neutron_oneview_network:
+                created_ports.append(port_dict)
+                continue
 
-    def _fix_connections_with_removed_networks(self, server_profile):
-        sp_cons = []
+            oneview_uri = common.network_uri_from_id(
+                neutron_oneview_network[0].oneview_network_id)
+            mac_address = port_dict.get('mac_address')
+            connection = common.connection_with_mac_address(
+                server_profile.get('connections'), mac_address)
+            if connection:
+                connection['networkUri'] = oneview_uri
+                continue
 
-        server_hardware = self.oneview_client.server_hardware.get(
-            server_profile.get('serverHardwareUri')
-        )
+            local_link_info = common.local_link_information_from_port(
+                port_dict)
+            if (not common.is_port_valid_to_reflect_on_oneview(
+                    session, port_dict, local_link_info) or
+                    common.is_rack_server(server_hardware)):
+                continue
+            switch_info = common.switch_info_from_local_link_information_list(
+                local_link_info)
+            self.neutron_client.port.add_connection(
+                mac_address, oneview_uri, switch_info.get('bootable'),
+                server_hardware, server_profile)
 
-        for connection in server_profile.get('connections'):
-            conn_network_id = common.id_from_uri(
-                connection.get('networkUri')
-            )
-            if self.get_oneview_network(conn_network_id):
-                sp_cons.append(connection)
+        if server_profile.get('connections') != previous_connections:
+            plan.add(
+                sync_plan.CONNECTIONS, 'update server profiles',
+                functools.partial(
+                    self._update_server_profile, server_hardware,
+                    server_profile, previous_connections),
+                rest_calls=_server_profile_update_calls(server_hardware),
+                key=server_profile_uri)
+        # The ports of networks not in OneView yet update the profile they
+        # fetch, so they are created after the planned update.
+        for port_dict in created_ports:
+            plan.add(
+                sync_plan.CONNECTIONS, 'create connections',
+                functools.partial(self._create_port, port_dict),
+                rest_calls=2, key=server_profile_uri)
 
-        server_profile['connections'] = sp_cons
-        self.neutron_client.port.check_server_hardware_availability(
-            server_hardware
-        )
-        previous_power_state = (
-            self.neutron_client.port.get_server_hardware_power_state(
-                server_hardware
-            )
-        )
+    def _update_server_profile(
+            self, server_hardware, server_profile, previous_connections):
+        common.check_oneview_entities_availability(
+            self.oneview_client, server_hardware)
+        self.neutron_client.port.update_server_profile(
+            server_hardware, server_profile, previous_connections)
 
-        self.neutron_client.port.update_server_hardware_power_state(
-            server_hardware, "Off"
-        )
-        self.oneview_client.server_profiles.update(
-            resource=server_profile,
-            id_or_uri=server_profile.get('uri')
-        )
-        self.neutron_client.port.update_server_hardware_power_state(
-            self.oneview_client.server_hardware.get(
-                server_profile.get('serverHardwareUri')), previous_power_state
-        )
+    def _create_port(self, port_dict):
+        self.neutron_client.port.create(
+            common.get_database_session(), port_dict)
+
+    def _fix_connections_with_removed_networks(
+            self, server_profile, topology):
+        """Drop the connections whose network no longer exists."""
+        server_profile['connections'] = [
+            connection for connection in server_profile.get('connections')
+            if topology.has_ethernet_network(connection.get('networkUri'))]
+
+
+def _network_creation_calls(network_dicts):
+    """Estimate the REST calls creating networks, LIG updates aside.
+
+    The tagged networks of a physical network are created in bulk.
+    """
+    physical_networks = set()
+    rest_calls = 0
+    for network_dict in network_dicts:
+        if network_dict.get('provider:segmentation_id'):
+            physical_networks.add(
+                network_dict.get('provider:physical_network'))
+        else:
+            rest_calls += 1
+    return rest_calls + len(physical_networks)
+
+
+def _network_creation_key(network_id, network_segment):
+    """Get the key sharding the creation of a network.
+
+    The tagged networks of a physical network are created in bulk, and
+    added to the same LIGs, so they are created by the same process.
+    """
+    physical_network = network_segment.get('physical_network')
+    if physical_network and network_segment.get('segmentation_id'):
+        return _physical_network_key(physical_network)
+    return network_id
+
+
+def _physical_network_key(physical_network):
+    return 'physical-network:%s' % physical_network
+
+
+def _owns_lig(plan, lig_id):
+    return plan.owns(LOGICAL_INTERCONNECT_GROUP_PREFIX + lig_id)
+
+
+def _owns_single_lig(plan, reconciled_lig_id, lig_id):
+    return lig_id == reconciled_lig_id and _owns_lig(plan, lig_id)
+
+
+def _has_drift(plan):
+    """Check if a plan changes anything but the sync checkpoints."""
+    return any(action.phase != sync_plan.CHECKPOINTS
+               for action in plan.actions)
+
+
+def _server_profile_checkpoint(server_profile, port_states):
+    """Get the checkpoint of a server profile and the ports bound to it.
+
+    :param server_profile: the server profile;
+    :param port_states: a list of (port id, revision number, OneView
+        network id) tuples of the ports bound to the profile;
+    :returns: a (neutron_state, oneview_etag) tuple, or None if the
+        profile has no ETag;
+    """
+    etag = server_profile.get('eTag')
+    if not etag:
+        return None
+    neutron_state = hashlib.sha256(jsonutils.dump_as_bytes(
+        sorted(port_states, key=str))).hexdigest()
+    return neutron_state, etag
+
+
+def _server_profile_update_calls(server_hardware):
+    """Estimate the REST calls updating the connections of a profile.
+
+    A powered on server may have to be powered off and on again around
+    the update.
+    """
+    if (CONF.DEFAULT.online_connection_update or
+            common.is_server_hardware_powered_off(server_hardware)):
+        return 1
+    return 3
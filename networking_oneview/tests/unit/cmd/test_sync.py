@@ -0,0 +1,59 @@
+# Copyright 2018 Hewlett Packard Enterprise Development LP.
+# Copyright 2018 Universidade Federal de Campina Grande
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+from neutron.tests import base
+
+from networking_oneview.cmd import sync
+
+
+class RunOnceTestCase(base.BaseTestCase):
+    def setUp(self):
+        super(RunOnceTestCase, self).setUp()
+        self.sync = mock.Mock()
+        self.sync.lease.acquire.return_value = True
+
+    def test_run_once(self):
+        self.sync.membership = mock.Mock()
+
+        self.assertEqual(0, sync.run_once(self.sync))
+
+        self.assertIsNone(self.sync.membership)
+        self.assertTrue(self.sync.lease.start.called)
+        self.assertTrue(self.sync.synchronize.called)
+        self.assertTrue(self.sync.lease.release.called)
+
+    def test_run_once_without_leader_election(self):
+        self.sync.lease = None
+
+        self.assertEqual(0, sync.run_once(self.sync))
+
+        self.assertTrue(self.sync.synchronize.called)
+
+    def test_run_once_lease_held_by_another_process(self):
+        self.sync.lease.acquire.return_value = False
+
+        self.assertEqual(0, sync.run_once(self.sync))
+
+        self.assertFalse(self.sync.synchronize.called)
+        self.assertFalse(self.sync.lease.release.called)
+
+    def test_run_once_failure(self):
+        self.sync.synchronize.side_effect = Exception('OneView is gone')
+
+        self.assertEqual(1, sync.run_once(self.sync))
+
+        self.assertTrue(self.sync.lease.release.called)
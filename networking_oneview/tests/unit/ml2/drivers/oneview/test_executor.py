@@ -0,0 +1,92 @@
+# Copyright 2018 Hewlett Packard Enterprise Development LP.
+# Copyright 2018 Universidade Federal de Campina Grande
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import eventlet
+import functools
+
+from neutron.tests import base
+
+from networking_oneview.ml2.drivers.oneview import executor
+
+
+class SyncExecutorTestCase(base.BaseTestCase):
+    def setUp(self):
+        super(SyncExecutorTestCase, self).setUp()
+        self.calls = []
+        self.running = 0
+        self.max_running = 0
+
+    def _task(self, name, error=None):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        eventlet.sleep(0)
+        self.running -= 1
+        self.calls.append(name)
+        if error:
+            raise error
+
+    def _submit(self, sync_executor, name, error=None, **kwargs):
+        return sync_executor.submit(
+            functools.partial(self._task, name, error), **kwargs)
+
+    def test_concurrency_limit(self):
+        sync_executor = executor.SyncExecutor(2)
+        for name in range(5):
+            self._submit(sync_executor, name)
+
+        sync_executor.wait()
+
+        self.assertEqual(2, self.max_running)
+        self.assertEqual(5, len(self.calls))
+
+    def test_same_key_runs_in_order(self):
+        sync_executor = executor.SyncExecutor(4)
+        self._submit(sync_executor, 'first', key='lig')
+        self._submit(sync_executor, 'other', key='other_lig')
+        self._submit(sync_executor, 'second', key='lig')
+
+        sync_executor.wait()
+
+        self.assertLess(
+            self.calls.index('first'), self.calls.index('second'))
+
+    def test_same_key_runs_after_failure(self):
+        sync_executor = executor.SyncExecutor(4)
+        self._submit(sync_executor, 'first', ValueError(), key='lig')
+        self._submit(sync_executor, 'second', key='lig')
+
+        self.assertRaises(ValueError, sync_executor.wait)
+        self.assertEqual(['first', 'second'], self.calls)
+
+    def test_dependency(self):
+        sync_executor = executor.SyncExecutor(4)
+        create = self._submit(sync_executor, 'create')
+        self._submit(sync_executor, 'connect', depends_on=[create])
+
+        sync_executor.wait()
+
+        self.assertEqual(['create', 'connect'], self.calls)
+
+    def test_failed_dependency(self):
+        sync_executor = executor.SyncExecutor(4)
+        error = ValueError()
+        create = self._submit(sync_executor, 'create', error)
+        self._submit(sync_executor, 'connect', depends_on=[create])
+        self._submit(sync_executor, 'unrelated')
+
+        raised = self.assertRaises(ValueError, sync_executor.wait)
+
+        self.assertIs(error, raised)
+        self.assertEqual(['create', 'unrelated'], sorted(self.calls))
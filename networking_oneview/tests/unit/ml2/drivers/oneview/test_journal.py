@@ -0,0 +1,262 @@
+# Copyright 2018 Hewlett Packard Enterprise Development LP.
+# Copyright 2018 Universidade Federal de Campina Grande
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+from neutron.tests import base
+from oslo_serialization import jsonutils
+from oslo_service import loopingcall
+
+from networking_oneview.ml2.drivers.oneview import common
+from networking_oneview.ml2.drivers.oneview import database_manager
+from networking_oneview.ml2.drivers.oneview import journal
+from networking_oneview.tests.unit.ml2.drivers.oneview import \
+    test_oneview_mech_driver as mech_test
+
+
+def fake_entry(entry_id, object_type, operation, resource_dict,
+               retry_count=0, state=database_manager.JOURNAL_PENDING):
+    return mock.Mock(
+        id=entry_id, object_type=object_type, operation=operation,
+        object_uuid=resource_dict.get('id'),
+        data=jsonutils.dumps(resource_dict), retry_count=retry_count,
+        state=state)
+
+
+class JournalTestCase(base.BaseTestCase):
+    def setUp(self):
+        super(JournalTestCase, self).setUp()
+        self.journal = journal.Journal(
+            oneview_client=mock.MagicMock(),
+            neutron_oneview_client=mock.MagicMock())
+        self.neutron_client = self.journal.neutron_client
+
+    @mock.patch.object(loopingcall, 'FixedIntervalLoopingCall')
+    def test_start(self, mock_loop):
+        self.config(journal_workers=2, group='DEFAULT')
+
+        self.journal.start()
+
+        mock_loop.assert_called_with(self.journal.process)
+        self.assertEqual(2, mock_loop.return_value.start.call_count)
+
+    @mock.patch.object(database_manager, 'insert_journal_entry')
+    @mock.patch.object(database_manager, 'list_journal_entries')
+    def test_record(self, mock_list, mock_insert):
+        session = mock.MagicMock()
+        mock_list.return_value = []
+
+        journal.record(
+            session, journal.NETWORK, journal.CREATE,
+            mech_test.FAKE_VLAN_NETWORK)
+
+        mock_insert.assert_called_once_with(
+            session, journal.NETWORK, '3', journal.CREATE,
+            jsonutils.dumps(mech_test.FAKE_VLAN_NETWORK))
+
+    @mock.patch.object(database_manager, 'insert_journal_entry')
+    @mock.patch.object(database_manager, 'delete_pending_journal_entry')
+    @mock.patch.object(database_manager, 'list_journal_entries')
+    def test_record_network_created_and_deleted(
+            self, mock_list, mock_delete, mock_insert):
+        session = mock.MagicMock()
+        mock_list.return_value = [fake_entry(
+            1, journal.NETWORK, journal.CREATE, mech_test.FAKE_VLAN_NETWORK)]
+        mock_delete.return_value = True
+
+        journal.record(
+            session, journal.NETWORK, journal.DELETE,
+            mech_test.FAKE_VLAN_NETWORK)
+
+        mock_list.assert_called_once_with(
+            session, object_uuid='3', state=database_manager.JOURNAL_PENDING)
+        mock_delete.assert_called_once_with(session, 1)
+        self.assertFalse(mock_insert.called)
+
+    @mock.patch.object(database_manager, 'insert_journal_entry')
+    @mock.patch.object(database_manager, 'delete_pending_journal_entry')
+    @mock.patch.object(database_manager, 'list_journal_entries')
+    def test_record_network_creation_claimed(
+            self, mock_list, mock_delete, mock_insert):
+        session = mock.MagicMock()
+        mock_list.return_value = [fake_entry(
+            1, journal.NETWORK, journal.CREATE, mech_test.FAKE_VLAN_NETWORK)]
+        mock_delete.return_value = False
+
+        journal.record(
+            session, journal.NETWORK, journal.DELETE,
+            mech_test.FAKE_VLAN_NETWORK)
+
+        mock_insert.assert_called_once_with(
+            session, journal.NETWORK, '3', journal.DELETE,
+            jsonutils.dumps(mech_test.FAKE_VLAN_NETWORK))
+
+    @mock.patch.object(database_manager, 'insert_journal_entry')
+    @mock.patch.object(database_manager, 'delete_pending_journal_entry')
+    @mock.patch.object(database_manager, 'list_journal_entries')
+    def test_record_port_bound_again(
+            self, mock_list, mock_delete, mock_insert):
+        session = mock.MagicMock()
+        port = {'id': 'port_id', 'mac_address': '01:23:45:67:89:ab'}
+        mock_list.return_value = [
+            fake_entry(1, journal.PORT, journal.CREATE, {'id': 'port_id'}),
+            fake_entry(2, journal.PORT, journal.CREATE, {'id': 'port_id'})]
+        mock_delete.return_value = True
+
+        journal.record(session, journal.PORT, journal.CREATE, port)
+
+        mock_delete.assert_has_calls([
+            mock.call(session, 1), mock.call(session, 2)])
+        mock_insert.assert_called_once_with(
+            session, journal.PORT, 'port_id', journal.CREATE,
+            jsonutils.dumps(port))
+
+    @mock.patch.object(database_manager, 'insert_journal_entry')
+    @mock.patch.object(database_manager, 'delete_pending_journal_entry')
+    @mock.patch.object(database_manager, 'list_journal_entries')
+    def test_record_port_bound_and_deleted(
+            self, mock_list, mock_delete, mock_insert):
+        session = mock.MagicMock()
+        mock_list.return_value = [
+            fake_entry(1, journal.PORT, journal.CREATE, {'id': 'port_id'})]
+        mock_delete.return_value = True
+
+        journal.record(
+            session, journal.PORT, journal.DELETE, {'id': 'port_id'})
+
+        mock_delete.assert_called_once_with(session, 1)
+        mock_insert.assert_called_once_with(
+            session, journal.PORT, 'port_id', journal.DELETE,
+            jsonutils.dumps({'id': 'port_id'}))
+
+    @mock.patch.object(database_manager, 'delete_journal_entry')
+    @mock.patch.object(database_manager, 'claim_journal_entries')
+    @mock.patch.object(database_manager, 'reset_stale_journal_entries')
+    @mock.patch.object(common, 'get_database_session')
+    def test_process(self, mock_session, mock_reset, mock_claim,
+                     mock_delete):
+        session = mock_session()
+        mock_claim.side_effect = [[
+            fake_entry(1, journal.NETWORK, journal.CREATE,
+                       mech_test.FAKE_VLAN_NETWORK),
+            fake_entry(2, journal.NETWORK, journal.CREATE,
+                       mech_test.FAKE_FLAT_NETWORK),
+            fake_entry(3, journal.PORT, journal.DELETE, {'id': 'port_id'}),
+        ], []]
+
+        self.journal.process()
+
+        self.assertTrue(mock_reset.called)
+        self.neutron_client.network.create_bulk.assert_called_once_with(
+            session,
+            [mech_test.FAKE_VLAN_NETWORK, mech_test.FAKE_FLAT_NETWORK])
+        self.neutron_client.port.delete.assert_called_once_with(
+            session, {'id': 'port_id'})
+        self.assertFalse(self.neutron_client.network.create.called)
+        self.assertEqual(3, mock_delete.call_count)
+
+    @mock.patch.object(database_manager, 'delete_journal_entry')
+    @mock.patch.object(database_manager, 'update_journal_entry')
+    @mock.patch.object(database_manager, 'claim_journal_entries')
+    @mock.patch.object(database_manager, 'reset_stale_journal_entries')
+    @mock.patch.object(common, 'get_database_session')
+    def test_process_retry(self, mock_session, mock_reset, mock_claim,
+                           mock_update, mock_delete):
+        session = mock_session()
+        mock_claim.return_value = [
+            fake_entry(1, journal.NETWORK, journal.DELETE,
+                       mech_test.FAKE_VLAN_NETWORK),
+            fake_entry(2, journal.NETWORK, journal.CREATE,
+                       mech_test.FAKE_FLAT_NETWORK),
+        ]
+        self.neutron_client.network.delete.side_effect = Exception("BOOM")
+
+        self.journal.process()
+
+        mock_claim.assert_called_once_with(session, 20)
+        mock_update.assert_called_once_with(
+            session, 1, database_manager.JOURNAL_PENDING,
+            last_error='BOOM', retry_count=1)
+        self.neutron_client.network.create.assert_called_once_with(
+            session, mech_test.FAKE_FLAT_NETWORK)
+        mock_delete.assert_called_once_with(session, 2)
+
+    @mock.patch.object(database_manager, 'update_journal_entry')
+    @mock.patch.object(database_manager, 'claim_journal_entries')
+    @mock.patch.object(database_manager, 'reset_stale_journal_entries')
+    @mock.patch.object(common, 'get_database_session')
+    def test_process_failed(self, mock_session, mock_reset, mock_claim,
+                            mock_update):
+        session = mock_session()
+        self.config(journal_max_retries=2, group='DEFAULT')
+        mock_claim.return_value = [
+            fake_entry(1, journal.NETWORK, journal.DELETE,
+                       mech_test.FAKE_VLAN_NETWORK, retry_count=2)]
+        self.neutron_client.network.delete.side_effect = Exception("BOOM")
+
+        self.journal.process()
+
+        mock_update.assert_called_once_with(
+            session, 1, database_manager.JOURNAL_FAILED,
+            last_error='BOOM', retry_count=3)
+
+    @mock.patch.object(database_manager, 'get_neutron_oneview_network')
+    @mock.patch.object(database_manager, 'get_network_segment')
+    @mock.patch.object(database_manager, 'update_journal_entry')
+    @mock.patch.object(database_manager, 'claim_journal_entries')
+    @mock.patch.object(database_manager, 'reset_stale_journal_entries')
+    @mock.patch.object(common, 'get_database_session')
+    def test_process_port_network_not_reflected(
+            self, mock_session, mock_reset, mock_claim, mock_update,
+            mock_segment, mock_neutron_oneview_network):
+        session = mock_session()
+        mock_claim.return_value = [
+            fake_entry(1, journal.PORT, journal.CREATE,
+                       mech_test.FAKE_PORT)]
+        mock_segment.return_value = {
+            'physical_network': 'physnet', 'network_type': 'vlan'}
+        self.neutron_client.port.is_uplinkset_mapping.return_value = True
+        mock_neutron_oneview_network.return_value = None
+
+        self.journal.process()
+
+        self.assertFalse(self.neutron_client.port.create.called)
+        mock_update.assert_called_once_with(
+            session, 1, database_manager.JOURNAL_PENDING,
+            last_error=mock.ANY, retry_count=1)
+
+    def test_claim_journal_entries_ports_wait_for_networks(self):
+        session = mock.MagicMock()
+        port_dict = dict(mech_test.FAKE_PORT, network_id='net_id')
+        other_port_dict = dict(port_dict, id='other_port_id')
+        entries = [
+            fake_entry(1, journal.NETWORK, journal.CREATE, {'id': 'net_id'},
+                       state=database_manager.JOURNAL_PROCESSING),
+            fake_entry(2, journal.PORT, journal.CREATE, port_dict),
+            fake_entry(3, journal.PORT, journal.DELETE, other_port_dict),
+            fake_entry(4, journal.NETWORK, journal.DELETE, {'id': 'net_id'}),
+            fake_entry(5, journal.PORT, journal.DELETE,
+                       dict(port_dict, id='port_id', network_id='other')),
+            fake_entry(6, journal.NETWORK, journal.DELETE, {'id': 'other'}),
+            fake_entry(7, journal.NETWORK, journal.DELETE, {'id': 'free'}),
+        ]
+        query = session.query.return_value
+        query.filter.return_value.order_by.return_value.all.return_value = (
+            entries)
+        query.filter_by.return_value.update.return_value = 1
+
+        claimed = database_manager.claim_journal_entries(session, 20)
+
+        self.assertEqual([5, 7], [entry.id for entry in claimed])
@@ -0,0 +1,90 @@
+# Copyright 2018 Hewlett Packard Enterprise Development LP.
+# Copyright 2018 Universidade Federal de Campina Grande
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+from neutron.tests import base
+
+from networking_oneview.ml2.drivers.oneview import common
+from networking_oneview.ml2.drivers.oneview import database_manager
+from networking_oneview.ml2.drivers.oneview import lease
+
+
+@mock.patch.object(common, 'get_database_session')
+@mock.patch.object(database_manager, 'acquire_sync_lease')
+class LeaseTestCase(base.BaseTestCase):
+    def setUp(self):
+        super(LeaseTestCase, self).setUp()
+        self.lease = lease.Lease('synchronization', 30)
+
+    def test_acquire(self, mock_acquire, mock_session):
+        mock_acquire.return_value = True
+
+        self.assertTrue(self.lease.acquire())
+
+        mock_acquire.assert_called_once_with(
+            mock_session(), 'synchronization', self.lease.holder, 30)
+        self.assertTrue(self.lease.is_held())
+
+    def test_acquire_held_by_another_process(
+            self, mock_acquire, mock_session):
+        mock_acquire.return_value = False
+
+        self.assertFalse(self.lease.acquire())
+        self.assertFalse(self.lease.is_held())
+
+    def test_acquire_lost(self, mock_acquire, mock_session):
+        mock_acquire.return_value = True
+        self.lease.acquire()
+        mock_acquire.side_effect = Exception('database is gone')
+
+        self.assertFalse(self.lease.acquire())
+        self.assertFalse(self.lease.is_held())
+
+    @mock.patch('time.time')
+    def test_expired(self, mock_time, mock_acquire, mock_session):
+        mock_acquire.return_value = True
+        mock_time.return_value = 1000
+        self.lease.acquire()
+
+        mock_time.return_value = 1029
+        self.assertTrue(self.lease.is_held())
+        mock_time.return_value = 1030
+        self.assertFalse(self.lease.is_held())
+
+    @mock.patch.object(database_manager, 'release_sync_lease')
+    def test_release(self, mock_release, mock_acquire, mock_session):
+        mock_acquire.return_value = True
+        self.lease.acquire()
+
+        self.lease.release()
+
+        self.assertFalse(self.lease.is_held())
+        mock_release.assert_called_once_with(
+            mock_session(), 'synchronization', self.lease.holder)
+
+    @mock.patch.object(database_manager, 'release_sync_lease')
+    @mock.patch('oslo_service.loopingcall.FixedIntervalLoopingCall')
+    def test_release_stops_heartbeat(self, mock_loop, mock_release,
+                                     mock_acquire, mock_session):
+        self.lease.start()
+
+        self.lease.release()
+
+        self.assertTrue(mock_loop.return_value.stop.called)
+
+    def test_holders_are_unique(self, mock_acquire, mock_session):
+        self.assertNotEqual(
+            self.lease.holder, lease.Lease('synchronization', 30).holder)
@@ -16,14 +16,19 @@
 
 import copy
 import mock
+import threading
+import time
 
+from hpOneView import exceptions as oneview_exceptions
 from neutron.tests.unit.plugins.ml2 import _test_mech_agent as base
 
 from networking_oneview.ml2.drivers.oneview import common
 from networking_oneview.ml2.drivers.oneview import database_manager
 from networking_oneview.ml2.drivers.oneview import exceptions
+from networking_oneview.ml2.drivers.oneview import journal
 from networking_oneview.ml2.drivers.oneview import mech_oneview
 from networking_oneview.ml2.drivers.oneview import neutron_oneview_client
+from networking_oneview.ml2.drivers.oneview import synchronization
 
 FAKE_FLAT_ONEVIEW_NETWORK = {
     'id': '1',
@@ -75,6 +80,8 @@ UPLINKSET_MAPPINGS = {
 }
 FLAT_NET_MAPPINGS = {'physnet-mapped': ['112233AA']}
 FAKE_LIG = {
+    'uri': '/rest/logical-interconnect-groups/lig_123',
+    'eTag': 'etag_1',
     'uplinkSets': [FAKE_TAGGED_UPLINKSET, FAKE_UNTAGGED_UPLINKSET]
 }
 
@@ -169,9 +176,11 @@ class FakeNetwork(object):
 class OneViewMechanismDriverTestCase(base.AgentMechanismBaseTestCase):
     def setUp(self):
         super(OneViewMechanismDriverTestCase, self).setUp()
+        self.config(server_profile_patch=False, group='DEFAULT')
         common.get_oneview_client = mock.MagicMock()
         oneview_client = common.get_oneview_client()
         oneview_client.logical_interconnect_groups.get.return_value = FAKE_LIG
+        oneview_client.connection.put.return_value = (None, {})
         database_manager.get_neutron_oneview_network = mock.Mock(
             return_value=False
         )
@@ -337,11 +346,389 @@ class OneViewMechanismDriverTestCase(base.AgentMechanismBaseTestCase):
         self.assertFalse(client.ethernet_networks.create.called)
         self.assertFalse(mock_map_net.called)
 
+    @mock.patch.object(database_manager, 'insert_oneview_network_lig')
+    @mock.patch.object(database_manager, 'get_oneview_network_lig')
+    @mock.patch.object(database_manager, 'list_oneview_network_lig')
+    def test_update_network_lig(
+            self, mock_list_lig, mock_get_lig, mock_insert_lig):
+        client = self.driver.oneview_client
+        lig = copy.deepcopy(FAKE_LIG)
+        client.logical_interconnect_groups.get.return_value = lig
+        client.ethernet_networks.get.return_value = {
+            'uri': '/rest/ethernet-networks/net_1'}
+        client.uplink_sets.get_by.return_value = [{
+            'uri': '/rest/uplink-sets/uplinkset_vlan',
+            'logicalInterconnectUri': '/rest/logical-interconnects/li_1',
+            'ethernetNetworkType': 'Tagged',
+            'networkUris': []}]
+        client.logical_interconnects.get.return_value = {
+            'logicalInterconnectGroupUri': FAKE_LIG['uri']}
+        mock_list_lig.return_value = []
+        mock_get_lig.return_value = None
+
+        self.driver.neutron_oneview_client.network.update_network_lig(
+            'fake_session', 'net_1', 'vlan', 'physnet')
+
+        client.connection.put.assert_called_once_with(
+            FAKE_LIG['uri'], lig, custom_headers={'If-Match': 'etag_1'})
+        self.assertIn(
+            '/rest/ethernet-networks/net_1',
+            common.get_uplinkset_by_name_from_list(
+                lig.get('uplinkSets'), 'uplinkset_vlan')['networkUris'])
+        client.uplink_sets.add_ethernet_networks.assert_called_once_with(
+            '/rest/uplink-sets/uplinkset_vlan',
+            '/rest/ethernet-networks/net_1')
+        mock_insert_lig.assert_called_once_with(
+            'fake_session', 'net_1', 'lig_123', 'uplinkset_vlan')
+
+    @mock.patch.object(database_manager, 'insert_oneview_network_lig')
+    @mock.patch.object(database_manager, 'list_oneview_network_lig')
+    def test_update_network_ligs(self, mock_list_lig, mock_insert_lig):
+        client = self.driver.oneview_client
+        lig = copy.deepcopy(FAKE_LIG)
+        client.logical_interconnect_groups.get.return_value = lig
+        client.logical_interconnect_groups.get.reset_mock()
+        client.uplink_sets.get_by.return_value = []
+        mock_list_lig.return_value = []
+        networks = [('net_1', 'vlan', 'physnet'), ('net_2', 'vlan', 'physnet')]
+
+        self.driver.neutron_oneview_client.network.update_network_ligs(
+            'fake_session', networks)
+
+        client.logical_interconnect_groups.get.assert_called_once_with(
+            'lig_123')
+        client.connection.put.assert_called_once_with(
+            FAKE_LIG['uri'], lig, custom_headers={'If-Match': 'etag_1'})
+        uplinkset = common.get_uplinkset_by_name_from_list(
+            lig.get('uplinkSets'), 'uplinkset_vlan')
+        self.assertIn('/rest/ethernet-networks/net_1',
+                      uplinkset['networkUris'])
+        self.assertIn('/rest/ethernet-networks/net_2',
+                      uplinkset['networkUris'])
+        self.assertEqual(2, mock_insert_lig.call_count)
+
+    @mock.patch.object(database_manager, 'delete_oneview_network_lig')
+    @mock.patch.object(database_manager, 'insert_oneview_network_lig')
+    @mock.patch.object(database_manager, 'list_oneview_network_lig')
+    def test_update_network_ligs_oneview_failure(
+            self, mock_list_lig, mock_insert_lig, mock_delete_lig):
+        client = self.driver.oneview_client
+        client.logical_interconnect_groups.get.side_effect = (
+            lambda lig_id: copy.deepcopy(FAKE_LIG))
+        client.connection.put.side_effect = (
+            oneview_exceptions.HPOneViewException(
+                {'errorCode': 'INVALID_RESOURCE'}))
+        mock_list_lig.return_value = [mock.Mock(
+            oneview_network_id='net_1', oneview_lig_id='lig_123',
+            oneview_uplinkset_name='uplinkset_flat')]
+
+        self.assertRaises(
+            oneview_exceptions.HPOneViewException,
+            self.driver.neutron_oneview_client.network.update_network_ligs,
+            'fake_session', [('net_1', 'vlan', 'physnet')])
+
+        self.assertFalse(mock_insert_lig.called)
+        self.assertFalse(mock_delete_lig.called)
+
+    def test_is_lig_mapped(self):
+        network = self.driver.neutron_oneview_client.network
+
+        self.assertTrue(network.is_lig_mapped('lig_123', 'vlan', 'physnet'))
+        self.assertFalse(network.is_lig_mapped('lig_456', 'vlan', 'physnet'))
+        self.assertFalse(network.is_lig_mapped('lig_123', 'vlan', 'other'))
+
+    def test_update_lig_networks_merges_concurrent_update(self):
+        client = self.driver.oneview_client
+        outdated_lig = copy.deepcopy(FAKE_LIG)
+        updated_lig = copy.deepcopy(FAKE_LIG)
+        updated_lig['eTag'] = 'etag_2'
+        common.get_uplinkset_by_name_from_list(
+            updated_lig.get('uplinkSets'), 'uplinkset_vlan')[
+                'networkUris'] = ['/rest/ethernet-networks/other']
+        client.logical_interconnect_groups.get.side_effect = [
+            outdated_lig, updated_lig]
+        client.connection.put.side_effect = [
+            oneview_exceptions.HPOneViewException(
+                {'errorCode': 'PRECONDITION_FAILED'}),
+            (None, {})]
+
+        self.assertTrue(
+            self.driver.neutron_oneview_client.network._update_lig_networks(
+                'lig_123', {'uplinkset_vlan': set(['/rest/net_1'])}, {}))
+
+        self.assertEqual(2, client.connection.put.call_count)
+        client.connection.put.assert_called_with(
+            FAKE_LIG['uri'], updated_lig,
+            custom_headers={'If-Match': 'etag_2'})
+        self.assertEqual(
+            ['/rest/ethernet-networks/other', '/rest/net_1'],
+            common.get_uplinkset_by_name_from_list(
+                updated_lig.get('uplinkSets'), 'uplinkset_vlan')[
+                    'networkUris'])
+
+    def test_update_lig_networks_conflict_retries_exhausted(self):
+        self.config(lig_update_retries=1, group='DEFAULT')
+        client = self.driver.oneview_client
+        client.logical_interconnect_groups.get.side_effect = (
+            lambda lig_id: copy.deepcopy(FAKE_LIG))
+        client.connection.put.side_effect = (
+            oneview_exceptions.HPOneViewException(
+                {'errorCode': 'PRECONDITION_FAILED'}))
+
+        self.assertRaises(
+            oneview_exceptions.HPOneViewException,
+            self.driver.neutron_oneview_client.network._update_lig_networks,
+            'lig_123', {'uplinkset_vlan': set(['/rest/net_1'])}, {})
+        self.assertEqual(2, client.connection.put.call_count)
+
+    def test_update_lig_networks_other_error(self):
+        client = self.driver.oneview_client
+        client.logical_interconnect_groups.get.side_effect = (
+            lambda lig_id: copy.deepcopy(FAKE_LIG))
+        client.connection.put.side_effect = (
+            oneview_exceptions.HPOneViewException(
+                {'errorCode': 'INVALID_RESOURCE'}))
+
+        self.assertRaises(
+            oneview_exceptions.HPOneViewException,
+            self.driver.neutron_oneview_client.network._update_lig_networks,
+            'lig_123', {'uplinkset_vlan': set(['/rest/net_1'])}, {})
+        self.assertEqual(1, client.connection.put.call_count)
+
+    @mock.patch.object(database_manager, 'insert_oneview_network_lig')
+    @mock.patch.object(database_manager, 'list_oneview_network_lig')
+    def test_update_network_ligs_not_owned(
+            self, mock_list_lig, mock_insert_lig):
+        client = self.driver.oneview_client
+        client.logical_interconnect_groups.get.reset_mock()
+        mock_list_lig.return_value = []
+
+        self.driver.neutron_oneview_client.network.update_network_ligs(
+            'fake_session', [('net_1', 'vlan', 'physnet')],
+            owns_lig=lambda lig_id: False)
+
+        self.assertFalse(client.logical_interconnect_groups.get.called)
+        self.assertFalse(client.connection.put.called)
+        self.assertFalse(mock_insert_lig.called)
+
+    @mock.patch.object(database_manager, 'insert_oneview_network_lig')
+    @mock.patch.object(database_manager, 'list_oneview_network_lig')
+    def test_update_network_ligs_unchanged(
+            self, mock_list_lig, mock_insert_lig):
+        client = self.driver.oneview_client
+        lig = copy.deepcopy(FAKE_LIG)
+        uplinkset = common.get_uplinkset_by_name_from_list(
+            lig.get('uplinkSets'), 'uplinkset_vlan')
+        uplinkset['networkUris'] = ['/rest/ethernet-networks/net_1']
+        client.logical_interconnect_groups.get.return_value = lig
+        client.uplink_sets.get_by.return_value = []
+        mapped_lig = mock.Mock(
+            oneview_network_id='net_1', oneview_lig_id='lig_123',
+            oneview_uplinkset_name='uplinkset_vlan')
+        mock_list_lig.return_value = [mapped_lig]
+
+        self.driver.neutron_oneview_client.network.update_network_ligs(
+            'fake_session', [('net_1', 'vlan', 'physnet')])
+
+        self.assertFalse(client.connection.put.called)
+        self.assertFalse(mock_insert_lig.called)
+
+    @mock.patch.object(synchronization, 'Synchronization')
+    @mock.patch.object(common, 'delete_outdated_flat_mapped_networks')
+    def test_initialize(self, mock_delete_flat, mock_sync):
+        self.driver.initialize()
+
+        self.assertTrue(mock_delete_flat.called)
+        self.assertTrue(mock_sync.return_value.start.called)
+
+    @mock.patch.object(synchronization, 'Synchronization')
+    @mock.patch.object(common, 'delete_outdated_flat_mapped_networks')
+    def test_initialize_sync_service(self, mock_delete_flat, mock_sync):
+        self.config(sync_in_neutron_server=False, group='DEFAULT')
+
+        self.driver.initialize()
+
+        self.assertFalse(mock_delete_flat.called)
+        self.assertFalse(mock_sync.called)
+
+    @mock.patch.object(journal, 'record')
+    def test_bind_port_journal(self, mock_record):
+        self.config(journal_enabled=True, group='DEFAULT')
+        port_context = FakeContext()
+        port_context.network = mock.Mock(current={'id': 'net_id'})
+        client = self.driver.oneview_client
+
+        self.driver.bind_port(port_context)
+
+        self.assertFalse(mock_record.called)
+        self.assertFalse(client.server_profiles.update.called)
+
+    @mock.patch.object(journal, 'record')
+    def test_update_port_postcommit_journal(self, mock_record):
+        self.config(journal_enabled=True, group='DEFAULT')
+        port_context = FakeContext()
+        port_context.original = dict(
+            port_context.current, **{'binding:vif_type': 'unbound'})
+        port_context.current['binding:vif_type'] = 'other'
+
+        self.driver.update_port_postcommit(port_context)
+
+        mock_record.assert_called_once_with(
+            'fake_session', journal.PORT, journal.CREATE, port_context._port)
+
+    @mock.patch.object(journal, 'record')
+    def test_update_port_postcommit_journal_unchanged_binding(
+            self, mock_record):
+        self.config(journal_enabled=True, group='DEFAULT')
+        port_context = FakeContext()
+        port_context.current['binding:vif_type'] = 'other'
+        port_context.original = copy.deepcopy(port_context.current)
+
+        self.driver.update_port_postcommit(port_context)
+
+        self.assertFalse(mock_record.called)
+
+    @mock.patch.object(journal, 'record')
+    def test_update_port_postcommit_journal_binding_failed(
+            self, mock_record):
+        self.config(journal_enabled=True, group='DEFAULT')
+        port_context = FakeContext()
+        port_context.original = dict(
+            port_context.current, **{'binding:vif_type': 'unbound'})
+        port_context.current['binding:vif_type'] = 'binding_failed'
+
+        self.driver.update_port_postcommit(port_context)
+
+        self.assertFalse(mock_record.called)
+
+    @mock.patch.object(journal, 'record')
+    def test_create_network_postcommit_journal(self, mock_record):
+        self.config(journal_enabled=True, group='DEFAULT')
+        network_context = FakeContext()
+        network_context._network = FAKE_VLAN_NETWORK
+        client = self.driver.oneview_client
+
+        self.driver.create_network_postcommit(network_context)
+
+        mock_record.assert_called_once_with(
+            network_context._plugin_context._session, journal.NETWORK,
+            journal.CREATE, FAKE_VLAN_NETWORK)
+        self.assertFalse(client.ethernet_networks.create.called)
+
+    @mock.patch.object(database_manager, 'insert_oneview_bulk_networks')
+    @mock.patch.object(database_manager, 'map_neutron_network_to_oneview')
+    def test_create_bulk(self, mock_map_net, mock_insert_bulk):
+        client = self.driver.oneview_client
+        lig = copy.deepcopy(FAKE_LIG)
+        client.logical_interconnect_groups.get.return_value = lig
+        client.logical_interconnect_groups.get.reset_mock()
+        client.uplink_sets.get_by.return_value = []
+        client.ethernet_networks.get_range.return_value = [{
+            'name': 'Neutron physnet_123', 'vlanId': 123,
+            'uri': '/rest/ethernet-networks/net_123'
+        }]
+        client.ethernet_networks.create_bulk.return_value = [{
+            'name': 'Neutron physnet_124', 'vlanId': 124,
+            'uri': '/rest/ethernet-networks/net_124'
+        }]
+        second_vlan_network = dict(
+            FAKE_VLAN_NETWORK, id='5', **{'provider:segmentation_id': '124'})
+
+        self.driver.neutron_oneview_client.network.create_bulk(
+            'fake_session', [FAKE_VLAN_NETWORK, second_vlan_network])
+
+        client.ethernet_networks.get_range.assert_called_once_with(
+            'Neutron physnet', '123,124')
+        self.assertEqual(
+            '124',
+            client.ethernet_networks.create_bulk.call_args[0][0].get(
+                'vlanIdRange'))
+        self.assertFalse(client.ethernet_networks.create.called)
+        client.logical_interconnect_groups.get.assert_called_once_with(
+            'lig_123')
+        uplinkset = common.get_uplinkset_by_name_from_list(
+            lig.get('uplinkSets'), 'uplinkset_vlan')
+        self.assertIn('/rest/ethernet-networks/net_123',
+                      uplinkset['networkUris'])
+        self.assertIn('/rest/ethernet-networks/net_124',
+                      uplinkset['networkUris'])
+        mock_map_net.assert_any_call(
+            'fake_session', '3', 'net_123', True,
+            UPLINKSET_MAPPINGS['physnet'][2:])
+        mock_map_net.assert_any_call(
+            'fake_session', '5', 'net_124', True,
+            UPLINKSET_MAPPINGS['physnet'][2:])
+        mock_insert_bulk.assert_called_once_with(
+            'fake_session', 'physnet', ['net_124'])
+
+    @mock.patch.object(neutron_oneview_client.Network, 'create')
+    def test_create_bulk_single_network(self, mock_create):
+        client = self.driver.oneview_client
+
+        self.driver.neutron_oneview_client.network.create_bulk(
+            'fake_session', [FAKE_VLAN_NETWORK, FAKE_FLAT_NETWORK])
+
+        mock_create.assert_any_call('fake_session', FAKE_VLAN_NETWORK)
+        mock_create.assert_any_call('fake_session', FAKE_FLAT_NETWORK)
+        self.assertFalse(client.ethernet_networks.create_bulk.called)
+
+    @mock.patch.object(database_manager, 'claim_network_pool_entry')
+    def test_create_network_postcommit_pool(self, mock_claim):
+        network_context = FakeContext()
+        network_context._network = FAKE_VLAN_NETWORK
+        client = self.driver.oneview_client
+        self.driver.neutron_oneview_client.network.vlan_pool = {
+            'physnet': {123}}
+        mock_claim.return_value = 'net_123'
+
+        self.driver.create_network_postcommit(network_context)
+
+        mock_claim.assert_called_once_with(
+            network_context._plugin_context._session, 'physnet', 123,
+            FAKE_VLAN_NETWORK.get('id'), UPLINKSET_MAPPINGS['physnet'][2:])
+        self.assertFalse(client.ethernet_networks.create.called)
+        self.assertFalse(client.logical_interconnect_groups.update.called)
+
+    @mock.patch.object(database_manager, 'insert_oneview_bulk_networks')
+    @mock.patch.object(database_manager, 'insert_network_pool_entries')
+    def test_fill_pool(self, mock_insert, mock_insert_bulk):
+        client = self.driver.oneview_client
+        client.uplink_sets.get_by.return_value = []
+        client.ethernet_networks.get_range.return_value = []
+        client.ethernet_networks.create_bulk.return_value = [{
+            'name': 'Neutron physnet_124', 'vlanId': 124,
+            'uri': '/rest/ethernet-networks/net_124'
+        }]
+
+        self.driver.neutron_oneview_client.network.fill_pool(
+            'fake_session', 'physnet', [124])
+
+        client.ethernet_networks.get_range.assert_called_once_with(
+            'Neutron physnet', '124')
+        mock_insert.assert_called_once_with(
+            'fake_session', 'physnet', {124: 'net_124'})
+
+    @mock.patch.object(database_manager, 'delete_oneview_bulk_network')
+    @mock.patch.object(database_manager, 'delete_network_pool_entry')
+    def test_drain_pool(self, mock_delete, mock_delete_bulk):
+        client = self.driver.oneview_client
+        mock_delete.side_effect = [True, False]
+
+        self.driver.neutron_oneview_client.network.drain_pool(
+            'fake_session', ['net_123', 'net_124'])
+
+        client.ethernet_networks.delete.assert_called_once_with('net_123')
+        mock_delete_bulk.assert_called_once_with('fake_session', 'net_123')
+
+    @mock.patch.object(database_manager, 'delete_oneview_bulk_network')
+    @mock.patch.object(database_manager, 'release_network_pool_entry')
     @mock.patch.object(database_manager, 'get_neutron_oneview_network')
     @mock.patch.object(database_manager, 'delete_neutron_oneview_network')
     @mock.patch.object(database_manager, 'delete_oneview_network_lig')
     def test_delete_network_postcommit(self, mock_del_lig,
-                                       mock_del_net, mock_get_net):
+                                       mock_del_net, mock_get_net,
+                                       mock_release, mock_del_bulk):
+        mock_release.return_value = False
         network_context = FakeContext()
         network_context._network = FAKE_FLAT_NETWORK
         fake_network_obj = FakeNetwork()
@@ -352,6 +739,9 @@ class OneViewMechanismDriverTestCase(base.AgentMechanismBaseTestCase):
 
         client.ethernet_networks.delete.assert_called_with(
             fake_network_obj.oneview_network_id)
+        mock_del_bulk.assert_called_with(
+            network_context._plugin_context._session,
+            fake_network_obj.oneview_network_id)
         mock_del_net.assert_called_with(
             network_context._plugin_context._session,
             neutron_network_id=FAKE_FLAT_NETWORK.get('id')
@@ -361,6 +751,31 @@ class OneViewMechanismDriverTestCase(base.AgentMechanismBaseTestCase):
             oneview_network_id=fake_network_obj.oneview_network_id
         )
 
+    @mock.patch.object(database_manager, 'release_network_pool_entry')
+    @mock.patch.object(database_manager, 'get_neutron_oneview_network')
+    @mock.patch.object(database_manager, 'delete_neutron_oneview_network')
+    @mock.patch.object(database_manager, 'delete_oneview_network_lig')
+    def test_delete_network_postcommit_pool(self, mock_del_lig,
+                                            mock_del_net, mock_get_net,
+                                            mock_release):
+        mock_release.return_value = True
+        network_context = FakeContext()
+        network_context._network = FAKE_VLAN_NETWORK
+        fake_network_obj = FakeNetwork()
+        mock_get_net.return_value = fake_network_obj
+        client = self.driver.oneview_client
+
+        self.driver.delete_network_postcommit(network_context)
+
+        mock_release.assert_called_once_with(
+            network_context._plugin_context._session,
+            fake_network_obj.oneview_network_id)
+        self.assertFalse(client.ethernet_networks.delete.called)
+        mock_del_net.assert_called_with(
+            network_context._plugin_context._session,
+            neutron_network_id=FAKE_VLAN_NETWORK.get('id')
+        )
+
     @mock.patch.object(database_manager, 'get_neutron_oneview_network')
     @mock.patch.object(database_manager, 'delete_neutron_oneview_network')
     @mock.patch.object(database_manager, 'delete_oneview_network_lig')
@@ -637,7 +1052,7 @@ class OneViewMechanismDriverTestCase(base.AgentMechanismBaseTestCase):
         self.driver.bind_port(port_context)
 
         self.assertTrue(client.server_hardware.get.called)
-        self.assertTrue(client.server_profiles.get.called)
+        self.assertFalse(client.server_profiles.get.called)
         self.assertFalse(client.server_profiles.update.called)
 
     @mock.patch.object(database_manager, 'get_neutron_oneview_network')
@@ -719,3 +1134,279 @@ class OneViewMechanismDriverTestCase(base.AgentMechanismBaseTestCase):
         self.assertTrue(client.server_hardware.get.called)
         self.assertFalse(client.server_profiles.get.called)
         self.assertFalse(client.server_profiles.update.called)
+
+    def test_connection_batcher(self):
+        self.config(profile_update_window=1, group='DEFAULT')
+        batcher = neutron_oneview_client.ConnectionBatcher()
+        apply_changes = mock.Mock()
+        threads = [
+            threading.Thread(target=batcher.submit, args=(
+                self.server_hardware, change, apply_changes))
+            for change in ('add_connection', 'remove_connection')]
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(1, apply_changes.call_count)
+        server_hardware, changes = apply_changes.call_args[0]
+        self.assertEqual(self.server_hardware, server_hardware)
+        self.assertEqual(
+            ['add_connection', 'remove_connection'], sorted(changes))
+
+    def test_connection_batcher_queues_behind_update(self):
+        batcher = neutron_oneview_client.ConnectionBatcher()
+        applying = threading.Event()
+        release = threading.Event()
+        applied = []
+
+        def apply_changes(server_hardware, changes):
+            applied.append(sorted(changes))
+            if len(applied) == 1:
+                applying.set()
+                release.wait()
+
+        first_thread = threading.Thread(target=batcher.submit, args=(
+            self.server_hardware, 'add_connection', apply_changes))
+        first_thread.start()
+        applying.wait()
+        threads = [
+            threading.Thread(target=batcher.submit, args=(
+                self.server_hardware, change, apply_changes))
+            for change in ('add_connection', 'remove_connection')]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)
+
+        self.assertEqual(1, len(applied))
+        release.set()
+        for thread in [first_thread] + threads:
+            thread.join()
+        self.assertEqual(
+            [['add_connection'], ['add_connection', 'remove_connection']],
+            applied)
+
+    def test_connection_batcher_error(self):
+        batcher = neutron_oneview_client.ConnectionBatcher()
+        apply_changes = mock.Mock(side_effect=Exception("BOOM"))
+
+        self.assertRaises(
+            Exception, batcher.submit, self.server_hardware,
+            'add_connection', apply_changes)
+        batcher.submit(self.server_hardware, 'add_connection', mock.Mock())
+
+    @mock.patch.object(database_manager, 'get_neutron_oneview_network')
+    @mock.patch.object(database_manager, 'get_network_segment')
+    def test_delete_port_no_connection(self, mock_net_segment, mock_get_net):
+        port_context = FakeContext()
+        port_context._port['mac_address'] = 'aa:11:cc:33:ee:55'
+        mock_net_segment.return_value = FAKE_NETWORK_SEGMENT
+        mock_get_net.return_value = FakeNetwork()
+        client = self.driver.oneview_client
+        client.server_hardware.get.return_value = self.server_hardware
+        client.server_profiles.get.return_value = self.server_profile
+
+        self.driver.delete_port_postcommit(port_context)
+
+        self.assertTrue(client.server_profiles.get.called)
+        self.assertFalse(client.server_profiles.update.called)
+
+    def test_update_server_profile_unchanged(self):
+        client = self.driver.oneview_client
+        previous_connections = copy.deepcopy(
+            self.server_profile['connections'])
+
+        port_client = self.driver.neutron_oneview_client.port
+        updated = port_client.update_server_profile(
+            self.server_hardware, self.server_profile, previous_connections)
+
+        self.assertFalse(updated)
+        self.assertFalse(client.server_profiles.update.called)
+        self.assertFalse(client.server_hardware.update_power_state.called)
+
+    def test_update_server_profile_powered_off(self):
+        client = self.driver.oneview_client
+        self.server_hardware['powerState'] = 'Off'
+        previous_connections = copy.deepcopy(
+            self.server_profile['connections'])
+        self.server_profile['connections'] = []
+
+        self.driver.neutron_oneview_client.port.update_server_profile(
+            self.server_hardware, self.server_profile, previous_connections)
+
+        self.assertTrue(client.server_profiles.update.called)
+        self.assertFalse(client.server_hardware.update_power_state.called)
+
+    @mock.patch.object(common, '_offline_server_hardware_types', set())
+    def test_update_server_profile_online(self):
+        client = self.driver.oneview_client
+        previous_connections = copy.deepcopy(
+            self.server_profile['connections'])
+        self.server_profile['connections'][0]['networkUri'] = '/new_net_uri'
+
+        self.driver.neutron_oneview_client.port.update_server_profile(
+            self.server_hardware, self.server_profile, previous_connections)
+
+        client.server_profiles.update.assert_called_once_with(
+            resource=self.server_profile,
+            id_or_uri=self.server_profile.get('uri'))
+        self.assertFalse(client.server_hardware.update_power_state.called)
+
+    @mock.patch.object(common, '_offline_server_hardware_types', set())
+    def test_update_server_profile_online_rejected(self):
+        client = self.driver.oneview_client
+        self.server_hardware['serverHardwareTypeUri'] = '/fake_sht_uri'
+        previous_connections = copy.deepcopy(
+            self.server_profile['connections'])
+        self.server_profile['connections'][0]['networkUri'] = '/new_net_uri'
+        client.server_profiles.update.side_effect = [
+            oneview_exceptions.HPOneViewException(
+                {'errorCode': 'INVALID_POWER_STATE'}), None]
+
+        self.driver.neutron_oneview_client.port.update_server_profile(
+            self.server_hardware, self.server_profile, previous_connections)
+
+        self.assertEqual(2, client.server_profiles.update.call_count)
+        self.assertEqual(
+            2, client.server_hardware.update_power_state.call_count)
+        self.assertFalse(common.is_online_connection_update(
+            self.server_hardware, previous_connections,
+            self.server_profile['connections']))
+
+    @mock.patch.object(common, '_offline_server_hardware_types', set())
+    def test_update_server_profile_online_failed(self):
+        client = self.driver.oneview_client
+        previous_connections = copy.deepcopy(
+            self.server_profile['connections'])
+        self.server_profile['connections'][0]['networkUri'] = '/new_net_uri'
+        port_client = self.driver.neutron_oneview_client.port
+        for error_code in ('SESSION_EXPIRED', 'SERVICE_UNAVAILABLE'):
+            client.server_profiles.update.side_effect = (
+                oneview_exceptions.HPOneViewException(
+                    {'errorCode': error_code}))
+
+            self.assertRaises(
+                oneview_exceptions.HPOneViewException,
+                port_client.update_server_profile, self.server_hardware,
+                self.server_profile, previous_connections)
+
+        self.assertFalse(client.server_hardware.update_power_state.called)
+        self.assertTrue(common.is_online_connection_update(
+            self.server_hardware, previous_connections,
+            self.server_profile['connections']))
+
+    @mock.patch.object(common, '_offline_server_hardware_types', set())
+    def test_update_server_profile_online_invalid(self):
+        client = self.driver.oneview_client
+        previous_connections = copy.deepcopy(
+            self.server_profile['connections'])
+        self.server_profile['connections'][0]['networkUri'] = '/new_net_uri'
+        client.server_profiles.update.side_effect = [
+            oneview_exceptions.HPOneViewException(
+                {'errorCode': 'INVALID_RESOURCE'}), None]
+
+        self.driver.neutron_oneview_client.port.update_server_profile(
+            self.server_hardware, self.server_profile, previous_connections)
+
+        self.assertEqual(
+            2, client.server_hardware.update_power_state.call_count)
+        self.assertTrue(common.is_online_connection_update(
+            self.server_hardware, previous_connections,
+            self.server_profile['connections']))
+
+    def test_update_server_profile_power_cycle(self):
+        client = self.driver.oneview_client
+        previous_connections = copy.deepcopy(
+            self.server_profile['connections'])
+        self.server_profile['connections'].append({
+            'portId': 'Flb 1:1-b', 'networkUri': '/fake_net_uri',
+            'boot': {'priority': 'NotBootable'}})
+
+        self.driver.neutron_oneview_client.port.update_server_profile(
+            self.server_hardware, self.server_profile, previous_connections)
+
+        self.assertTrue(client.server_profiles.update.called)
+        client.server_hardware.update_power_state.assert_has_calls([
+            mock.call({'powerState': 'Off', 'powerControl': 'MomentaryPress'},
+                      '1122AA'),
+            mock.call({'powerState': 'On', 'powerControl': 'MomentaryPress'},
+                      '1122AA')])
+
+    @mock.patch.object(
+        common, '_server_profile_patch_state', {'supported': True})
+    def test_update_server_profile_patch(self):
+        self.config(server_profile_patch=True, group='DEFAULT')
+        client = self.driver.oneview_client
+        previous_connections = copy.deepcopy(
+            self.server_profile['connections'])
+        self.server_profile['connections'][0]['networkUri'] = '/new_net_uri'
+
+        self.driver.neutron_oneview_client.port.update_server_profile(
+            self.server_hardware, self.server_profile, previous_connections)
+
+        client.server_profiles.patch.assert_called_once_with(
+            '/fake_sp_uri', 'replace', '/connections/0/networkUri',
+            '/new_net_uri')
+        self.assertFalse(client.server_profiles.update.called)
+
+    @mock.patch.object(
+        common, '_server_profile_patch_state', {'supported': True})
+    def test_update_server_profile_patch_several_changes(self):
+        self.config(server_profile_patch=True, group='DEFAULT')
+        client = self.driver.oneview_client
+        previous_connections = copy.deepcopy(
+            self.server_profile['connections'])
+        self.server_profile['connections'][0]['networkUri'] = '/new_net_uri'
+        self.server_profile['connections'].append({'portId': 'Flb 1:1-b'})
+
+        self.driver.neutron_oneview_client.port.update_server_profile(
+            self.server_hardware, self.server_profile, previous_connections)
+
+        client.server_profiles.patch.assert_called_once_with(
+            '/fake_sp_uri', 'replace', '/connections',
+            self.server_profile['connections'])
+
+    @mock.patch.object(
+        common, '_server_profile_patch_state', {'supported': True})
+    def test_update_server_profile_patch_rejected(self):
+        self.config(server_profile_patch=True, group='DEFAULT')
+        client = self.driver.oneview_client
+        self.server_hardware['powerState'] = 'Off'
+        previous_connections = copy.deepcopy(
+            self.server_profile['connections'])
+        self.server_profile['connections'] = []
+        client.server_profiles.patch.side_effect = (
+            oneview_exceptions.HPOneViewException(
+                {'errorCode': 'UNSUPPORTED_OPERATION'}))
+
+        self.driver.neutron_oneview_client.port.update_server_profile(
+            self.server_hardware, self.server_profile, previous_connections)
+
+        client.server_profiles.patch.assert_called_once_with(
+            '/fake_sp_uri', 'remove', '/connections/0', None)
+        client.server_profiles.update.assert_called_once_with(
+            resource=self.server_profile,
+            id_or_uri=self.server_profile.get('uri'))
+        self.assertFalse(common.is_server_profile_patch_supported())
+
+    @mock.patch.object(
+        common, '_server_profile_patch_state', {'supported': True})
+    def test_update_server_profile_patch_failed(self):
+        self.config(server_profile_patch=True, group='DEFAULT')
+        client = self.driver.oneview_client
+        self.server_hardware['powerState'] = 'Off'
+        previous_connections = copy.deepcopy(
+            self.server_profile['connections'])
+        self.server_profile['connections'] = []
+        client.server_profiles.patch.side_effect = (
+            oneview_exceptions.HPOneViewException(
+                {'errorCode': 'RESOURCE_LOCKED'}))
+
+        self.assertRaises(
+            oneview_exceptions.HPOneViewException,
+            self.driver.neutron_oneview_client.port.update_server_profile,
+            self.server_hardware, self.server_profile, previous_connections)
+
+        self.assertFalse(client.server_profiles.update.called)
+        self.assertTrue(common.is_server_profile_patch_supported())
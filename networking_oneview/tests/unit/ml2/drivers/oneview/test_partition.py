@@ -0,0 +1,122 @@
+# Copyright 2018 Hewlett Packard Enterprise Development LP.
+# Copyright 2018 Universidade Federal de Campina Grande
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+from neutron.tests import base
+
+from networking_oneview.ml2.drivers.oneview import common
+from networking_oneview.ml2.drivers.oneview import database_manager
+from networking_oneview.ml2.drivers.oneview import partition
+
+KEYS = ['/rest/server-profiles/%s' % index for index in range(300)]
+
+
+class HashRingTestCase(base.BaseTestCase):
+    def test_get_member_empty_ring(self):
+        self.assertIsNone(partition.HashRing(()).get_member('key'))
+
+    def test_get_member_is_stable(self):
+        ring = partition.HashRing(['a', 'b', 'c'])
+        other_ring = partition.HashRing(['c', 'b', 'a'])
+
+        for key in KEYS:
+            self.assertEqual(ring.get_member(key), other_ring.get_member(key))
+
+    def test_keys_are_spread(self):
+        ring = partition.HashRing(['a', 'b', 'c'])
+
+        members = [ring.get_member(key) for key in KEYS]
+
+        for member in ('a', 'b', 'c'):
+            self.assertGreater(members.count(member), len(KEYS) // 6)
+
+    def test_leaving_member_only_moves_its_keys(self):
+        ring = partition.HashRing(['a', 'b', 'c'])
+        smaller_ring = partition.HashRing(['a', 'b'])
+
+        for key in KEYS:
+            member = ring.get_member(key)
+            if member != 'c':
+                self.assertEqual(member, smaller_ring.get_member(key))
+
+    def test_shard(self):
+        ring = partition.HashRing(['a', 'b'])
+        shard_a = partition.Shard(ring, 'a')
+        shard_b = partition.Shard(ring, 'b')
+
+        for key in KEYS:
+            self.assertNotEqual(shard_a.owns(key), shard_b.owns(key))
+
+
+@mock.patch.object(common, 'get_database_session')
+@mock.patch.object(database_manager, 'list_sync_members')
+@mock.patch.object(database_manager, 'heartbeat_sync_member')
+class MembershipTestCase(base.BaseTestCase):
+    def setUp(self):
+        super(MembershipTestCase, self).setUp()
+        self.membership = partition.Membership(30)
+
+    def test_heartbeat(self, mock_heartbeat, mock_list, mock_session):
+        mock_list.return_value = [self.membership.member_id]
+
+        self.membership.heartbeat()
+
+        mock_heartbeat.assert_called_once_with(
+            mock_session(), self.membership.member_id, 30)
+        mock_list.assert_called_once_with(mock_session(), 30)
+        shard = self.membership.shard()
+        self.assertTrue(all(shard.owns(key) for key in KEYS))
+
+    def test_heartbeat_rebalances(self, mock_heartbeat, mock_list,
+                                  mock_session):
+        mock_list.return_value = [self.membership.member_id]
+        self.membership.heartbeat()
+        mock_list.return_value = [self.membership.member_id, 'other']
+
+        self.membership.heartbeat()
+
+        shard = self.membership.shard()
+        owned_keys = [key for key in KEYS if shard.owns(key)]
+        self.assertTrue(0 < len(owned_keys) < len(KEYS))
+
+    def test_heartbeat_failure_keeps_members(
+            self, mock_heartbeat, mock_list, mock_session):
+        mock_list.return_value = [self.membership.member_id]
+        self.membership.heartbeat()
+        mock_heartbeat.side_effect = Exception('database is gone')
+
+        self.membership.heartbeat()
+
+        shard = self.membership.shard()
+        self.assertTrue(all(shard.owns(key) for key in KEYS))
+
+    def test_no_members_owns_nothing(self, mock_heartbeat, mock_list,
+                                     mock_session):
+        shard = self.membership.shard()
+
+        self.assertFalse(any(shard.owns(key) for key in KEYS))
+
+    @mock.patch.object(database_manager, 'delete_sync_member')
+    def test_leave(self, mock_delete, mock_heartbeat, mock_list,
+                   mock_session):
+        mock_list.return_value = [self.membership.member_id]
+        self.membership.heartbeat()
+
+        self.membership.leave()
+
+        mock_delete.assert_called_once_with(
+            mock_session(), self.membership.member_id)
+        self.assertFalse(self.membership.shard().owns(KEYS[0]))
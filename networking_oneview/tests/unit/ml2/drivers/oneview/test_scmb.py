@@ -0,0 +1,101 @@
+# Copyright 2018 Hewlett Packard Enterprise Development LP.
+# Copyright 2018 Universidade Federal de Campina Grande
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import kombu
+import mock
+
+from neutron.tests import base
+
+from networking_oneview.ml2.drivers.oneview import scmb
+
+
+class SCMBListenerTestCase(base.BaseTestCase):
+    def setUp(self):
+        super(SCMBListenerTestCase, self).setUp()
+        self.synchronization = mock.Mock()
+        self.connection = kombu.Connection('memory://')
+        self.addCleanup(self.connection.release)
+        self.listener = scmb.SCMBListener(
+            self.synchronization, self.connection)
+        self.listener.queue(self.connection.default_channel).declare()
+        self.exchange = kombu.Exchange(
+            scmb.SCMB_EXCHANGE, type='topic', durable=True)
+
+    def _publish(self, category, change_type, resource_uri):
+        with self.connection.Producer() as producer:
+            producer.publish(
+                {'resourceUri': resource_uri, 'changeType': change_type},
+                exchange=self.exchange, serializer='json',
+                routing_key='scmb.%s.%s.%s' % (
+                    category, change_type, resource_uri))
+
+    def test_run(self):
+        self._publish('enclosures', 'Updated', '/rest/enclosures/1')
+        self._publish('server-profiles', 'Updated', '/rest/server-profiles/1')
+        self.synchronization.reconcile_resource.side_effect = (
+            lambda *args: self.listener.stop())
+
+        self.listener.run()
+
+        self.synchronization.reconcile_resource.assert_called_once_with(
+            'server-profiles', '/rest/server-profiles/1', 'Updated')
+
+    @mock.patch('eventlet.sleep')
+    def test_run_follower(self, mock_sleep):
+        self._publish('server-profiles', 'Updated', '/rest/server-profiles/1')
+        self.synchronization.is_leader.return_value = False
+        mock_sleep.side_effect = lambda interval: self.listener.stop()
+
+        self.listener.run()
+
+        self.assertTrue(mock_sleep.called)
+        self.assertFalse(self.synchronization.reconcile_resource.called)
+
+    def test_on_message_json_string(self):
+        message = mock.Mock()
+
+        self.listener.on_message(
+            '{"resourceUri": "/rest/ethernet-networks/1", '
+            '"changeType": "Deleted"}', message)
+
+        self.synchronization.reconcile_resource.assert_called_once_with(
+            'ethernet-networks', '/rest/ethernet-networks/1', 'Deleted')
+        self.assertTrue(message.ack.called)
+
+    def test_on_message_failed_reconciliation(self):
+        message = mock.Mock()
+        self.synchronization.reconcile_resource.side_effect = ValueError()
+
+        self.listener.on_message({
+            'resourceUri': '/rest/logical-interconnect-groups/1',
+            'changeType': 'Updated'}, message)
+
+        self.assertTrue(message.ack.called)
+
+    def test_on_message_other_category(self):
+        message = mock.Mock()
+
+        self.listener.on_message({
+            'resourceUri': '/rest/enclosures/1', 'changeType': 'Updated'},
+            message)
+
+        self.assertFalse(self.synchronization.reconcile_resource.called)
+        self.assertTrue(message.ack.called)
+
+    def test_resource_category(self):
+        self.assertEqual('server-profiles', scmb.resource_category(
+            '/rest/server-profiles/1'))
+        self.assertIsNone(scmb.resource_category('/rest/version'))
+        self.assertIsNone(scmb.resource_category(None))
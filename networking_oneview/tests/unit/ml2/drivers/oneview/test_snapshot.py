@@ -0,0 +1,78 @@
+# Copyright 2018 Hewlett Packard Enterprise Development LP.
+# Copyright 2018 Universidade Federal de Campina Grande
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import copy
+import mock
+
+from hpOneView import exceptions as oneview_exceptions
+from neutron.tests import base
+
+from networking_oneview.ml2.drivers.oneview import snapshot
+from networking_oneview.tests.unit.ml2.drivers.oneview import \
+    test_oneview_mech_driver as mech_test
+
+
+class KnownNetworksTestCase(base.BaseTestCase):
+    def setUp(self):
+        super(KnownNetworksTestCase, self).setUp()
+        self.oneview_client = mock.MagicMock()
+        self.known_networks = snapshot.KnownNetworks(
+            self.oneview_client, ['/rest/ethernet-networks/1'])
+
+    def test_listed_network(self):
+        self.assertIn('/rest/ethernet-networks/1', self.known_networks)
+        self.assertFalse(self.oneview_client.ethernet_networks.get.called)
+
+    def test_removed_network(self):
+        self.oneview_client.ethernet_networks.get.side_effect = (
+            oneview_exceptions.HPOneViewException({'errorCode': 'NOT_FOUND'}))
+
+        self.assertNotIn('/rest/ethernet-networks/2', self.known_networks)
+        self.assertNotIn('/rest/ethernet-networks/2', self.known_networks)
+        self.oneview_client.ethernet_networks.get.assert_called_once_with('2')
+
+    def test_network_created_after_listing(self):
+        self.assertIn('/rest/ethernet-networks/2', self.known_networks)
+        self.assertIn('/rest/ethernet-networks/2', self.known_networks)
+        self.oneview_client.ethernet_networks.get.assert_called_once_with('2')
+
+    def test_no_network(self):
+        self.assertNotIn(None, self.known_networks)
+        self.assertFalse(self.oneview_client.ethernet_networks.get.called)
+
+
+class TopologySnapshotTestCase(base.BaseTestCase):
+    def test_load(self):
+        oneview_client = mock.MagicMock()
+        server_hardware = copy.deepcopy(mech_test.FAKE_SERVER_HARDWARE)
+        server_hardware['uri'] = '/fake_sh_uri'
+        server_profile = copy.deepcopy(mech_test.FAKE_SERVER_PROFILE)
+        oneview_client.server_hardware.get_all.return_value = [
+            server_hardware]
+        oneview_client.server_profiles.get_all.return_value = [
+            server_profile]
+        oneview_client.ethernet_networks.get_all.return_value = [
+            {'uri': '/fake_net_uri'}]
+
+        topology = snapshot.TopologySnapshot.load(oneview_client)
+
+        self.assertIs(server_hardware, topology.get_server_hardware('1122AA'))
+        self.assertIs(
+            server_hardware, topology.get_server_hardware('/fake_sh_uri'))
+        self.assertIs(
+            server_profile, topology.get_server_profile(server_hardware))
+        self.assertTrue(topology.has_ethernet_network('/fake_net_uri'))
+        self.assertFalse(oneview_client.server_hardware.get.called)
+        self.assertFalse(oneview_client.server_profiles.get.called)
@@ -0,0 +1,85 @@
+# Copyright 2018 Hewlett Packard Enterprise Development LP.
+# Copyright 2018 Universidade Federal de Campina Grande
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+from neutron.tests import base
+
+from networking_oneview.ml2.drivers.oneview import sync_plan
+
+
+class SyncPlanTestCase(base.BaseTestCase):
+    def setUp(self):
+        super(SyncPlanTestCase, self).setUp()
+        self.plan = sync_plan.SyncPlan()
+        self.calls = []
+
+    def _add(self, phase, name, error=None, **kwargs):
+        def apply():
+            self.calls.append(name)
+            if error:
+                raise error
+        self.plan.add(phase, 'operation ' + phase, apply, **kwargs)
+
+    def test_summary(self):
+        self._add(sync_plan.NETWORKS_DELETION, 'delete', rest_calls=1)
+        self._add(sync_plan.CONNECTIONS, 'update', rest_calls=3)
+        self._add(sync_plan.CONNECTIONS, 'update', rest_calls=1)
+        self._add(sync_plan.NETWORKS_CREATION, 'create', count=4,
+                  rest_calls=2)
+
+        self.assertEqual([
+            ((sync_plan.NETWORKS_CREATION, 'operation networks creation'),
+             (4, 2)),
+            ((sync_plan.CONNECTIONS, 'operation connections'), (2, 4)),
+            ((sync_plan.NETWORKS_DELETION, 'operation networks deletion'),
+             (1, 1)),
+        ], list(self.plan.summary().items()))
+        report = self.plan.report()
+        self.assertIn('4 actions, about 7 REST calls', report)
+        self.assertIn('connections: operation connections (2), about 4 '
+                      'REST calls', report)
+
+    def test_report_empty_plan(self):
+        self.assertEqual('Synchronization plan: nothing to change.',
+                         self.plan.report())
+
+    def test_apply_phases_in_order(self):
+        self._add(sync_plan.NETWORKS_DELETION, 'delete')
+        self._add(sync_plan.CONNECTIONS, 'update')
+        self._add(sync_plan.UPLINKSETS, 'uplinksets')
+        self._add(sync_plan.NETWORKS_CREATION, 'create')
+
+        self.plan.apply(4)
+
+        self.assertEqual(
+            ['create', 'uplinksets', 'update', 'delete'], self.calls)
+
+    def test_apply_stops_after_failed_phase(self):
+        error = ValueError()
+        self._add(sync_plan.NETWORKS_CREATION, 'create', error)
+        self._add(sync_plan.NETWORKS_CREATION, 'other create')
+        self._add(sync_plan.CONNECTIONS, 'update')
+
+        raised = self.assertRaises(ValueError, self.plan.apply, 4)
+
+        self.assertIs(error, raised)
+        self.assertEqual(['create', 'other create'], sorted(self.calls))
+
+    def test_plan_is_not_applied_when_built(self):
+        apply = mock.Mock()
+        self.plan.add(sync_plan.CONNECTIONS, 'update', apply)
+
+        self.assertFalse(apply.called)
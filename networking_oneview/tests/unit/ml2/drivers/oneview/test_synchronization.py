@@ -15,12 +15,18 @@
 
 import copy
 import mock
+import time
 
+from hpOneView import exceptions as oneview_exceptions
 from neutron.tests import base
+from oslo_serialization import jsonutils
 from oslo_service import loopingcall
 
 from networking_oneview.ml2.drivers.oneview import common
 from networking_oneview.ml2.drivers.oneview import database_manager
+from networking_oneview.ml2.drivers.oneview import snapshot
+from networking_oneview.ml2.drivers.oneview import sync_plan
+from networking_oneview.ml2.drivers.oneview import synchronization
 from networking_oneview.ml2.drivers.oneview.synchronization import \
     Synchronization as sync
 from networking_oneview.tests.unit.ml2.drivers.oneview import \
@@ -38,64 +44,242 @@ class SynchronizationTestCase(base.BaseTestCase):
             neutron_oneview_client=neutron_oneview_client,
             flat_net_mappings=flat_net_mappings)
 
-    @mock.patch.object(loopingcall, 'FixedIntervalLoopingCall')
+    @mock.patch.object(loopingcall, 'DynamicLoopingCall')
     def test_start(self, mock_loop):
+        self.config(sync_start_jitter=30, group='DEFAULT')
+        self.sync.lease = mock.Mock()
         self.sync.start()
+        self.assertTrue(self.sync.lease.start.called)
         heartbeat = mock_loop.return_value
-        mock_loop.assert_called_with(self.sync.synchronize)
+        mock_loop.assert_called_with(self.sync._scheduled_synchronize)
         self.assertTrue(heartbeat.start.called)
-
-    @mock.patch.object(sync, 'recreate_connection')
-    @mock.patch.object(sync, 'synchronize_uplinkset_from_mapped_networks')
-    @mock.patch.object(sync, 'delete_unmapped_oneview_networks')
-    @mock.patch.object(sync, 'create_oneview_networks_from_neutron')
+        initial_delay = heartbeat.start.call_args[1]['initial_delay']
+        self.assertTrue(0 <= initial_delay <= 30)
+
+    def _schedule(self, plan):
+        self.sync.lease = None
+        with mock.patch.object(sync, 'synchronize', return_value=plan):
+            return self.sync._scheduled_synchronize()
+
+    def test_scheduled_synchronize_adapts_interval(self):
+        self.config(sync_interval_min=100, sync_interval_max=1000,
+                    group='DEFAULT')
+        self.sync._interval = 400
+        drift = sync_plan.SyncPlan()
+        drift.add(sync_plan.CONNECTIONS, 'update server profiles', None)
+        in_sync = sync_plan.SyncPlan()
+        in_sync.add(sync_plan.CHECKPOINTS, 'record checkpoints', None)
+
+        delay = self._schedule(drift)
+        self.assertEqual(200, self.sync._interval)
+        self.assertTrue(180 <= delay <= 220)
+
+        self._schedule(drift)
+        self._schedule(drift)
+        self.assertEqual(100, self.sync._interval)
+
+        self._schedule(in_sync)
+        self.assertEqual(200, self.sync._interval)
+        for _ in range(4):
+            self._schedule(in_sync)
+        self.assertEqual(1000, self.sync._interval)
+
+    def test_scheduled_synchronize_default_bounds(self):
+        self.config(sync_interval=86400, group='DEFAULT')
+        self.sync._interval = 86400
+        drift = sync_plan.SyncPlan()
+        drift.add(sync_plan.CONNECTIONS, 'update server profiles', None)
+
+        self._schedule(drift)
+        self.assertEqual(86400, self.sync._interval)
+        self._schedule(sync_plan.SyncPlan())
+        self.assertEqual(86400, self.sync._interval)
+
+    def test_scheduled_synchronize_dry_run_keeps_interval(self):
+        self.config(sync_interval_min=100, sync_interval_max=1000,
+                    sync_dry_run=True, group='DEFAULT')
+        self.sync._interval = 400
+        drift = sync_plan.SyncPlan()
+        drift.add(sync_plan.CONNECTIONS, 'update server profiles', None)
+
+        delay = self._schedule(drift)
+        self.assertEqual(400, self.sync._interval)
+        self.assertTrue(360 <= delay <= 440)
+
+    def test_scheduled_synchronize_follower(self):
+        self.sync.lease = mock.Mock(duration=30)
+        self.sync.lease.is_held.return_value = False
+        self.sync._interval = 400
+
+        with mock.patch.object(sync, 'synchronize') as mock_synchronize:
+            delay = self.sync._scheduled_synchronize()
+
+        self.assertFalse(mock_synchronize.called)
+        self.assertEqual(30, delay)
+        self.assertEqual(400, self.sync._interval)
+
+    def test_scheduled_synchronize_partitioned(self):
+        self.sync.lease = mock.Mock(duration=30)
+        self.sync.lease.is_held.return_value = False
+        self.sync.membership = mock.Mock()
+
+        with mock.patch.object(sync, 'synchronize') as mock_synchronize:
+            self.sync._scheduled_synchronize()
+
+        self.assertTrue(mock_synchronize.called)
+
+    def test_scheduled_synchronize_failure(self):
+        self.config(sync_interval_min=100, sync_interval_max=1000,
+                    group='DEFAULT')
+        self.sync._interval = 400
+        self.sync.lease = None
+        with mock.patch.object(sync, 'synchronize', side_effect=ValueError):
+            delay = self.sync._scheduled_synchronize()
+
+        self.assertEqual(400, self.sync._interval)
+        self.assertTrue(360 <= delay <= 440)
+
+    @mock.patch.object(sync, '_plan_connections')
+    @mock.patch.object(sync, '_plan_uplinksets')
+    @mock.patch.object(sync, '_plan_network_deletion')
+    @mock.patch.object(sync, '_plan_network_pool')
+    @mock.patch.object(sync, '_plan_network_creation')
     def test_synchronize(
-        self, mock_create_networks, mock_delete_unmapped,
-        mock_synchronize_uplinkset, mock_recreate_connection
+        self, mock_plan_creation, mock_plan_pool, mock_plan_deletion,
+        mock_plan_uplinksets, mock_plan_connections
     ):
-        self.sync.synchronize()
+        create_networks = mock.Mock()
+        mock_plan_creation.side_effect = lambda plan: plan.add(
+            sync_plan.NETWORKS_CREATION, 'create networks', create_networks)
 
-        self.assertTrue(mock_create_networks.called)
-        self.assertFalse(mock_delete_unmapped.called)
-        self.assertFalse(mock_synchronize_uplinkset.called)
-        self.assertFalse(mock_recreate_connection.called)
+        self.sync.synchronize()
 
-    @mock.patch.object(sync, 'recreate_connection')
-    @mock.patch.object(sync, 'synchronize_uplinkset_from_mapped_networks')
-    @mock.patch.object(sync, 'delete_unmapped_oneview_networks')
-    @mock.patch.object(sync, 'create_oneview_networks_from_neutron')
+        self.assertTrue(mock_plan_creation.called)
+        self.assertTrue(mock_plan_pool.called)
+        self.assertFalse(mock_plan_deletion.called)
+        self.assertFalse(mock_plan_uplinksets.called)
+        self.assertFalse(mock_plan_connections.called)
+        create_networks.assert_called_once_with()
+
+    @mock.patch.object(sync, '_plan_connections')
+    @mock.patch.object(sync, '_plan_uplinksets')
+    @mock.patch.object(sync, '_plan_network_deletion')
+    @mock.patch.object(sync, '_plan_network_pool')
+    @mock.patch.object(sync, '_plan_network_creation')
     def test_synchronize_with_force_sync_delete(
-        self, mock_create_networks, mock_delete_unmapped,
-        mock_synchronize_uplinkset, mock_recreate_connection
+        self, mock_plan_creation, mock_plan_pool, mock_plan_deletion,
+        mock_plan_uplinksets, mock_plan_connections
     ):
         common.CONF.DEFAULT.force_sync_delete_ops = True
         self.sync.synchronize()
 
-        self.assertTrue(mock_create_networks.called)
-        self.assertTrue(mock_delete_unmapped.called)
-        self.assertTrue(mock_synchronize_uplinkset.called)
-        self.assertTrue(mock_recreate_connection.called)
+        self.assertTrue(mock_plan_creation.called)
+        self.assertTrue(mock_plan_deletion.called)
+        self.assertTrue(mock_plan_uplinksets.called)
+        self.assertTrue(mock_plan_connections.called)
+
+    @mock.patch.object(sync, '_plan_network_pool')
+    @mock.patch.object(sync, '_plan_network_creation')
+    def test_synchronize_dry_run(self, mock_plan_creation, mock_plan_pool):
+        self.config(sync_dry_run=True, group='DEFAULT')
+        create_networks = mock.Mock()
+        mock_plan_creation.side_effect = lambda plan: plan.add(
+            sync_plan.NETWORKS_CREATION, 'create networks', create_networks)
+
+        self.sync.synchronize()
 
-    @mock.patch.object(database_manager, 'get_neutron_oneview_network')
+        self.assertFalse(create_networks.called)
+
+    @mock.patch.object(database_manager, 'get_neutron_network_with_segment')
     @mock.patch.object(database_manager, 'delete_neutron_oneview_network')
     @mock.patch.object(database_manager, 'delete_oneview_network_lig')
-    @mock.patch.object(database_manager,
-                       'list_networks_and_segments_with_physnet')
+    @mock.patch.object(database_manager, 'list_neutron_oneview_network')
     @mock.patch.object(common, 'get_database_session')
-    def test_create_oneview_networks_from_neutron(
-            self, mock_session, mock_phys_net, mock_del_lig, mock_del_net,
-            mock_get_net):
+    def test_reconcile_deleted_network(
+            self, mock_session, mock_list_net, mock_del_lig, mock_del_net,
+            mock_network):
         session = mock_session()
-        client = self.sync.oneview_client
-        client.ethernet_networks.get.return_value = True
-        mock_get_net.return_value = None
-
-        mock_phys_net.return_value = [[
+        mock_list_net.return_value = [mock.Mock(
+            neutron_network_id='123', oneview_network_id='456')]
+        mock_network.return_value = (
             {'id': '123'},
+            {'physical_network': 'physnet', 'network_type': 'vlan',
+             'segmentation_id': '321'})
+
+        self.sync.reconcile_resource(
+            synchronization.ETHERNET_NETWORKS, '/rest/ethernet-networks/456',
+            'Deleted')
+
+        mock_list_net.assert_called_once_with(
+            session, oneview_network_id='456')
+        mock_del_net.assert_called_once_with(
+            session, neutron_network_id='123')
+        self.sync.neutron_client.network.create_bulk.assert_called_once_with(
+            session, [{
+                'provider:physical_network': 'physnet',
+                'provider:network_type': 'vlan',
+                'provider:segmentation_id': '321',
+                'id': '123',
+            }])
+
+    @mock.patch.object(sync, '_plan_connections')
+    def test_reconcile_updated_server_profile(self, mock_plan_connections):
+        self.config(force_sync_delete_ops=True, group='DEFAULT')
+        client = self.sync.oneview_client
+        server_profile = copy.deepcopy(mech_test.FAKE_SERVER_PROFILE)
+        server_profile['serverHardwareUri'] = '/rest/server-hardware/1'
+        client.server_profiles.get.return_value = server_profile
+        client.server_hardware.get.return_value = {
+            'uri': '/rest/server-hardware/1',
+            'serverProfileUri': server_profile.get('uri')}
+
+        self.sync.reconcile_resource(
+            synchronization.SERVER_PROFILES, '/rest/server-profiles/1',
+            'Updated')
+
+        client.server_hardware.get.assert_called_once_with(
+            '/rest/server-hardware/1')
+        topology = mock_plan_connections.call_args[0][1]
+        self.assertIs(server_profile, topology.get_server_profile(
+            client.server_hardware.get.return_value))
+        self.assertFalse(client.server_profiles.get_all.called)
+
+    @mock.patch.object(sync, '_plan_uplinksets')
+    @mock.patch.object(sync, '_plan_connections')
+    def test_reconcile_without_force_sync_delete(
+            self, mock_plan_connections, mock_plan_uplinksets):
+        self.config(force_sync_delete_ops=False, group='DEFAULT')
+
+        self.sync.reconcile_resource(
+            synchronization.SERVER_PROFILES, '/rest/server-profiles/1',
+            'Updated')
+        self.sync.reconcile_resource(
+            synchronization.LOGICAL_INTERCONNECT_GROUPS,
+            '/rest/logical-interconnect-groups/1', 'Updated')
+
+        self.assertFalse(self.sync.oneview_client.server_profiles.get.called)
+        self.assertFalse(mock_plan_connections.called)
+        self.assertFalse(mock_plan_uplinksets.called)
+
+    def _network_with_segment(self, network_id='123', mapping=None):
+        return (
+            {'id': network_id},
             {'physical_network': 'physnet',
              'network_type': 'vlan',
-             'segmentation_id': '321'}
-        ]]
+             'segmentation_id': '321'},
+            mapping
+        )
+
+    @mock.patch.object(database_manager, 'delete_neutron_oneview_network')
+    @mock.patch.object(database_manager, 'delete_oneview_network_lig')
+    @mock.patch.object(database_manager,
+                       'list_networks_and_segments_with_oneview_network')
+    @mock.patch.object(common, 'get_database_session')
+    def test_create_oneview_networks_from_neutron(
+            self, mock_session, mock_phys_net, mock_del_lig, mock_del_net):
+        session = mock_session()
+        client = self.sync.oneview_client
+        mock_phys_net.return_value = [self._network_with_segment()]
         network_dict = {
             'provider:physical_network': 'physnet',
             'provider:network_type': 'vlan',
@@ -107,38 +291,93 @@ class SynchronizationTestCase(base.BaseTestCase):
 
         self.assertFalse(mock_del_net.called)
         self.assertFalse(mock_del_lig.called)
-        self.sync.neutron_client.network.create.assert_called_with(
-            session, network_dict
+        self.assertFalse(client.ethernet_networks.get_all.called)
+        self.sync.neutron_client.network.create_bulk.assert_called_with(
+            session, [network_dict]
         )
 
-    @mock.patch.object(database_manager, 'get_neutron_oneview_network')
     @mock.patch.object(database_manager, 'delete_neutron_oneview_network')
     @mock.patch.object(database_manager, 'delete_oneview_network_lig')
     @mock.patch.object(database_manager,
-                       'list_networks_and_segments_with_physnet')
+                       'list_networks_and_segments_with_oneview_network')
     @mock.patch.object(common, 'get_database_session')
     def test_create_oneview_networks_from_neutron_inconsistent(
-            self, mock_session, mock_phys_net, mock_del_lig, mock_del_net,
-            mock_get_net):
+            self, mock_session, mock_phys_net, mock_del_lig, mock_del_net):
         client = self.sync.oneview_client
-        client.ethernet_networks.get.return_value = None
-        mock_phys_net.return_value = [[
-            {'id': '123'},
-            {'physical_network': 'physnet',
-             'network_type': 'vlan',
-             'segmentation_id': '321'}
-        ]]
+        client.ethernet_networks.get_all.return_value = []
+        mapping = mock.Mock(
+            neutron_network_id='123', oneview_network_id='456',
+            manageable=True)
+        mock_phys_net.return_value = [
+            self._network_with_segment(mapping=mapping)]
 
         self.sync.create_oneview_networks_from_neutron()
 
         self.assertTrue(mock_del_net.called)
         self.assertTrue(mock_del_lig.called)
+        self.assertTrue(self.sync.neutron_client.network.create_bulk.called)
 
-    @mock.patch.object(database_manager, 'get_neutron_network')
-    @mock.patch.object(database_manager, 'get_network_segment')
+    def test_get_oneview_network(self):
+        client = self.sync.oneview_client
+        client.ethernet_networks.get.side_effect = (
+            oneview_exceptions.HPOneViewException(
+                {'errorCode': 'RESOURCE_NOT_FOUND'}))
+
+        self.assertIsNone(self.sync.get_oneview_network('456'))
+
+        client.ethernet_networks.get.side_effect = (
+            oneview_exceptions.HPOneViewException(
+                {'errorCode': 'SESSION_EXPIRED'}))
+        self.assertRaises(
+            oneview_exceptions.HPOneViewException,
+            self.sync.get_oneview_network, '456')
+
+    @mock.patch.object(database_manager, 'delete_neutron_oneview_network')
+    @mock.patch.object(database_manager,
+                       'list_networks_and_segments_with_oneview_network')
+    @mock.patch.object(common, 'get_database_session')
+    def test_create_oneview_networks_from_neutron_single_listing(
+            self, mock_session, mock_phys_net, mock_del_net):
+        client = self.sync.oneview_client
+        client.ethernet_networks.get_all.return_value = [
+            {'name': 'Neutron [%s]' % network_id,
+             'uri': '/rest/ethernet-networks/ov-%s' % network_id}
+            for network_id in ('1', '2')]
+        mock_phys_net.return_value = [
+            self._network_with_segment(network_id, mapping=mock.Mock(
+                neutron_network_id=network_id,
+                oneview_network_id='ov-%s' % network_id,
+                manageable=True))
+            for network_id in ('1', '2')]
+        mock_phys_net.return_value.append(self._network_with_segment(
+            '3', mapping=mock.Mock(
+                neutron_network_id='3', oneview_network_id='flat-3',
+                manageable=False)))
+
+        self.sync.create_oneview_networks_from_neutron()
+
+        client.ethernet_networks.get_all.assert_called_once_with(
+            start=0, count=500, filter=synchronization.MANAGED_NETWORK_FILTER,
+            sort='name:ascending')
+        client.ethernet_networks.get.assert_called_once_with('flat-3')
+        self.assertFalse(mock_del_net.called)
+        self.assertFalse(self.sync.neutron_client.network.create_bulk.called)
+
+    def _set_neutron_networks(self, mock_networks, mock_segments,
+                              network_ids=('123',)):
+        mock_networks.return_value = [
+            {'id': network_id} for network_id in network_ids]
+        mock_segments.return_value = [
+            {'network_id': network_id, 'physical_network': 'physnet',
+             'network_type': 'flat'} for network_id in network_ids]
+
+    @mock.patch.object(database_manager, 'list_neutron_oneview_network')
+    @mock.patch.object(database_manager, 'list_networks_segments')
+    @mock.patch.object(database_manager, 'list_neutron_networks')
     @mock.patch.object(common, 'get_database_session')
-    def test_delete_unmapped_oneview_networks(self, mock_session,
-                                              mock_segment, mock_network):
+    def test_delete_unmapped_oneview_networks(
+            self, mock_session, mock_networks, mock_segments, mock_list_net):
+        self._set_neutron_networks(mock_networks, mock_segments)
         client = self.sync.oneview_client
         client.ethernet_networks.get_all.return_value = [{
             'name': 'Neutron [123]',
@@ -148,24 +387,58 @@ class SynchronizationTestCase(base.BaseTestCase):
 
         self.sync.delete_unmapped_oneview_networks()
 
+        client.ethernet_networks.get_all.assert_called_once_with(
+            start=0, count=500, filter=synchronization.MANAGED_NETWORK_FILTER,
+            sort='name:ascending')
         self.assertFalse(client.ethernet_networks.delete.called)
-        self.assertFalse(self.sync.neutron_client.network.delete.called)
+        network_client = self.sync.neutron_client.network
+        self.assertFalse(network_client.delete.called)
+        network_client.is_uplinkset_mapping.assert_called_with(
+            'physnet', 'flat')
+
+    @mock.patch.object(database_manager, 'release_network_pool_entry')
+    @mock.patch.object(database_manager, 'list_neutron_oneview_network')
+    @mock.patch.object(database_manager, 'list_networks_segments')
+    @mock.patch.object(database_manager, 'list_neutron_networks')
+    @mock.patch.object(common, 'get_database_session')
+    def test_delete_unmapped_oneview_networks_pages(
+            self, mock_session, mock_networks, mock_segments, mock_list_net,
+            mock_release):
+        mock_release.return_value = False
+        self.config(sync_page_size=2, group='DEFAULT')
+        self._set_neutron_networks(mock_networks, mock_segments)
+        client = self.sync.oneview_client
+        client.ethernet_networks.get_all.side_effect = [
+            [{'name': 'Neutron [1]', 'uri': '/fake_net_uri/1'},
+             {'name': 'Neutron [2]', 'uri': '/fake_net_uri/2'}],
+            [{'name': 'Neutron [3]', 'uri': '/fake_net_uri/3'}]]
+        self.sync.neutron_client.network.is_uplinkset_mapping.return_value = 1
 
+        self.sync.delete_unmapped_oneview_networks()
+
+        self.assertEqual(2, client.ethernet_networks.get_all.call_count)
+        self.assertEqual(
+            2, client.ethernet_networks.get_all.call_args[1]['start'])
+        self.assertEqual(3, client.ethernet_networks.delete.call_count)
+
+    @mock.patch.object(database_manager, 'release_network_pool_entry')
     @mock.patch.object(database_manager, 'delete_neutron_oneview_network')
     @mock.patch.object(database_manager, 'delete_oneview_network_lig')
-    @mock.patch.object(database_manager, 'get_neutron_network')
-    @mock.patch.object(database_manager, 'get_network_segment')
+    @mock.patch.object(database_manager, 'list_neutron_oneview_network')
+    @mock.patch.object(database_manager, 'list_networks_segments')
+    @mock.patch.object(database_manager, 'list_neutron_networks')
     @mock.patch.object(common, 'get_database_session')
     def test_delete_unmapped_oneview_networks_no_net(
-            self, mock_session, mock_segment, mock_network,
-            mock_del_lig, mock_del_net):
+            self, mock_session, mock_networks, mock_segments, mock_list_net,
+            mock_del_lig, mock_del_net, mock_release):
         session = mock_session()
+        mock_release.return_value = False
+        self._set_neutron_networks(mock_networks, mock_segments, ())
         client = self.sync.oneview_client
         client.ethernet_networks.get_all.return_value = [{
             'name': 'Neutron [123]',
             'uri': '/fake_net_uri/1234'
         }]
-        mock_network.return_value = None
         self.sync.neutron_client.network.is_uplinkset_mapping.return_value = 1
 
         self.sync.delete_unmapped_oneview_networks()
@@ -175,13 +448,138 @@ class SynchronizationTestCase(base.BaseTestCase):
         client.ethernet_networks.delete.assert_called_with('1234')
         self.assertFalse(self.sync.neutron_client.network.delete.called)
 
-    @mock.patch.object(database_manager, 'get_neutron_network')
-    @mock.patch.object(database_manager, 'get_network_segment')
+    @mock.patch.object(database_manager, 'delete_oneview_bulk_network')
+    @mock.patch.object(database_manager, 'list_oneview_bulk_networks')
+    @mock.patch.object(database_manager, 'list_neutron_oneview_network')
+    @mock.patch.object(database_manager, 'list_networks_segments')
+    @mock.patch.object(database_manager, 'list_neutron_networks')
+    @mock.patch.object(common, 'get_database_session')
+    def test_delete_unmapped_oneview_networks_bulk(
+            self, mock_session, mock_networks, mock_segments, mock_list_net,
+            mock_list_bulk, mock_del_bulk):
+        self._set_neutron_networks(mock_networks, mock_segments)
+        client = self.sync.oneview_client
+        client.ethernet_networks.get_all.return_value = [{
+            'name': 'Neutron physnet_321',
+            'uri': '/fake_net_uri/1234'
+        }, {
+            'name': 'Neutron physnet_322',
+            'uri': '/fake_net_uri/5678'
+        }, {
+            'name': 'Neutron physnet_323',
+            'uri': '/fake_net_uri/9012'
+        }]
+        mock_list_net.return_value = [mock.Mock(
+            neutron_network_id='123', oneview_network_id='1234')]
+        mock_list_bulk.return_value = [
+            mock.Mock(oneview_network_id='1234'),
+            mock.Mock(oneview_network_id='5678')]
+        self.sync.neutron_client.network.is_uplinkset_mapping.return_value = 1
+
+        self.sync.delete_unmapped_oneview_networks()
+
+        client.ethernet_networks.delete.assert_called_once_with('5678')
+        mock_del_bulk.assert_called_once_with(mock_session(), '5678')
+
+    @mock.patch.object(database_manager, 'list_network_pool')
+    @mock.patch.object(database_manager, 'list_neutron_oneview_network')
+    @mock.patch.object(database_manager, 'list_networks_segments')
+    @mock.patch.object(database_manager, 'list_neutron_networks')
+    @mock.patch.object(common, 'get_database_session')
+    def test_delete_unmapped_oneview_networks_pool(
+            self, mock_session, mock_networks, mock_segments, mock_list_net,
+            mock_list_pool):
+        self._set_neutron_networks(mock_networks, mock_segments)
+        client = self.sync.oneview_client
+        client.ethernet_networks.get_all.return_value = [{
+            'name': 'Neutron physnet_321',
+            'uri': '/fake_net_uri/1234'
+        }]
+        mock_list_net.return_value = []
+        mock_list_pool.return_value = [mock.Mock(
+            oneview_network_id='1234', neutron_network_id=None)]
+        self.sync.neutron_client.network.is_uplinkset_mapping.return_value = 1
+
+        self.sync.delete_unmapped_oneview_networks()
+
+        self.assertFalse(client.ethernet_networks.delete.called)
+
+    def _pool_entry(self, vlan_id, oneview_network_id,
+                    neutron_network_id=None):
+        return mock.Mock(
+            physical_network='physnet', vlan_id=vlan_id,
+            oneview_network_id=oneview_network_id,
+            neutron_network_id=neutron_network_id)
+
+    @mock.patch.object(database_manager, 'list_network_pool')
+    @mock.patch.object(database_manager, 'list_networks_segments')
+    @mock.patch.object(common, 'get_database_session')
+    def test_plan_network_pool(
+            self, mock_session, mock_segments, mock_list_pool):
+        network = self.sync.neutron_client.network
+        network.vlan_pool = {'physnet': {100, 101, 102, 103}}
+        mock_segments.return_value = [
+            {'physical_network': 'physnet', 'segmentation_id': 100}]
+        mock_list_pool.return_value = [
+            self._pool_entry(101, 'net_101'),
+            self._pool_entry(102, 'net_102'),
+            self._pool_entry(200, 'net_200'),
+            self._pool_entry(201, 'net_201', neutron_network_id='net')]
+        self.sync.oneview_client.ethernet_networks.get_all.return_value = [
+            {'uri': '/rest/ethernet-networks/net_101'},
+            {'uri': '/rest/ethernet-networks/net_200'},
+            {'uri': '/rest/ethernet-networks/net_201'}]
+        plan = sync_plan.SyncPlan()
+
+        self.sync._plan_network_pool(plan)
+
+        self.assertEqual(
+            [(sync_plan.NETWORKS_CREATION, 'remove missing pool networks', 1),
+             (sync_plan.NETWORKS_CREATION, 'fill network pool', 2),
+             (sync_plan.NETWORKS_DELETION, 'drain network pool', 1)],
+            [(action.phase, action.operation, action.count)
+             for action in plan.actions])
+        self.assertEqual(plan.actions[0].key, plan.actions[1].key)
+        with mock.patch.object(
+                database_manager, 'delete_network_pool_entry') as mock_delete:
+            with mock.patch.object(
+                    database_manager, 'delete_oneview_bulk_network'):
+                plan.actions[0].apply()
+        mock_delete.assert_called_once_with(mock_session(), 'net_102')
+        plan.actions[1].apply()
+        network.fill_pool.assert_called_once_with(
+            mock_session(), 'physnet', [102, 103])
+        plan.actions[2].apply()
+        network.drain_pool.assert_called_once_with(
+            mock_session(), ['net_200'])
+
+    @mock.patch.object(database_manager, 'list_network_pool')
+    @mock.patch.object(database_manager, 'list_networks_segments')
+    @mock.patch.object(common, 'get_database_session')
+    def test_plan_network_pool_not_owned(
+            self, mock_session, mock_segments, mock_list_pool):
+        self.sync.neutron_client.network.vlan_pool = {'physnet': {100}}
+        mock_segments.return_value = []
+        mock_list_pool.return_value = [self._pool_entry(200, 'net_200')]
+        shard = mock.Mock()
+        shard.owns.return_value = False
+        plan = sync_plan.SyncPlan(shard=shard)
+
+        self.sync._plan_network_pool(plan)
+
+        self.assertEqual([], plan.actions)
+        shard.owns.assert_called_with('physical-network:physnet')
+
+    @mock.patch.object(database_manager, 'list_neutron_oneview_network')
+    @mock.patch.object(database_manager, 'list_networks_segments')
+    @mock.patch.object(database_manager, 'list_neutron_networks')
     @mock.patch.object(sync, '_delete_connections')
     @mock.patch.object(common, 'get_database_session')
     def test_delete_unmapped_oneview_networks_not_mapped(
-            self, mock_session, mock_del_conn, mock_segment, mock_network):
+            self, mock_session, mock_del_conn, mock_networks, mock_segments,
+            mock_list_net):
         session = mock_session()
+        self._set_neutron_networks(mock_networks, mock_segments)
         client = self.sync.oneview_client
         client.ethernet_networks.get_all.return_value = [{
             'name': 'Neutron [123]',
@@ -197,11 +595,65 @@ class SynchronizationTestCase(base.BaseTestCase):
             session, {'id': '123'}
         )
 
+    @mock.patch.object(database_manager, 'list_neutron_oneview_network')
+    @mock.patch.object(database_manager, 'list_networks_segments')
+    @mock.patch.object(database_manager, 'list_neutron_networks')
+    @mock.patch.object(common, 'get_database_session')
+    def test_plan_network_deletion_partitioned(
+            self, mock_session, mock_networks, mock_segments, mock_list_net):
+        self._set_neutron_networks(mock_networks, mock_segments)
+        self.sync.oneview_client.ethernet_networks.get_all.return_value = [{
+            'name': 'Neutron [outdated_1]',
+            'uri': '/rest/ethernet-networks/1'
+        }, {
+            'name': 'Neutron [outdated_2]',
+            'uri': '/rest/ethernet-networks/2'
+        }]
+        shard = mock.Mock()
+        shard.owns.side_effect = lambda key: key.endswith('/1')
+        plan = sync_plan.SyncPlan(shard=shard)
+
+        self.sync._plan_network_deletion(plan)
+
+        self.assertEqual(1, len(plan.actions))
+        self.assertEqual('/rest/ethernet-networks/1', plan.actions[0].key)
+        self.assertEqual(
+            set(['/rest/ethernet-networks/1', '/rest/ethernet-networks/2']),
+            plan.removed_network_uris)
+        self.assertEqual(set(['outdated_1', 'outdated_2']),
+                         plan.removed_neutron_network_ids)
+
+    @mock.patch.object(database_manager, 'list_neutron_oneview_network')
+    @mock.patch.object(database_manager, 'list_networks_segments')
+    @mock.patch.object(database_manager, 'list_neutron_networks')
+    @mock.patch.object(common, 'get_database_session')
+    def test_plan_network_deletion_used_by_other_process(
+            self, mock_session, mock_networks, mock_segments, mock_list_net):
+        self._set_neutron_networks(mock_networks, mock_segments)
+        self.sync.oneview_client.ethernet_networks.get_all.return_value = [{
+            'name': 'Neutron [outdated_1]',
+            'uri': '/rest/ethernet-networks/1'
+        }]
+        topology = snapshot.TopologySnapshot([], [{
+            'uri': '/rest/server-profiles/other',
+            'connections': [{'networkUri': '/rest/ethernet-networks/1'}]
+        }], snapshot.KnownNetworks(self.sync.oneview_client, ()))
+        shard = mock.Mock()
+        shard.owns.side_effect = lambda key: key.endswith('/1')
+        plan = sync_plan.SyncPlan(shard=shard)
+
+        self.sync._plan_network_deletion(plan, topology)
+
+        self.assertEqual([], plan.actions)
+        self.assertEqual(set(['/rest/ethernet-networks/1']),
+                         plan.removed_network_uris)
+
     @mock.patch.object(database_manager, 'list_neutron_oneview_network')
     @mock.patch.object(database_manager, 'get_network_segment')
     @mock.patch.object(common, 'get_database_session')
     def test_synchronize_uplinkset_from_mapped_networks(
             self, mock_session, mock_segment, mock_list_net):
+        self.config(batch_lig_updates=False, group='DEFAULT')
         session = mock_session()
         fake_network = mech_test.FakeNetwork()
         mock_list_net.return_value = [fake_network]
@@ -216,6 +668,88 @@ class SynchronizationTestCase(base.BaseTestCase):
             session, fake_network.oneview_network_id, 'flat', 'physnet'
         )
 
+    @mock.patch.object(database_manager, 'list_neutron_oneview_network')
+    @mock.patch.object(database_manager, 'get_network_segment')
+    @mock.patch.object(common, 'get_database_session')
+    def test_synchronize_uplinkset_from_mapped_networks_batched(
+            self, mock_session, mock_segment, mock_list_net):
+        session = mock_session()
+        fake_network = mech_test.FakeNetwork()
+        other_network = mech_test.FakeNetwork()
+        other_network.oneview_network_id = '67890'
+        mock_list_net.return_value = [fake_network, other_network]
+        mock_segment.return_value = {
+            'network_type': 'vlan',
+            'physical_network': 'physnet'
+        }
+
+        self.sync.synchronize_uplinkset_from_mapped_networks()
+
+        network_client = self.sync.neutron_client.network
+        self.assertFalse(network_client.update_network_lig.called)
+        network_client.update_network_ligs.assert_called_once_with(
+            session, [
+                (fake_network.oneview_network_id, 'vlan', 'physnet'),
+                (other_network.oneview_network_id, 'vlan', 'physnet')
+            ], mock.ANY)
+
+    @mock.patch.object(database_manager, 'list_neutron_oneview_network')
+    @mock.patch.object(database_manager, 'get_network_segment')
+    @mock.patch.object(common, 'get_database_session')
+    def test_plan_uplinksets_concurrent(
+            self, mock_session, mock_segment, mock_list_net):
+        self.config(batch_lig_updates=False, group='DEFAULT')
+        fake_network = mech_test.FakeNetwork()
+        other_network = mech_test.FakeNetwork()
+        other_network.oneview_network_id = '67890'
+        mock_list_net.return_value = [fake_network, other_network]
+        mock_segment.return_value = {
+            'network_type': 'vlan', 'physical_network': 'physnet'}
+        plan = sync_plan.SyncPlan()
+
+        self.sync._plan_uplinksets(plan)
+
+        self.assertEqual(
+            ['/rest/ethernet-networks/12345', '/rest/ethernet-networks/67890'],
+            [action.key for action in plan.actions])
+
+    @mock.patch.object(database_manager, 'list_oneview_network_lig')
+    @mock.patch.object(database_manager, 'list_neutron_oneview_network')
+    @mock.patch.object(database_manager, 'get_network_segment')
+    @mock.patch.object(common, 'get_database_session')
+    def test_plan_uplinksets_single_lig(
+            self, mock_session, mock_segment, mock_list_net, mock_list_lig):
+        self.config(batch_lig_updates=False, group='DEFAULT')
+        session = mock_session()
+        in_lig = mech_test.FakeNetwork()
+        mapped_to_lig = mech_test.FakeNetwork()
+        mapped_to_lig.oneview_network_id = '67890'
+        unrelated = mech_test.FakeNetwork()
+        unrelated.oneview_network_id = '13579'
+        mock_list_net.return_value = [in_lig, mapped_to_lig, unrelated]
+        mock_list_lig.return_value = [mock.Mock(
+            oneview_network_id=in_lig.oneview_network_id)]
+        mock_segment.side_effect = lambda session, network_id: {
+            'network_type': 'vlan', 'physical_network': 'physnet'}
+        network_client = self.sync.neutron_client.network
+        network_client.is_lig_mapped.side_effect = [True, False]
+        plan = sync_plan.SyncPlan()
+
+        self.sync._plan_uplinksets(plan, lig_id='lig_1')
+
+        mock_list_lig.assert_called_once_with(session, oneview_lig_id='lig_1')
+        self.assertEqual(1, len(plan.actions))
+        plan.actions[0].apply()
+        self.assertFalse(network_client.update_network_lig.called)
+        network_client.update_network_ligs.assert_called_once_with(
+            session, [
+                (in_lig.oneview_network_id, 'vlan', 'physnet'),
+                (mapped_to_lig.oneview_network_id, 'vlan', 'physnet')
+            ], mock.ANY)
+        owns_lig = network_client.update_network_ligs.call_args[0][2]
+        self.assertTrue(owns_lig('lig_1'))
+        self.assertFalse(owns_lig('lig_2'))
+
     @mock.patch.object(database_manager, 'list_neutron_oneview_network')
     @mock.patch.object(database_manager, 'get_network_segment')
     @mock.patch.object(common, 'get_database_session')
@@ -231,106 +765,237 @@ class SynchronizationTestCase(base.BaseTestCase):
             self.sync.neutron_client.network.update_network_lig.called
         )
 
+    def _set_topology(self, server_profile, networks=()):
+        client = self.sync.oneview_client
+        client.server_hardware.get_all.return_value = [
+            copy.deepcopy(mech_test.FAKE_SERVER_HARDWARE)]
+        client.server_profiles.get_all.return_value = [server_profile]
+        client.ethernet_networks.get_all.return_value = [
+            {'uri': network_uri} for network_uri in networks]
+
+    def _bound_port(self, mac_address='aa:11:cc:33:ee:44'):
+        return [
+            {'network_id': '123', 'mac_address': mac_address},
+            {'vnic_type': 'baremetal',
+             'profile': jsonutils.dumps(mech_test.FAKE_PORT.get(
+                 'binding:profile'))}
+        ]
+
     @mock.patch.object(database_manager, 'get_port_with_binding_profile')
     @mock.patch.object(database_manager, 'list_neutron_oneview_network')
-    @mock.patch.object(
-        common, 'server_hardware_from_local_link_information_list')
-    @mock.patch.object(common, 'local_link_information_from_port')
-    @mock.patch.object(sync, '_update_connection')
-    @mock.patch.object(sync, '_fix_connections_with_removed_networks')
     @mock.patch.object(common, 'get_database_session')
     def test_recreate_connection(
-            self, mock_session, mock_fix_sp, mock_update,
-            mock_lli, mock_sh, mock_list_net, mock_port):
-        client = self.sync.neutron_client
-        mock_port.return_value = [[
-            {'network_id': '123',
-             'mac_address': 'aa:11:cc:33:ee:44'},
-            {'vnic_type': 'baremetal',
-             'profile': '1111'}
-        ]]
+            self, mock_session, mock_list_net, mock_port):
+        mock_port.return_value = [self._bound_port()]
         fake_network = mech_test.FakeNetwork()
         mock_list_net.return_value = [fake_network]
+        network_uri = (
+            '/rest/ethernet-networks/' + fake_network.oneview_network_id)
         server_profile = copy.deepcopy(mech_test.FAKE_SERVER_PROFILE)
-        server_profile['connections'][0]['networkUri'] = (
-            '/rest/ethernet-networks/' + fake_network.oneview_network_id
-        )
-        client.port.server_profile_from_server_hardware.return_value = (
-            server_profile
-        )
+        server_profile['connections'][0]['networkUri'] = network_uri
+        self._set_topology(server_profile, [network_uri])
 
         self.sync.recreate_connection()
 
-        mock_fix_sp.assert_called_with(server_profile)
-        self.assertFalse(mock_update.called)
-        self.assertFalse(self.sync.neutron_client.port.create.called)
+        port_client = self.sync.neutron_client.port
+        self.assertFalse(port_client.update_server_profile.called)
+        self.assertFalse(port_client.create.called)
+        self.assertFalse(self.sync.oneview_client.server_hardware.get.called)
+        self.assertFalse(self.sync.oneview_client.server_profiles.get.called)
+
+    def test_is_full_sweep_due(self):
+        self.config(sync_full_sweep_interval=60, group='DEFAULT')
+        self.assertTrue(self.sync._is_full_sweep_due())
+
+        self.sync._last_full_sweep = time.time()
+        self.assertFalse(self.sync._is_full_sweep_due())
+
+        self.sync._last_full_sweep -= 60
+        self.assertTrue(self.sync._is_full_sweep_due())
+
+        self.config(sync_full_sweep_interval=0, group='DEFAULT')
+        self.sync._last_full_sweep = time.time()
+        self.assertTrue(self.sync._is_full_sweep_due())
+
+    def _set_synced_topology(self, mock_list_net, mock_port):
+        mock_port.return_value = [self._bound_port()]
+        fake_network = mech_test.FakeNetwork()
+        mock_list_net.return_value = [fake_network]
+        network_uri = (
+            '/rest/ethernet-networks/' + fake_network.oneview_network_id)
+        server_profile = copy.deepcopy(mech_test.FAKE_SERVER_PROFILE)
+        server_profile['connections'][0]['networkUri'] = network_uri
+        server_profile['eTag'] = 'etag'
+        self._set_topology(server_profile, [network_uri])
+        return server_profile
+
+    @mock.patch.object(database_manager, 'set_sync_checkpoints')
+    @mock.patch.object(database_manager, 'list_sync_checkpoints')
+    @mock.patch.object(database_manager, 'get_port_with_binding_profile')
+    @mock.patch.object(database_manager, 'list_neutron_oneview_network')
+    @mock.patch.object(common, 'get_database_session')
+    def test_plan_connections_records_checkpoint(
+            self, mock_session, mock_list_net, mock_port, mock_checkpoints,
+            mock_set_checkpoints):
+        server_profile = self._set_synced_topology(mock_list_net, mock_port)
+        mock_checkpoints.return_value = []
+        plan = sync_plan.SyncPlan()
+
+        self.sync._plan_connections(plan)
+        plan.apply(1)
+
+        self.assertEqual([(sync_plan.CHECKPOINTS, 'record checkpoints')],
+                         list(plan.summary()))
+        checkpoints = mock_set_checkpoints.call_args[0][1]
+        self.assertEqual(
+            'etag', checkpoints[server_profile.get('uri')][1])
+
+    @mock.patch.object(database_manager, 'set_sync_checkpoints')
+    @mock.patch.object(database_manager, 'list_sync_checkpoints')
+    @mock.patch.object(database_manager, 'get_port_with_binding_profile')
+    @mock.patch.object(database_manager, 'list_neutron_oneview_network')
+    @mock.patch.object(common, 'get_database_session')
+    def test_plan_connections_skips_unchanged_server_profile(
+            self, mock_session, mock_list_net, mock_port, mock_checkpoints,
+            mock_set_checkpoints):
+        server_profile = self._set_synced_topology(mock_list_net, mock_port)
+        mock_checkpoints.return_value = []
+        plan = sync_plan.SyncPlan()
+        self.sync._plan_connections(plan)
+        plan.apply(1)
+        neutron_state, etag = mock_set_checkpoints.call_args[0][1][
+            server_profile.get('uri')]
+        mock_checkpoints.return_value = [mock.Mock(
+            resource_uri=server_profile.get('uri'),
+            neutron_state=neutron_state, oneview_etag=etag)]
+        incremental_plan = sync_plan.SyncPlan(full_sweep=False)
+
+        with mock.patch.object(sync, '_plan_server_profile') as mock_plan:
+            self.sync._plan_connections(incremental_plan)
+
+        self.assertFalse(mock_plan.called)
+        self.assertEqual([], incremental_plan.actions)
 
     @mock.patch.object(database_manager, 'get_port_with_binding_profile')
     @mock.patch.object(database_manager, 'list_neutron_oneview_network')
-    @mock.patch.object(
-        common, 'server_hardware_from_local_link_information_list')
-    @mock.patch.object(common, 'local_link_information_from_port')
-    @mock.patch.object(sync, '_update_connection')
-    @mock.patch.object(sync, '_fix_connections_with_removed_networks')
     @mock.patch.object(common, 'get_database_session')
     def test_recreate_connection_different_network(
-            self, mock_session, mock_fix_sp, mock_update,
-            mock_lli, mock_sh, mock_list_net, mock_port):
-        client = self.sync.neutron_client
-        mock_port.return_value = [[
-            {'network_id': '123',
-             'mac_address': 'aa:11:cc:33:ee:44'},
-            {'vnic_type': 'baremetal',
-             'profile': '1111'}
-        ]]
+            self, mock_session, mock_list_net, mock_port):
+        mock_port.return_value = [self._bound_port()]
         fake_network = mech_test.FakeNetwork()
         mock_list_net.return_value = [fake_network]
         server_profile = copy.deepcopy(mech_test.FAKE_SERVER_PROFILE)
-        client.port.server_profile_from_server_hardware.return_value = (
-            server_profile
-        )
+        previous_connections = copy.deepcopy(server_profile['connections'])
+        self._set_topology(server_profile, ['/fake_net_uri'])
 
         self.sync.recreate_connection()
 
-        mock_fix_sp.assert_called_with(server_profile)
-        mock_update.assert_called_with(
+        port_client = self.sync.neutron_client.port
+        port_client.update_server_profile.assert_called_once_with(
+            mock.ANY, server_profile, previous_connections)
+        self.assertEqual(
             '/rest/ethernet-networks/' + fake_network.oneview_network_id,
-            server_profile,
-            server_profile.get('connections')[0]
-        )
-        self.assertFalse(self.sync.neutron_client.port.create.called)
+            server_profile['connections'][0]['networkUri'])
+        self.assertFalse(port_client.create.called)
+
+    @mock.patch.object(database_manager, 'get_port_with_binding_profile')
+    @mock.patch.object(database_manager, 'list_neutron_oneview_network')
+    @mock.patch.object(common, 'is_port_valid_to_reflect_on_oneview')
+    @mock.patch.object(common, 'get_database_session')
+    def test_recreate_connection_same_server_profile(
+            self, mock_session, mock_valid, mock_list_net, mock_port):
+        mock_port.return_value = [
+            self._bound_port(), self._bound_port('aa:11:cc:33:ee:55')]
+        mock_valid.return_value = True
+        fake_network = mech_test.FakeNetwork()
+        mock_list_net.return_value = [fake_network]
+        server_profile = copy.deepcopy(mech_test.FAKE_SERVER_PROFILE)
+        server_profile['connections'].append({
+            'portId': '5678', 'networkUri': '/removed_net_uri',
+            'mac': 'aa:11:cc:33:ee:66', 'boot': {'priority': 'Secondary'}})
+        self._set_topology(server_profile, ['/fake_net_uri'])
+        self.sync.oneview_client.ethernet_networks.get.side_effect = (
+            oneview_exceptions.HPOneViewException({'errorCode': 'NOT_FOUND'}))
+
+        self.sync.recreate_connection()
+
+        port_client = self.sync.neutron_client.port
+        port_client.add_connection.assert_called_once_with(
+            'aa:11:cc:33:ee:55',
+            '/rest/ethernet-networks/' + fake_network.oneview_network_id,
+            'true', mock.ANY, server_profile)
+        self.assertEqual(1, port_client.update_server_profile.call_count)
+        self.assertEqual(['aa:11:cc:33:ee:44'], [
+            connection.get('mac')
+            for connection in server_profile['connections']])
 
     @mock.patch.object(database_manager, 'get_port_with_binding_profile')
     @mock.patch.object(database_manager, 'list_neutron_oneview_network')
-    @mock.patch.object(
-        common, 'server_hardware_from_local_link_information_list')
-    @mock.patch.object(common, 'local_link_information_from_port')
-    @mock.patch.object(sync, '_update_connection')
-    @mock.patch.object(sync, '_fix_connections_with_removed_networks')
     @mock.patch.object(common, 'get_database_session')
     def test_recreate_connection_no_nets(
-            self, mock_session, mock_fix_sp, mock_update,
-            mock_lli, mock_sh, mock_list_net, mock_port):
+            self, mock_session, mock_list_net, mock_port):
         session = mock_session()
-        mock_port.return_value = [[
-            {'network_id': '123',
-             'mac_address': 'aa:11:cc:33:ee:44'},
-            {'vnic_type': 'baremetal',
-             'profile': '1111'}
-        ]]
+        mock_port.return_value = [self._bound_port()]
         port_dict = {
             'network_id': '123',
             'binding:vnic_type': 'baremetal',
             'binding:host_id': 'host_id',
             'mac_address': 'aa:11:cc:33:ee:44',
-            'binding:profile': 1111
+            'binding:profile': mech_test.FAKE_PORT.get('binding:profile')
         }
         mock_list_net.return_value = []
+        self._set_topology(
+            copy.deepcopy(mech_test.FAKE_SERVER_PROFILE), ['/fake_net_uri'])
 
         self.sync.recreate_connection()
 
-        self.assertFalse(mock_fix_sp.called)
-        self.assertFalse(mock_update.called)
+        self.assertFalse(
+            self.sync.neutron_client.port.update_server_profile.called)
         self.sync.neutron_client.port.create.assert_called_with(
             session, port_dict
         )
+
+    @mock.patch.object(database_manager, 'list_neutron_oneview_network')
+    def test_plan_server_profile_with_deleted_network(self, mock_list_net):
+        session = mock.Mock()
+        server_profile = copy.deepcopy(mech_test.FAKE_SERVER_PROFILE)
+        server_profile['connections'][0]['id'] = 1
+        server_profile['connections'][0]['networkUri'] = '/fake_net_uri'
+        server_hardware = copy.deepcopy(mech_test.FAKE_SERVER_HARDWARE)
+        topology = snapshot.TopologySnapshot(
+            [server_hardware], [server_profile], snapshot.KnownNetworks(
+                self.sync.oneview_client, ['/fake_net_uri']))
+        plan = sync_plan.SyncPlan()
+        plan.removed_network_uris.add('/fake_net_uri')
+        plan.removed_neutron_network_ids.add('123')
+        port_dict = {'network_id': '123', 'mac_address': 'aa:11:cc:33:ee:44'}
+
+        self.sync._plan_server_profile(
+            session, server_hardware, server_profile, [port_dict], topology,
+            plan)
+
+        self.assertFalse(mock_list_net.called)
+        self.assertEqual([], server_profile['connections'])
+        self.assertEqual([(sync_plan.CONNECTIONS, 'update server profiles')],
+                         list(plan.summary()))
+        self.assertFalse(
+            self.sync.neutron_client.port.update_server_profile.called)
+
+    def test_fix_connections_with_removed_networks(self):
+        server_profile = copy.deepcopy(mech_test.FAKE_SERVER_PROFILE)
+        previous_connections = copy.deepcopy(server_profile['connections'])
+        server_profile['connections'].append({
+            'portId': '5678', 'networkUri': '/removed_net_uri',
+            'mac': 'aa:11:cc:33:ee:55', 'boot': {'priority': 'Secondary'}})
+        topology = snapshot.TopologySnapshot(
+            [], [server_profile], snapshot.KnownNetworks(
+                self.sync.oneview_client, ['/fake_net_uri']))
+        self.sync.oneview_client.ethernet_networks.get.side_effect = (
+            oneview_exceptions.HPOneViewException({'errorCode': 'NOT_FOUND'}))
+
+        self.sync._fix_connections_with_removed_networks(
+            server_profile, topology)
+
+        self.assertEqual(previous_connections, server_profile['connections'])
+        self.sync.oneview_client.ethernet_networks.get.assert_called_once_with(
+            'removed_net_uri')